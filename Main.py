@@ -1,17 +1,125 @@
 from loguru import logger
 from config.LoggerConfig import LoggerConfigurator
-from service.WebEdgeService import WebEdgeService
 from time import sleep
 from config.JsonLoadConfig import resolve_driver_exe_path, resolve_cookie_file_path
-from config.WebdriverConfig import WebDriverConfigurator
+from tools.Metrics import configure_metrics
+from tools.CommandTracer import configure_tracer
+from tools.SessionRecorder import configure_recorder
+from tools.MemoryGuard import configure_memory_guard
+from tools.ArtifactWriter import configure_artifacts
 import signal
 import atexit
-import keyboard 
 import os
+import sys
+import argparse
+import importlib
+from time import perf_counter
 
-def main():
-    # 初始化日志系统
-    LoggerConfigurator().setup()
+# 基准测试子命令：子命令名 -> (模块, 说明)；其余参数原样交给模块的 main(argv)
+BENCH_COMMANDS = {
+    "bench-ocr": ("tools.bench.OcrProfileBench", "OCR 档位基准测试（延迟、准确率、内存）"),
+    "bench-llm": ("tools.bench.LlmBatchBench", "LLM 批量解答基准测试（本地模拟服务）"),
+    "bench-catalogue": ("tools.bench.CatalogueBench", "课程目录扫描基准测试（保存的 HTML 样本）"),
+    "bench-prewarm": ("tools.bench.PrewarmBench", "空闲预热基准测试（首个随堂测试延迟）"),
+    "profile-startup": ("tools.StartupProfiler", "启动导入耗时分析"),
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="智慧树自动学习；不带子命令时等同于 run")
+    sub = parser.add_subparsers(dest="command")
+    run = sub.add_parser("run", help="运行完整流程")
+    run.add_argument("--profile", choices=["cprofile", "pyinstrument"], default=None, help="对主线程做性能分析")
+    run.add_argument("--profile-dir", default="./logs", help="性能分析原始文件目录")
+    run.add_argument("--top", type=int, default=30, help="结果中保留的函数数")
+    run.add_argument("--out", default=None, help="运行结果 JSON 路径（默认写入 bench_results）")
+    for name, (_, help_text) in BENCH_COMMANDS.items():
+        # 参数与帮助由对应模块解析
+        sub.add_parser(name, help=help_text, add_help=False)
+    return parser
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else list(argv)
+    parser = build_parser()
+    args, rest = parser.parse_known_args(argv)
+    command = args.command or "run"
+    if command in BENCH_COMMANDS:
+        module = importlib.import_module(BENCH_COMMANDS[command][0])
+        return module.main(rest)
+    if rest:
+        parser.error(f"无法识别的参数：{' '.join(rest)}")
+    return run(args)
+
+
+def run(args) -> int:
+    """运行完整流程；结束后把耗时、阶段统计与性能分析摘要写入结果 JSON。"""
+    profiler = None
+    kind = getattr(args, "profile", None)
+    if kind:
+        from tools.RunProfiler import RunProfiler
+        profiler = RunProfiler(kind, args.profile_dir, args.top)
+        if not profiler.start():
+            profiler = None
+    start = perf_counter()
+    state = {"status": "ok", "written": False}
+
+    def finish():
+        # 正常结束与热键退出（随后立即 os._exit）都会调用，只写一次
+        if state["written"]:
+            return
+        state["written"] = True
+        from tools.Metrics import metrics
+        from tools.bench.BenchCommon import write_results
+        report = {
+            "status": state["status"],
+            "wall_s": round(perf_counter() - start, 2),
+            "stages": metrics.summary(),
+            "profile": profiler.stop() if profiler else None,
+        }
+        try:
+            path = write_results("run", report, getattr(args, "out", None))
+            logger.info(f"运行结果已写入：{path}")
+        except Exception as e:
+            logger.warning(f"写入运行结果失败：{e}")
+
+    try:
+        run_app(on_exit=finish)
+    except BaseException as e:
+        state["status"] = type(e).__name__
+        raise
+    finally:
+        finish()
+    return 0
+
+
+def exit_process(log_config: LoggerConfigurator, code: int = 0):
+    """写完日志队列后立即结束进程（热键与 atexit 退出共用）。"""
+    try:
+        log_config.close()
+    finally:
+        os._exit(code)
+
+
+def run_app(on_exit=None):
+    # 初始化日志系统；未经热键退出时（如浏览器启动前出错）由 atexit 写完日志队列
+    log_config = LoggerConfigurator()
+    log_config.setup()
+    atexit.register(log_config.close)
+    configure_metrics()
+    configure_tracer()
+    configure_recorder()
+    configure_memory_guard()
+    configure_artifacts()
+
+    # LLM 客户端在首次答题时才创建；启动时先校验配置，密钥缺失等错误在打开浏览器前报告
+    from tools.llms.DeepSeek import check_config
+    check_config()
+
+    # selenium、OCR、LLM 等重量级模块在日志就绪后再导入
+    import keyboard
+    from config.WebdriverConfig import WebDriverConfigurator
+    from service.WebEdgeService import WebEdgeService
 
     # 构建浏览器服务
     driver_exe = resolve_driver_exe_path()
@@ -24,9 +132,11 @@ def main():
         logger.warning("收到 Ctrl+Shift+C，先保存 Cookie，再释放线程与浏览器资源...")
         try:
             web_service.shutdown()
+            if on_exit:
+                on_exit()
         finally:
-            # 确保立刻退出进程（已完成清理）
-            os._exit(0)
+            # 确保立刻退出进程（已完成清理）；退出前写完日志队列，关闭日志与运行统计不丢失
+            exit_process(log_config)
 
     # 注册热键
     atexit.register(hotkey_shutdown)
@@ -37,31 +147,90 @@ def main():
         logger.error(f"注册热键失败：{e}")
 
     try:
-        # 打开入口并确保登录进入学习页面
-        web_service._ensure_login_and_enter_study()
+        run_pipeline(web_service)
+    finally:
+        web_service.shutdown()
+
+
+def run_pipeline(web_service):
+    """登录、进入课程，依次处理未完成的课程与章节测试（会话回放复用同一流程）。"""
+    # 初始化并暂停监听线程；此后主线程的 WebDriver 操作都经调度器的命令线程执行，不与 Cookie 快照并发
+    web_service.init_listeners()
+    web_service.pause_listeners()
+
+    # 打开入口并确保登录进入学习页面
+    web_service._ensure_login_and_enter_study()
 
-        # 提示用户选择课程，进入课程页面后关闭课前必读并提取课程名称
-        web_service._wait_course_and_prepare()
+    # 提示用户选择课程，进入课程页面后关闭课前必读并提取课程名称
+    web_service._wait_course_and_prepare()
 
-        # 初始化并暂停监听线程
-        web_service.init_listeners()
+    while True:
+        try:
+            run_courses(web_service)
+            run_tests(web_service)
+            return
+        except Exception as e:
+            # 浏览器或会话崩溃：重建驱动回到课程页后重新扫描目录，从当前课程继续
+            if not web_service.session_lost(e):
+                raise
+            if not web_service.recover_session():
+                raise
+
+
+def run_courses(web_service):
+    """
+    依次处理未完成的课程视频。
+    课程页被刷新（停滞恢复）后目录元素失效，重新扫描目录，并跳过本轮已处理过的课程。
+    """
+    session = web_service.session_supervisor
+    # 获取待完成课程和测试
+    unfinisheds = web_service._get_course_and_test_account()
+    session.check()
+    pending = list(unfinisheds["unfinished_course"])
+    handled = set()
+
+    while pending:
+        unfinished = pending.pop(0)
+        name = web_service.lesson_name(unfinished) or str(unfinished)
+        handled.add(name)
+        logger.info(f"开始处理课程: {name}")
+        # 本课程开始前恢复监听
+        web_service.resume_listeners()
+        web_service._handle_course(unfinished)
+        # 本课程结束后暂停监听，等待下一门课程
         web_service.pause_listeners()
+        logger.info(f"课程 {name} 处理完成，即将进行下一个课程")
+        sleep(3)
+        if pending and web_service.catalogue_stale:
+            logger.info("课程页已刷新，重新扫描目录")
+            unfinisheds = web_service._get_course_and_test_account()
+            session.check()
+            pending = [
+                el for el in unfinisheds["unfinished_course"]
+                if (web_service.lesson_name(el) or str(el)) not in handled
+            ]
 
-        # 获取待完成课程和测试
-        unfinisheds = web_service._get_course_and_test_account()
 
-        for unfinished in unfinisheds["unfinished_course"]:
-            logger.info(f"开始处理课程: {unfinished}")
-            # 本课程开始前恢复监听
-            web_service.resume_listeners()
-            web_service._handle_course(unfinished)
-            # 本课程结束后暂停监听，等待下一门课程
-            web_service.pause_listeners()
-            logger.info(f"课程 {unfinished} 处理完成，即将进行下一个课程")
-            sleep(3)
-    finally:
-        web_service.shutdown()
+def run_tests(web_service):
+    """视频处理完后重新扫描目录（元素可能已刷新），依次完成章节测试。"""
+    session = web_service.session_supervisor
+    unfinisheds = web_service._get_course_and_test_account()
+    session.check()
+    total = len(unfinisheds["unfinished_test"])
+    skipped = 0
+    for n in range(total):
+        tests = unfinisheds["unfinished_test"]
+        if len(tests) <= skipped:
+            break
+        logger.info(f"开始处理章节测试 {n + 1}/{total}")
+        result = web_service._handle_test(tests[skipped])
+        session.check()
+        if not result.get("submitted"):
+            # 未能提交的测试跳过，避免反复尝试
+            skipped += 1
+        unfinisheds = web_service._get_course_and_test_account()
+        session.check()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
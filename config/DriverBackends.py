@@ -0,0 +1,154 @@
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Optional, Dict, Type
+
+from loguru import logger
+from selenium import webdriver
+
+
+class DriverBackend(ABC):
+    """
+    浏览器驱动后端：封装各浏览器 Options/Service/Driver 的差异，
+    WebDriverConfigurator 只依赖这里的统一接口。
+    抽象方法未全部实现的后端在实例化时即报错，而不是在构建驱动的中途。
+    """
+
+    name = ""
+    # 是否支持附加到已运行浏览器（debuggerAddress）
+    supports_attach = False
+
+    @abstractmethod
+    def make_options(self):
+        """创建浏览器对应的 Options。"""
+
+    def apply_quiet(self, options):
+        """基础降噪参数。"""
+
+    @abstractmethod
+    def apply_headless(self, options, window_size: str):
+        """无头模式与窗口大小。"""
+
+    @abstractmethod
+    def apply_user_data_dir(self, options, path: str):
+        """使用持久化的用户数据目录。"""
+
+    def apply_debugger_address(self, options, address: str):
+        """附加到已运行浏览器的调试地址；仅 supports_attach 的后端会被调用，其余为空操作。"""
+
+    def apply_binary(self, options, binary_path: str):
+        options.binary_location = binary_path
+
+    def profile_initialized(self, path: str) -> bool:
+        """持久化目录是否已被浏览器初始化（含登录态）。"""
+        return False
+
+    @abstractmethod
+    def create(self, driver_path: Optional[str], options):
+        """启动驱动并返回 WebDriver 实例。"""
+
+
+class ChromiumBackend(DriverBackend):
+    """基于 Chromium 内核的浏览器（Chrome/Chromium/Edge）公共实现。"""
+
+    supports_attach = True
+
+    def apply_quiet(self, options):
+        options.add_argument("--log-level=3")
+        options.add_argument("--silent")
+        options.add_experimental_option("excludeSwitches", ["enable-logging"])  # 禁用驱动层日志
+        options.add_experimental_option("useAutomationExtension", False)         # 禁用自动化扩展
+
+    def apply_headless(self, options, window_size: str):
+        options.add_argument("--headless=new")
+        options.add_argument(f"--window-size={window_size}")
+        # 服务器环境：以 root 运行、/dev/shm 较小、无 GPU
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--mute-audio")
+        # 无头模式下没有用户手势，需允许视频自动播放
+        options.add_argument("--autoplay-policy=no-user-gesture-required")
+
+    def apply_user_data_dir(self, options, path: str):
+        options.add_argument(f"--user-data-dir={path}")
+
+    def apply_debugger_address(self, options, address: str):
+        options.debugger_address = address
+
+    def profile_initialized(self, path: str) -> bool:
+        return (Path(path) / "Default").is_dir()
+
+
+class EdgeBackend(ChromiumBackend):
+    name = "edge"
+
+    def make_options(self):
+        from selenium.webdriver.edge.options import Options
+        return Options()
+
+    def create(self, driver_path: Optional[str], options):
+        from selenium.webdriver.edge.service import Service
+        return webdriver.Edge(service=Service(executable_path=driver_path), options=options)
+
+
+class ChromiumBrowserBackend(ChromiumBackend):
+    name = "chromium"
+
+    def make_options(self):
+        from selenium.webdriver.chrome.options import Options
+        return Options()
+
+    def create(self, driver_path: Optional[str], options):
+        from selenium.webdriver.chrome.service import Service
+        return webdriver.Chrome(service=Service(executable_path=driver_path), options=options)
+
+
+class FirefoxBackend(DriverBackend):
+    name = "firefox"
+
+    def make_options(self):
+        from selenium.webdriver.firefox.options import Options
+        return Options()
+
+    def apply_quiet(self, options):
+        options.set_preference("devtools.console.stdout.content", False)
+        # 允许视频自动播放（0 = 允许）
+        options.set_preference("media.autoplay.default", 0)
+
+    def apply_headless(self, options, window_size: str):
+        options.add_argument("-headless")
+        try:
+            width, height = [int(v) for v in window_size.split(",")]
+            options.add_argument(f"--width={width}")
+            options.add_argument(f"--height={height}")
+        except Exception:
+            pass
+
+    def apply_user_data_dir(self, options, path: str):
+        options.add_argument("-profile")
+        options.add_argument(path)
+
+    def profile_initialized(self, path: str) -> bool:
+        return (Path(path) / "cookies.sqlite").exists()
+
+    def create(self, driver_path: Optional[str], options):
+        from selenium.webdriver.firefox.service import Service
+        return webdriver.Firefox(service=Service(executable_path=driver_path), options=options)
+
+
+BACKENDS: Dict[str, Type[DriverBackend]] = {
+    "edge": EdgeBackend,
+    "chromium": ChromiumBrowserBackend,
+    "chrome": ChromiumBrowserBackend,
+    "firefox": FirefoxBackend,
+}
+
+
+def get_backend(name: Optional[str]) -> DriverBackend:
+    """按名称获取驱动后端，未知名称回退到 Edge。"""
+    key = (name or "edge").strip().lower()
+    cls = BACKENDS.get(key)
+    if cls is None:
+        logger.warning(f"未知的浏览器类型 {name}，回退使用 Edge")
+        cls = EdgeBackend
+    return cls()
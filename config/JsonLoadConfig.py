@@ -1,6 +1,9 @@
+import os
 import json
+import shutil
+import platform
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 # 定位项目根 config.json
 def get_project_root() -> Path:
@@ -11,10 +14,10 @@ def get_project_root() -> Path:
             return root
     return p.parents[1]
 
-# 加载完整配置 JSON
+# 加载完整配置 JSON（环境变量 AZS_CONFIG 可指定其他配置文件，如本地仿真测试）
 def load_config() -> Dict[str, Any]:
     root = get_project_root()
-    cfg_path = root / "config.json"
+    cfg_path = Path(os.environ.get("AZS_CONFIG") or (root / "config.json"))
     try:
         with cfg_path.open("r", encoding="utf-8") as f:
             return json.load(f)
@@ -33,25 +36,294 @@ def get_llm_deepseek_config() -> Dict[str, Any]:
         "model": d.get("model") or "deepseek-chat",
     }
 
+# 读取 LLM 批量解答配置（章节测试多题合并请求）
+def get_llm_batch_config() -> Dict[str, Any]:
+    b = cfg.get("llm", {}).get("batch", {})
+    return {
+        "enabled": bool(b.get("enabled", True)),
+        "initial_size": max(1, int(b.get("initial_size") or 5)),
+        "min_size": max(1, int(b.get("min_size") or 1)),
+        "max_size": max(1, int(b.get("max_size") or 20)),
+        # 单次批量请求的目标耗时（秒），批大小据此由实测耗时推算
+        "target_latency_seconds": float(b.get("target_latency_seconds") or 15),
+    }
+
+# 读取多模态解答配置（题目截图直接交给视觉模型，跳过 OCR）
+def get_llm_vision_config() -> Dict[str, Any]:
+    v = cfg.get("llm", {}).get("vision", {})
+    mode = str(v.get("mode") or "auto").lower()
+    return {
+        "enabled": bool(v.get("enabled", False)),
+        # 留空则沿用 llm.deepseek.api_key
+        "api_key": (v.get("api_key") or "").strip(),
+        "base_url": v.get("base_url") or "https://api.openai.com/v1",
+        "model": v.get("model") or "gpt-4o-mini",
+        # auto：题目含图片/公式或 OCR 置信度低时使用视觉模型；always：总是使用；never：总是 OCR
+        "mode": mode if mode in ("auto", "always", "never") else "auto",
+        "min_ocr_confidence": float(v.get("min_ocr_confidence", 0.6)),
+        "dom_check": bool(v.get("dom_check", True)),
+        # 截图长边缩放上限（像素）与 JPEG 质量
+        "max_side": int(v.get("max_side") or 1024),
+        "jpeg_quality": int(v.get("jpeg_quality") or 80),
+    }
+
+# 读取 OCR 配置
+def get_ocr_config() -> Dict[str, Any]:
+    o = cfg.get("ocr", {})
+    mode = str(o.get("mode") or "full").lower()
+    return {
+        # full：原图识别一次；two_tier：先缩小识别，低分行与选项行再按原图裁剪重识别
+        "mode": mode if mode in ("full", "two_tier") else "full",
+        "first_pass_scale": min(1.0, max(0.1, float(o.get("first_pass_scale") or 0.5))),
+        "min_line_score": float(o.get("min_line_score", 0.8)),
+        # 重识别裁剪时向外扩展的像素（原图坐标）
+        "crop_padding": int(o.get("crop_padding", 4)),
+        "profile": o.get("profile") or "default",
+    }
+
+# 读取 OCR 模型档位：cnocr 为传给 CnOcr 的参数，onnxruntime 为推理会话选项
+def get_ocr_profiles() -> Dict[str, Dict[str, Any]]:
+    profiles = cfg.get("ocr", {}).get("profiles") or {}
+    out = {"default": {"cnocr": {}, "onnxruntime": {}}}
+    for name, p in profiles.items():
+        p = p or {}
+        ort = p.get("onnxruntime") or {}
+        out[name] = {
+            "cnocr": dict(p.get("cnocr") or {}),
+            "onnxruntime": {
+                # 0 表示由 onnxruntime 自行决定
+                "intra_op_threads": int(ort.get("intra_op_threads") or 0),
+                "inter_op_threads": int(ort.get("inter_op_threads") or 0),
+                # disable / basic / extended / all，留空则使用默认
+                "graph_optimization": (ort.get("graph_optimization") or "").lower(),
+            },
+        }
+    return out
+
+def get_ocr_profile(name: Optional[str] = None) -> Dict[str, Any]:
+    profiles = get_ocr_profiles()
+    name = name or get_ocr_config()["profile"]
+    if name not in profiles:
+        name = "default"
+    return {"name": name, **profiles[name]}
+
+# 读取 site 配置（站点入口与页面地址特征）
+def get_site_config() -> Dict[str, Any]:
+    s = cfg.get("site", {})
+    return {
+        "base_url": s.get("base_url") or "https://onlineweb.zhihuishu.com/",
+        "study_url_hint": s.get("study_url_hint") or "https://onlineweb.zhihuishu.com/onlinestuh5",
+        "course_url_hint": s.get("course_url_hint") or "https://studywisdomh5.zhihuishu.com/study/index",
+        "login_domain_hint": s.get("login_domain_hint") or "passport.zhihuishu.com",
+    }
+
+# 读取 session 配置（会话检查点）
+def get_session_config() -> Dict[str, Any]:
+    s = cfg.get("session", {})
+    return {
+        "checkpoint_interval_seconds": float(s.get("checkpoint_interval_seconds") or 60),
+        "checkpoint_debounce_seconds": float(s.get("checkpoint_debounce_seconds") or 3),
+        # 浏览器或 WebDriver 会话崩溃后自动重建驱动
+        "restart_enabled": bool(s.get("restart_enabled", True)),
+        # 连续重建失败的上限（成功恢复后重新计数）
+        "max_restarts": int(s.get("max_restarts") if s.get("max_restarts") is not None else 5),
+        # 连续失败多少条命令后做一次存活检查
+        "failure_threshold": max(1, int(s.get("failure_threshold") or 3)),
+        # 重建后等待课程目录加载的时间（秒）
+        "recovery_wait_seconds": float(s.get("recovery_wait_seconds") or 30),
+    }
+
+# 读取 listeners 配置（监听调度器）
+def get_listener_config() -> Dict[str, Any]:
+    l = cfg.get("listeners", {})
+    return {
+        # 页面探测间隔（秒）：每次探测仅一次脚本调用
+        "probe_interval_seconds": float(l.get("probe_interval_seconds") or 1.0),
+    }
+
+# 读取 listeners.watchdog 配置（播放停滞检测与自动恢复）
+def get_watchdog_config() -> Dict[str, Any]:
+    w = cfg.get("listeners", {}).get("watchdog", {})
+    steps = [s for s in (w.get("steps") or ["resume", "nudge", "reload"]) if s in ("resume", "nudge", "reload")]
+    return {
+        "enabled": bool(w.get("enabled", True)),
+        # 期望播放速度（视频秒/实际秒），与设置的倍速一致
+        "expected_rate": float(w.get("expected_rate") or 1.5),
+        # 窗口内实际速度低于 期望速度 × min_ratio 视为停滞
+        "min_ratio": float(w.get("min_ratio") or 0.3),
+        # 判定窗口（秒）：每个窗口结束时计算一次速度，恢复操作后重新计时
+        "stall_seconds": max(2.0, float(w.get("stall_seconds") or 6)),
+        # 课程开始后的宽限时间（秒），留给倍速设置与缓冲
+        "grace_seconds": float(w.get("grace_seconds") or 10),
+        # 逐级尝试的恢复手段：resume 恢复播放、nudge 回拖几秒、reload 刷新并重新进入课程
+        "steps": steps,
+        "nudge_seconds": float(w.get("nudge_seconds") or 2),
+        # 所有手段用尽后结束本课程，不再等待最大等待时间
+        "abandon": bool(w.get("abandon", True)),
+    }
+
+# 读取 prewarm 配置（视频播放期间的空闲预热）
+def get_prewarm_config() -> Dict[str, Any]:
+    p = cfg.get("prewarm", {})
+    return {
+        "enabled": bool(p.get("enabled", True)),
+        # 课程开始后延迟多久开始预热（秒），避开页面加载
+        "start_delay_seconds": float(p.get("start_delay_seconds") or 5),
+        # 空跑一次 OCR 推理的间隔（秒），保持 onnxruntime 缓存与内存页常驻；0 表示只在课程开始与预计弹窗前执行
+        "ocr_interval_seconds": float(p.get("ocr_interval_seconds") if p.get("ocr_interval_seconds") is not None else 180),
+        # LLM 保活请求（models.list）的间隔（秒）；0 表示只在课程开始与预计弹窗前执行
+        "llm_interval_seconds": float(p.get("llm_interval_seconds") if p.get("llm_interval_seconds") is not None else 120),
+        # 距预计弹窗位置多少秒（视频时间）开始预热并加快探测
+        "lead_seconds": float(p.get("lead_seconds") or 20),
+        # 预计弹窗前后的探测间隔（秒）
+        "fast_probe_interval_seconds": float(p.get("fast_probe_interval_seconds") or 0.25),
+    }
+
+# 读取 exam 配置（章节测试页面选择器与流水线并发数）
+def get_exam_config() -> Dict[str, Any]:
+    e = cfg.get("exam", {})
+    return {
+        "url_hint": e.get("url_hint") or "onlineexamh5new.zhihuishu.com",
+        "wait_seconds": float(e.get("wait_seconds") or 20),
+        # 同时进行中的 LLM 请求数
+        "llm_workers": max(1, int(e.get("llm_workers") or 3)),
+        "question_selector": e.get("question_selector") or ".examPaper_subject",
+        "type_selector": e.get("type_selector") or ".subject_type",
+        "stem_selector": e.get("stem_selector") or ".subject_describe",
+        "option_selector": e.get("option_selector") or ".subject_node .nodeLab",
+        "checked_selector": e.get("checked_selector") or "input:checked, .onChecked, .is-checked",
+        "progress_selector": e.get("progress_selector") or ".completion-rate",
+        "submit_selector": e.get("submit_selector") or ".btnStyleXSumit",
+        "confirm_selector": e.get("confirm_selector") or ".el-message-box__btns .el-button--primary",
+    }
+
+# 读取 logging 配置（日志级别、轮转与保留、结构化日志、高频日志限流）
+def get_logging_config() -> Dict[str, Any]:
+    g = cfg.get("logging", {})
+    return {
+        "level": str(g.get("level") or "DEBUG").upper(),
+        "console_level": str(g.get("console_level") or g.get("level") or "DEBUG").upper(),
+        "dir": (g.get("dir") or "./logs").strip(),
+        # 单个日志文件的轮转大小、压缩格式与 JSON 日志的保留时长（loguru 格式）
+        "rotation": g.get("rotation") or "20 MB",
+        "compression": g.get("compression") or "zip",
+        "retention": g.get("retention") or "14 days",
+        # 每次运行生成一个文本日志文件，目录中最多保留的份数（0 表示不清理）
+        "max_files": int(g.get("max_files", 20) or 0),
+        "json": bool(g.get("json", True)),
+        "console_async": bool(g.get("console_async", True)),
+        # 模块名 -> 同一行 DEBUG 日志的最小输出间隔（秒），子模块沿用父模块的设置
+        "rate_limits": {str(k): float(v) for k, v in (g.get("rate_limits") or {}).items()},
+        "raw_response_chars": int(g.get("raw_response_chars") or 500),
+    }
+
+# 读取 metrics 配置（阶段耗时统计）
+def get_metrics_config() -> Dict[str, Any]:
+    m = cfg.get("metrics", {})
+    return {
+        "enabled": bool(m.get("enabled", False)),
+        "dir": (m.get("dir") or "./logs").strip(),
+        # 导出格式：prometheus（文本文件）、jsonl
+        "formats": [str(f).strip().lower() for f in (m.get("formats") or ["prometheus", "jsonl"])],
+        # JSONL 导出保留的最近耗时明细条数（超出后丢弃最早的，直方图仍统计全部）
+        "max_spans": int(m.get("max_spans") if m.get("max_spans") is not None else 10000),
+    }
+
+# 读取 tracer 配置（WebDriver 命令追踪）
+def get_tracer_config() -> Dict[str, Any]:
+    t = cfg.get("tracer", {})
+    return {
+        "enabled": bool(t.get("enabled", False)),
+        "top_n": int(t.get("top_n") or 15),
+        "dir": (t.get("dir") or "./logs").strip(),
+    }
+
+# 读取 recorder 配置（页面会话录制，供回放复现）
+def get_recorder_config() -> Dict[str, Any]:
+    r = cfg.get("recorder", {})
+    return {
+        "enabled": bool(r.get("enabled", False)),
+        "dir": (r.get("dir") or "./recordings").strip(),
+        "snapshots": bool(r.get("snapshots", True)),
+    }
+
+# 读取 memory 配置（长时间运行的内存观测与回收）
+def get_memory_config() -> Dict[str, Any]:
+    m = cfg.get("memory", {})
+    return {
+        "enabled": bool(m.get("enabled", False)),
+        # 常驻内存相对首个检查点的增长上限（MB），超过后告警并回收
+        "budget_mb": float(m.get("budget_mb") or 300),
+        "recycle": bool(m.get("recycle", True)),
+        "top_n": int(m.get("top_n") or 10),
+        "tracemalloc_frames": max(1, int(m.get("tracemalloc_frames") or 1)),
+        "dir": (m.get("dir") or "./logs").strip(),
+    }
+
+# 读取 artifacts 配置（随堂测试截图等调试样本的后台写入）
+def get_artifacts_config() -> Dict[str, Any]:
+    a = cfg.get("artifacts", {})
+    fmt = str(a.get("format") or "webp").lower()
+    return {
+        "enabled": bool(a.get("enabled", False)),
+        "dir": (a.get("dir") or "./artifacts").strip(),
+        # 采样率（0~1），每道题按该概率保存
+        "sample_rate": min(1.0, max(0.0, float(a.get("sample_rate", 1.0)))),
+        # 样本目录的总大小上限（MB），超过后删除最早的样本
+        "max_mb": float(a.get("max_mb") or 200),
+        "format": fmt if fmt in ("webp", "png") else "webp",
+        "queue_size": int(a.get("queue_size") or 32),
+    }
+
+# 各浏览器对应的驱动可执行文件名（不含 .exe 后缀）
+DRIVER_EXE_NAMES = {
+    "edge": "msedgedriver",
+    "chromium": "chromedriver",
+    "chrome": "chromedriver",
+    "firefox": "geckodriver",
+}
+
 # 读取 web_config 配置（目录名），并提供路径解析
 def get_web_config() -> Dict[str, Any]:
     w = cfg.get("web_config", {})
     driver_dir = (w.get("driver_path") or "edgedriver_win64").strip() or "edgedriver_win64"
     cookie_rel = (w.get("cookie_path") or "edgedriver_win64/cookies.json").strip() or "edgedriver_win64/cookies.json"
     return {
+        # 浏览器后端：edge / chromium / firefox
+        "browser": (w.get("browser") or "edge").strip().lower(),
+        # 无头模式（服务器部署）
+        "headless": bool(w.get("headless", False)),
+        "window_size": (w.get("window_size") or "1920,1080").strip(),
+        # 浏览器可执行文件路径（留空则使用系统默认安装位置）
+        "binary_path": (w.get("binary_path") or "").strip(),
         "driver_path": driver_dir,
         "cookie_path": cookie_rel,
+        # 持久化用户数据目录（留空则每次使用临时配置）
+        "user_data_dir": (w.get("user_data_dir") or "").strip(),
+        # 附加到已运行浏览器的调试地址，如 127.0.0.1:9222（留空则自行启动浏览器）
+        "debugger_address": (w.get("debugger_address") or "").strip(),
+        # 页面加载策略：normal / eager（DOMContentLoaded 即返回）/ none
+        "page_load_strategy": (w.get("page_load_strategy") or "normal").strip().lower(),
+        # 通过 DevTools 屏蔽的 URL 通配模式（统计脚本、字体、头像、横幅等）
+        "blocked_urls": [str(u).strip() for u in (w.get("blocked_urls") or []) if str(u).strip()],
     }
 
 # 解析绝对路径（驱动与 Cookie）
-def resolve_driver_exe_path() -> str:
+def resolve_driver_exe_path() -> Optional[str]:
     root = get_project_root()
     web = get_web_config()
-    exe = root / "tools" / web["driver_path"] / "msedgedriver.exe"
+    name = DRIVER_EXE_NAMES.get(web["browser"], "msedgedriver")
+    if platform.system() == "Windows":
+        name += ".exe"
+    exe = root / "tools" / web["driver_path"] / name
     if exe.exists():
         return str(exe)
-    # 回退默认
-    return str(root / "tools" / "edgedriver_win64" / "msedgedriver.exe")
+    # 回退默认目录
+    default = root / "tools" / "edgedriver_win64" / name
+    if default.exists():
+        return str(default)
+    # 再回退到 PATH；仍找不到则交由 Selenium Manager 自动解析
+    return shutil.which(name)
 
 
 def resolve_cookie_file_path() -> str:
@@ -59,4 +331,16 @@ def resolve_cookie_file_path() -> str:
     web = get_web_config()
     # 固定统一到 tools 目录下
     cookie = root / "tools" / web["cookie_path"].replace("\\", "/")
-    return str(cookie)
\ No newline at end of file
+    return str(cookie)
+
+
+def resolve_user_data_dir() -> Optional[str]:
+    web = get_web_config()
+    rel = web["user_data_dir"]
+    if not rel:
+        return None
+    p = Path(rel.replace("\\", "/"))
+    # 相对路径同样统一到 tools 目录下
+    if not p.is_absolute():
+        p = get_project_root() / "tools" / p
+    return str(p)
@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*-
+"""
+日志配置模块
+
+该模块提供 `LoggerConfigurator`，用于统一配置 loguru 的日志输出，
+包括控制台与文件日志、结构化 JSON 日志、日志格式、日志级别、轮转与保留策略、高频日志限流等。
+所有注释均为中文，帮助后续维护与扩展。
+"""
+
+from __future__ import annotations
+import os
+import copy
+import glob
+from collections import Counter
+from queue import Queue
+from threading import Lock, Thread
+from time import monotonic
+from typing import Any, Dict, Optional, Tuple
+from loguru import logger
+import sys  # 引入 sys 以便将日志输出到标准输出，从而支持颜色
+import datetime as dt  # 引入日期时间模块用于生成日志文件的时间戳
+import logging  # 控制第三方库（如 urllib3、selenium）的日志级别
+from config.JsonLoadConfig import get_logging_config
+
+# 参与限流的日志级别（INFO 及以上总是输出）
+_RATE_LIMITED_LEVELS = ("TRACE", "DEBUG")
+
+
+class RateLimiter:
+    """
+    高频日志限流：同一调用位置（模块 + 行号）的 DEBUG 日志在间隔内只输出一次。
+    作为 loguru 的 patcher 每条日志只判断一次，结果写入 extra，由各 sink 的 filter 读取。
+    """
+
+    def __init__(self, rules: Dict[str, float]):
+        self.rules = {k: v for k, v in rules.items() if v > 0}
+        self._last: Dict[Tuple[str, int], float] = {}
+        self._intervals: Dict[str, float] = {}
+        self.suppressed: Counter = Counter()
+        self._lock = Lock()
+
+    def interval(self, name: str) -> float:
+        """按最长前缀匹配模块名（service.ListenerSupervisor 也匹配 service 的设置）。"""
+        cached = self._intervals.get(name)
+        if cached is not None:
+            return cached
+        value = 0.0
+        parts = (name or "").split(".")
+        for i in range(len(parts), 0, -1):
+            key = ".".join(parts[:i])
+            if key in self.rules:
+                value = self.rules[key]
+                break
+        self._intervals[name] = value
+        return value
+
+    def patch(self, record):
+        if not self.rules or record["level"].name not in _RATE_LIMITED_LEVELS:
+            return
+        name = record["name"] or ""
+        interval = self.interval(name)
+        if not interval:
+            return
+        key = (name, record["line"])
+        now = monotonic()
+        with self._lock:
+            last = self._last.get(key)
+            if last is not None and now - last < interval:
+                self.suppressed[name] += 1
+                record["extra"]["_suppressed"] = True
+                return
+            self._last[key] = now
+
+
+def _not_suppressed(record) -> bool:
+    return not record["extra"].get("_suppressed")
+
+
+# 不带 sink 与 patcher 的 logger 副本，作为各次初始化的目标 logger 模板
+_backend_template = None
+
+
+def _backend_logger():
+    """
+    返回一个独立的 logger（sink 与全局 logger 互不影响）。
+    模板在首次初始化、全局 logger 尚未设置限流 patcher 时复制（configure(patcher=None) 无法清除已设置的 patcher）。
+    """
+    global _backend_template
+    if _backend_template is None:
+        _backend_template = copy.deepcopy(logger)
+    return copy.deepcopy(_backend_template)
+
+
+class _FanOutSink:
+    """
+    单一分发 sink：调用线程只把日志记录放入进程内队列（不做序列化；enqueue 的每个 sink 都会在调用线程上
+    各序列化一次记录并写入管道），后台线程再把记录重放到独立 logger 上的各个同步 sink（控制台、文本文件、JSON），
+    轮转、压缩、保留与格式仍由这些 sink 各自处理。
+    """
+
+    # 重放时沿用原记录的字段（时间、调用位置、线程等），而不是后台线程中的值
+    _FIELDS = ("time", "elapsed", "name", "module", "function", "file", "line", "process", "thread", "extra")
+
+    def __init__(self, backend):
+        self._backend = backend
+        self._log = backend.patch(self._restore)
+        self._record = None
+        self._traceback = ""
+        self._queue: Queue = Queue()
+        self._thread = Thread(target=self._run, name="LogFanOut", daemon=True)
+        self._thread.start()
+
+    def write(self, message):
+        # 分发 sink 的格式为空，消息文本只含调用线程上格式化好的异常堆栈（没有异常时为空）
+        self._queue.put((message.record, str(message).strip("\n")))
+
+    def drain(self):
+        """等待队列中的日志全部写出。"""
+        self._queue.join()
+
+    def stop(self):
+        # 移除分发 sink 时（包括进程退出时）写完队列，并关闭各个目标（关闭文件并执行压缩与保留策略）
+        self._queue.put(None)
+        self._thread.join()
+        self._backend.remove()
+
+    def _restore(self, record):
+        src = self._record
+        record.update({k: src[k] for k in self._FIELDS})
+        if self._traceback:
+            record["message"] = f"{record['message']}\n{self._traceback}"
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self._record, self._traceback = item
+                self._log.log(self._record["level"].name, self._record["message"])
+            except Exception:
+                pass
+            finally:
+                self._queue.task_done()
+
+
+class LoggerConfigurator:
+    """
+    日志配置类
+
+    该类封装日志初始化逻辑，支持：
+    - 根据传入的日志级别进行配置；
+    - 若未提供文件路径，自动按中文时间戳创建日志文件，超过大小后轮转压缩，并清理多余的历史文件；
+    - 控制台与文件统一使用自定义格式（控制台带颜色，文件不带颜色），各目标经同一个后台线程异步写出；
+    - 可选的结构化 JSON 日志（azs.jsonl），按大小轮转并按时长保留；
+    - 对高频 DEBUG 日志按模块限流。
+    """
+
+    def __init__(
+        self,
+        log_level: Optional[str] = None,
+        log_file_path: Optional[str] = None,
+        cfg: Optional[Dict[str, Any]] = None,
+        console: Any = None,
+    ):
+        # 保存配置，显式传入的日志级别与文件路径优先
+        self.cfg = cfg or get_logging_config()
+        self.log_level = log_level or self.cfg["level"]
+        self.console_level = log_level or self.cfg["console_level"]
+        self.log_file_path = log_file_path
+        self.console = console or sys.stdout
+        self.rate_limiter = RateLimiter(self.cfg["rate_limits"])
+        self._fanout: Optional[_FanOutSink] = None
+
+    def _prune_old_logs(self, log_dir: str):
+        """每次运行一个文本日志文件，按修改时间只保留最新的 max_files 份（含轮转压缩的分卷）。"""
+        keep = self.cfg["max_files"]
+        if keep <= 0:
+            return
+        files = [p for p in glob.glob(os.path.join(log_dir, "*.log*")) if os.path.isfile(p)]
+        files.sort(key=os.path.getmtime, reverse=True)
+        for path in files[keep:]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def flush(self):
+        """等待已记录的日志全部写入各个目标。"""
+        if self._fanout is not None:
+            self._fanout.drain()
+
+    def close(self):
+        """
+        写完队列中的日志并关闭全部 sink（关闭文件并执行压缩与保留策略）。
+        进程经 os._exit 退出时不会执行 loguru 的 atexit 清理，须在退出前调用，否则队列中的日志会丢失。
+        """
+        if self._fanout is None:
+            return
+        self._fanout = None
+        logger.remove()
+
+    def setup(self) -> logger.__class__:
+        """
+        执行日志初始化，返回 loguru 的全局 logger 对象。
+        """
+        # 先移除已有的 sink，避免重复输出
+        logger.remove()
+        c = self.cfg
+
+        # 若未提供日志文件路径，生成中文时间戳命名的日志文件
+        if self.log_file_path is None:
+            timestamp_cn = dt.datetime.now().strftime("%Y年%m月%d日-%H时%M分%S秒")
+            self.log_file_path = os.path.join(c["dir"], f"{timestamp_cn}.log")
+
+        # 确保目录存在，并清理多余的历史日志
+        log_dir = os.path.dirname(os.path.abspath(self.log_file_path))
+        if log_dir and not os.path.exists(log_dir):
+            os.makedirs(log_dir, exist_ok=True)
+        self._prune_old_logs(log_dir)
+
+        # 各目标 sink 挂在独立的 logger 上，由分发 sink 的后台线程同步写入
+        backend = _backend_logger()
+
+        # 限流判断在 patcher 中每条日志只做一次
+        logger.configure(patcher=self.rate_limiter.patch)
+
+        # 统一的日志格式（控制台有颜色标记，文件使用相同格式但不启用颜色）
+        log_format = (
+            "<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> "
+            "| <level>{level}</level> "
+            "| <cyan>{module}</cyan>:<cyan>{function}</cyan> "
+            "| <level>{message}</level>"
+        )
+
+        levels = [self.log_level]
+
+        # 控制台 sink：颜色高亮，便于开发调试；console_async 为 false 时在调用线程上直接写出
+        console_kwargs = dict(
+            sink=self.console,
+            level=self.console_level,
+            format=log_format,
+            colorize=True,
+            backtrace=True,
+            diagnose=False,
+        )
+        if c["console_async"]:
+            backend.add(**console_kwargs)
+            levels.append(self.console_level)
+        else:
+            logger.add(**console_kwargs, filter=_not_suppressed)
+
+        # 文件 sink：写入中文时间戳命名的日志文件，超过大小后轮转压缩
+        backend.add(
+            self.log_file_path,
+            level=self.log_level,
+            format=log_format,
+            encoding="utf-8",
+            rotation=c["rotation"],
+            compression=c["compression"],
+        )
+
+        # 结构化 JSON 日志：每行一条记录，便于检索与统计
+        if c["json"]:
+            backend.add(
+                os.path.join(log_dir, "azs.jsonl"),
+                level=self.log_level,
+                serialize=True,
+                encoding="utf-8",
+                rotation=c["rotation"],
+                retention=c["retention"],
+                compression=c["compression"],
+            )
+
+        # 分发 sink：调用线程上只做一次入队，异常堆栈在此格式化一次（不输出变量值）
+        self._fanout = _FanOutSink(backend)
+        logger.add(
+            self._fanout,
+            level=min(logger.level(name).no for name in levels),
+            format="",
+            backtrace=True,
+            diagnose=False,
+            filter=_not_suppressed,
+        )
+
+        # 抑制第三方库在控制台的噪音（特别是 urllib3 的连接池告警）
+        try:
+            logging.getLogger("urllib3").setLevel(logging.ERROR)
+            logging.getLogger("urllib3.connectionpool").setLevel(logging.ERROR)
+            logging.getLogger("requests.packages.urllib3").setLevel(logging.ERROR)
+            logging.getLogger("selenium.webdriver.remote.remote_connection").setLevel(logging.ERROR)
+        except Exception:
+            pass
+
+        # 返回配置后的 logger
+        return logger
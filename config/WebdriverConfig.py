@@ -0,0 +1,325 @@
+import re
+import platform
+import json
+from contextlib import contextmanager
+from pathlib import Path
+from time import perf_counter
+from typing import Optional, Iterable, Dict
+
+from loguru import logger
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.common.by import By
+from config.JsonLoadConfig import (
+    resolve_driver_exe_path,
+    resolve_cookie_file_path,
+    resolve_user_data_dir,
+    get_web_config,
+    get_site_config,
+)
+from config.DriverBackends import get_backend
+from tools.DriverHooks import add_command_listener
+from tools.Metrics import metrics
+from tools.CommandTracer import tracer
+from tools.SessionRecorder import recorder
+from tools.PageHelpers import install_page_helpers
+
+# 视频流相关的 URL 特征，屏蔽规则命中这些特征时一律忽略，避免影响播放：
+# 按扩展名（.mp4、.ts 等）或完整的路径段/域名标签（/video/、vod.example.com）匹配，不按子串
+VIDEO_EXTENSIONS = ("mp4", "m3u8", "flv", "ts", "m4s", "webm")
+VIDEO_SEGMENTS = ("video", "vod", "media")
+_VIDEO_EXTENSION_RE = re.compile(r"\.(%s)(?=$|[?#*&])" % "|".join(VIDEO_EXTENSIONS))
+_URL_SEPARATORS = re.compile(r"[/.:?#*&=]+")
+
+
+def is_video_url_pattern(pattern: str) -> bool:
+    """屏蔽规则是否可能命中视频流（视频扩展名，或 video/vod/media 路径段、域名标签）。"""
+    p = str(pattern).strip().lower()
+    if _VIDEO_EXTENSION_RE.search(p):
+        return True
+    return any(seg in VIDEO_SEGMENTS for seg in _URL_SEPARATORS.split(p))
+
+
+class WebDriverConfigurator:
+    def __init__(
+            self,
+            driver_path: Optional[str] = None,
+            user_data_dir: Optional[str] = None,
+            additional_args: Optional[Iterable[str]] = None,
+            implicit_wait_seconds: int = 10,
+            cookies_file: Optional[str] = None,
+            cookie_base_url: Optional[str] = None,
+            debugger_address: Optional[str] = None,
+            page_load_strategy: Optional[str] = None,
+            blocked_urls: Optional[Iterable[str]] = None,
+            browser: Optional[str] = None,
+            headless: Optional[bool] = None,
+        ):
+        # 使用集中配置解析默认路径
+        self.driver_path = driver_path or resolve_driver_exe_path()
+        self.user_data_dir = user_data_dir or resolve_user_data_dir()
+        web = get_web_config()
+        self.backend = get_backend(browser or web["browser"])
+        self.headless = web["headless"] if headless is None else headless
+        self.window_size = web["window_size"]
+        self.binary_path = web["binary_path"] or None
+        self.debugger_address = debugger_address or web["debugger_address"] or None
+        self.page_load_strategy = page_load_strategy or web["page_load_strategy"]
+        self.blocked_urls = self._filter_blocked_urls(
+            blocked_urls if blocked_urls is not None else web["blocked_urls"]
+        )
+        self.additional_args = list(additional_args) if additional_args else []
+        self.implicit_wait_seconds = implicit_wait_seconds
+        self.cookies_file = cookies_file or resolve_cookie_file_path()
+        self.cookie_base_url = cookie_base_url or get_site_config()["base_url"]
+        # 启动各阶段耗时（秒），便于对比冷启动与复用/附加模式
+        self.startup_timings: Dict[str, float] = {}
+
+    @property
+    def mode(self) -> str:
+        """启动模式：attach（附加已运行浏览器）、profile（复用持久化配置）、fresh（临时配置）。"""
+        if self.debugger_address and self.backend.supports_attach:
+            return "attach"
+        if self.user_data_dir:
+            return "profile"
+        return "fresh"
+
+    @contextmanager
+    def phase(self, name: str):
+        """记录一个启动阶段的耗时。"""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            cost = perf_counter() - start
+            self.startup_timings[name] = cost
+            logger.debug(f"启动阶段[{name}]耗时 {cost * 1000:.0f} ms")
+
+    def log_startup_summary(self):
+        """输出启动阶段耗时汇总。"""
+        if not self.startup_timings:
+            return
+        total = sum(self.startup_timings.values())
+        detail = ", ".join(f"{k}={v * 1000:.0f}ms" for k, v in self.startup_timings.items())
+        logger.info(f"浏览器：{self.backend.name}，启动模式：{self.mode}，累计耗时 {total:.2f} 秒（{detail}）")
+
+    def build(self):
+        mode = self.mode
+        backend = self.backend
+        options = backend.make_options()
+        if self.debugger_address and not backend.supports_attach:
+            logger.warning(f"{backend.name} 不支持附加到已运行的浏览器，改为自行启动")
+        if mode == "attach":
+            # 附加模式：浏览器已由用户启动，仅能指定调试地址，其余启动参数均无效
+            backend.apply_debugger_address(options, self.debugger_address)
+            logger.info(f"附加到已运行的浏览器：{self.debugger_address}")
+        else:
+            # 设置基础降噪
+            backend.apply_quiet(options)
+
+            # 无头模式：服务器部署时节省内存与 CPU
+            if self.headless:
+                backend.apply_headless(options, self.window_size)
+                logger.info(f"以无头模式启动 {backend.name}，窗口尺寸 {self.window_size}")
+
+            if self.binary_path:
+                backend.apply_binary(options, self.binary_path)
+
+            # 用户数据目录：持久化登录态与 HTTP 缓存
+            if self.user_data_dir:
+                Path(self.user_data_dir).mkdir(parents=True, exist_ok=True)
+                backend.apply_user_data_dir(options, self.user_data_dir)
+                logger.info(f"复用持久化用户数据目录：{self.user_data_dir}")
+
+            # 额外参数
+            for arg in self.additional_args:
+                options.add_argument(str(arg))
+
+        # 页面加载策略：eager 在 DOMContentLoaded 后即返回，不等待图片等子资源
+        if self.page_load_strategy in ("normal", "eager", "none"):
+            options.page_load_strategy = self.page_load_strategy
+
+        # 创建 Service 和浏览器实例
+        with self.phase("launch"):
+            driver = backend.create(self.driver_path, options)
+
+        # 会话录制：记录命令时间线与 DOM 快照，供回放复现
+        if recorder.enabled:
+            recorder.attach(driver)
+
+        # 阶段耗时统计：记录每条 WebDriver 命令
+        if metrics.enabled:
+            add_command_listener(driver, metrics.command_listener)
+        # 命令追踪：记录命令、脚本指纹与调用函数
+        if tracer.enabled:
+            add_command_listener(driver, tracer.listener)
+
+        # 隐式等待
+        if self.implicit_wait_seconds and self.implicit_wait_seconds > 0:
+            driver.implicitly_wait(self.implicit_wait_seconds)
+
+        # 屏蔽无关资源（须在首次导航前生效）
+        if self.blocked_urls:
+            with self.phase("blocklist"):
+                self.apply_blocked_urls(driver)
+
+        # 页面辅助脚本：此后每个新文档自动注入，探测与答题只发送短调用
+        install_page_helpers(driver)
+
+        # 加载已保存的 Cookie（如果存在）；附加或已初始化的持久化目录自带登录态，无需注入
+        if self._profile_has_session():
+            logger.info("浏览器已持有会话数据，跳过 Cookie 注入。")
+        else:
+            try:
+                with self.phase("cookies"):
+                    self._load_cookies(driver)
+            except Exception as e:
+                logger.warning(f"加载 Cookie 时出现异常：{e}")
+
+        # 启动阶段结束，回放从此处开始比对
+        recorder.event("driver_ready")
+        return driver
+
+    @staticmethod
+    def _filter_blocked_urls(patterns: Iterable[str]) -> list:
+        """剔除可能命中视频流的屏蔽规则。"""
+        kept = []
+        for p in patterns or []:
+            p = str(p).strip()
+            if not p:
+                continue
+            if is_video_url_pattern(p):
+                logger.warning(f"屏蔽规则可能影响视频流，已忽略：{p}")
+                continue
+            kept.append(p)
+        return kept
+
+    def apply_blocked_urls(self, driver) -> bool:
+        """通过 Network.setBlockedURLs 屏蔽配置的 URL 模式，驱动不支持 CDP 时跳过。"""
+        if not hasattr(driver, "execute_cdp_cmd"):
+            logger.debug("驱动不支持 CDP，跳过资源屏蔽。")
+            return False
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": self.blocked_urls})
+            logger.info(f"已屏蔽 {len(self.blocked_urls)} 条资源规则：{self.blocked_urls}")
+            return True
+        except Exception as e:
+            logger.warning(f"设置资源屏蔽失败：{e}")
+            return False
+
+    def _profile_has_session(self) -> bool:
+        """附加模式，或持久化目录已被浏览器初始化过（存在 Default 配置）时返回 True。"""
+        if self.mode == "attach":
+            return True
+        if self.mode == "profile":
+            return self.backend.profile_initialized(self.user_data_dir)
+        return False
+
+    def _load_cookies(self, driver):
+        if not self.cookies_file or not Path(self.cookies_file).exists():
+            logger.debug("未发现 Cookie 文件，跳过加载。")
+            return
+
+        base_url = self.cookie_base_url or "about:blank"
+        logger.info(f"准备从 {self.cookies_file} 加载 Cookie，目标域：{base_url}")
+
+        # 读取 Cookie 文件
+        with open(self.cookies_file, "r", encoding="utf-8") as f:
+            cookies = json.load(f)
+
+        # 优先通过 DevTools 在首次导航前一次性写入，失败再回退逐条注入
+        if self._load_cookies_via_cdp(driver, cookies, base_url):
+            return
+        self._load_cookies_one_by_one(driver, cookies, base_url)
+
+    def _load_cookies_via_cdp(self, driver, cookies, base_url: str) -> bool:
+        """
+        通过 Network.setCookies 批量写入 Cookie，无需先打开基础域、逐条 add_cookie 再刷新。
+        驱动不支持 CDP 或调用失败时返回 False。
+        """
+        if not hasattr(driver, "execute_cdp_cmd"):
+            return False
+        params = [self._to_cdp_cookie(c, base_url) for c in cookies]
+        params = [p for p in params if p]
+        if not params:
+            return False
+        start = perf_counter()
+        try:
+            driver.execute_cdp_cmd("Network.setCookies", {"cookies": params})
+        except Exception as e:
+            logger.debug(f"CDP 批量写入 Cookie 失败，回退逐条注入：{e}")
+            return False
+        cost = perf_counter() - start
+        # 逐条路径为 1 次导航 + N 次 add_cookie + 1 次刷新，其实测耗时见该路径的日志，这里只记录省去的命令数
+        logger.info(
+            f"已通过 CDP 批量加载 {len(params)}/{len(cookies)} 条 Cookie，耗时 {cost * 1000:.0f} ms；"
+            f"省去 {len(cookies)} 次 add_cookie 与 2 次页面加载"
+        )
+        return True
+
+    @staticmethod
+    def _to_cdp_cookie(c: dict, base_url: str) -> Optional[dict]:
+        """将 Selenium 格式的 Cookie 转为 CDP CookieParam。"""
+        name = c.get("name")
+        if not name:
+            return None
+        p = {"name": name, "value": str(c.get("value", ""))}
+        if c.get("domain"):
+            p["domain"] = c["domain"]
+        else:
+            p["url"] = base_url
+        p["path"] = c.get("path") or "/"
+        if "secure" in c:
+            p["secure"] = bool(c["secure"])
+        if "httpOnly" in c:
+            p["httpOnly"] = bool(c["httpOnly"])
+        if c.get("sameSite") in ("Strict", "Lax", "None"):
+            p["sameSite"] = c["sameSite"]
+        if c.get("expiry") is not None:
+            try:
+                p["expires"] = int(c["expiry"])
+            except Exception:
+                pass
+        return p
+
+    def _load_cookies_one_by_one(self, driver, cookies, base_url: str):
+        start = perf_counter()
+        # 先打开基础域，确保后续 add_cookie 域名匹配
+        driver.get(base_url)
+        try:
+            WebDriverWait(driver, 10).until(
+                EC.presence_of_element_located((By.TAG_NAME, "body"))
+            )
+        except Exception:
+            logger.debug("基础域页面等待失败，但继续尝试注入 Cookie。")
+
+        loaded = 0
+        for c in cookies:
+            # 规范化可选字段，避免 add_cookie 报错
+            c = dict(c)
+            if "expiry" in c and c["expiry"] is not None:
+                try:
+                    c["expiry"] = int(c["expiry"])
+                except Exception:
+                    c["expiry"] = None
+            try:
+                driver.add_cookie(c)
+                loaded += 1
+            except Exception:
+                # 某些情况下 domain/path 与当前站点不匹配，移除后重试
+                c.pop("domain", None)
+                c.pop("path", None)
+                try:
+                    driver.add_cookie(c)
+                    loaded += 1
+                except Exception as e:
+                    logger.debug(f"注入单条 Cookie 失败：{e}")
+
+        logger.info(f"已加载 {loaded}/{len(cookies)} 条 Cookie，刷新页面以应用登录态。")
+        try:
+            driver.refresh()
+        except Exception:
+            # 某些场景 refresh 可能报错（如 about:blank），则重新访问基础域
+            driver.get(base_url)
+        logger.debug(f"逐条注入 Cookie 共 {len(cookies) + 2} 条命令，耗时 {(perf_counter() - start) * 1000:.0f} ms")
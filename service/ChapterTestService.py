@@ -0,0 +1,281 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from time import perf_counter, sleep
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+from config.JsonLoadConfig import get_exam_config
+from service.SolutionService import select_option_indices
+from tools.Metrics import metrics
+
+# 一次脚本读取第 i 题的题型、题干与选项文本
+_EXTRACT_SCRIPT = """
+var qs = document.querySelectorAll(arguments[0]);
+var q = qs[arguments[1]];
+if (!q) return null;
+try { q.scrollIntoView({block: 'center'}); } catch (e) {}
+var text = function (el) { return el ? (el.innerText || el.textContent || '').trim() : ''; };
+var opts = Array.prototype.map.call(q.querySelectorAll(arguments[4]), text);
+return { type: text(q.querySelector(arguments[2])), stem: text(q.querySelector(arguments[3])), options: opts };
+"""
+
+# 点击第 i 题的若干选项，已选中的选项跳过（多选题重复点击会取消选择）
+_CLICK_SCRIPT = """
+var q = document.querySelectorAll(arguments[0])[arguments[1]];
+if (!q) return 0;
+var opts = q.querySelectorAll(arguments[2]);
+var checkedSel = arguments[4];
+var clicked = 0;
+arguments[3].forEach(function (i) {
+    var el = opts[i];
+    if (!el) return;
+    var checked = false;
+    try { checked = el.matches(checkedSel) || !!el.querySelector(checkedSel); } catch (e) {}
+    if (!checked) { el.click(); }
+    clicked++;
+});
+return clicked;
+"""
+
+# 完成率：优先读取页面上的百分比，读不到时按已作答题数计算
+_COMPLETION_SCRIPT = """
+var el = document.querySelector(arguments[0]);
+var m = el ? (el.innerText || el.textContent || '').match(/(\\d+(?:\\.\\d+)?)\\s*%/) : null;
+if (m) return parseFloat(m[1]);
+var qs = document.querySelectorAll(arguments[1]);
+var checkedSel = arguments[2];
+if (!qs.length) return 0;
+var done = 0;
+Array.prototype.forEach.call(qs, function (q) { if (q.querySelector(checkedSel)) done++; });
+return done * 100 / qs.length;
+"""
+
+
+def format_question(q: Dict[str, Any]) -> str:
+    """拼接交给 LLM 的题目文本，选项缺少字母序号时补上。"""
+    lines = [f"{q.get('type') or ''}{q.get('stem') or ''}".strip()]
+    for i, opt in enumerate(q.get("options") or []):
+        opt = " ".join(str(opt).split())
+        letter = chr(ord("A") + i)
+        if not opt.upper().startswith(letter):
+            opt = f"{letter}. {opt}"
+        lines.append(opt)
+    return "\n".join(lines)
+
+
+class ChapterTestService:
+    """
+    章节测试流水线：主线程逐题提取题目（WebDriver），凑满一批即把题目交给线程池请求 LLM，
+    后续题目的提取与前一批的 LLM 请求并行；已返回的答案在提取间隙点击，
+    全部作答且完成率达到 100% 后提交。
+
+    LLM 支持批量解答（answer_questions）时批大小取 llm.batch_sizer.size()，否则逐题请求。
+
+    call 用于执行 WebDriver 操作（通常为 ListenerSupervisor.call），保证命令串行。
+    """
+
+    def __init__(
+        self,
+        driver,
+        llm,
+        call: Optional[Callable[..., Any]] = None,
+        cfg: Optional[Dict[str, Any]] = None,
+    ):
+        self.driver = driver
+        self.llm = llm
+        self.call = call or (lambda fn, *args: fn(*args))
+        self.cfg = cfg or get_exam_config()
+        # 各阶段耗时样本（秒），用于估算顺序执行的基线
+        self.timings: Dict[str, List[float]] = {"extract": [], "llm": [], "click": []}
+        # 题号 -> LLM 给出的答案，随结果返回便于核对
+        self.answers: Dict[int, List[str]] = {}
+
+    # ---------- WebDriver 操作（经 call 串行执行） ----------
+
+    def _count_questions(self) -> int:
+        return int(self.driver.execute_script(
+            "return document.querySelectorAll(arguments[0]).length;", self.cfg["question_selector"]
+        ) or 0)
+
+    def _extract(self, index: int) -> Optional[Dict[str, Any]]:
+        c = self.cfg
+        return self.driver.execute_script(
+            _EXTRACT_SCRIPT, c["question_selector"], index, c["type_selector"], c["stem_selector"], c["option_selector"]
+        )
+
+    def _click(self, index: int, indices: List[int]) -> int:
+        c = self.cfg
+        return int(self.driver.execute_script(
+            _CLICK_SCRIPT, c["question_selector"], index, c["option_selector"], indices, c["checked_selector"]
+        ) or 0)
+
+    def _completion(self) -> float:
+        c = self.cfg
+        try:
+            return float(self.driver.execute_script(
+                _COMPLETION_SCRIPT, c["progress_selector"], c["question_selector"], c["checked_selector"]
+            ) or 0)
+        except Exception as e:
+            logger.debug(f"读取完成率失败：{e}")
+            return 0.0
+
+    def _submit(self) -> bool:
+        c = self.cfg
+        clicked = self.driver.execute_script(
+            "var b=document.querySelector(arguments[0]); if(!b) return false; b.click(); return true;",
+            c["submit_selector"],
+        )
+        if not clicked:
+            logger.error(f"未找到提交按钮：{c['submit_selector']}")
+            return False
+        # 可能弹出确认框
+        sleep(1)
+        self.driver.execute_script(
+            "var b=document.querySelector(arguments[0]); if(b) b.click();", c["confirm_selector"]
+        )
+        return True
+
+    # ---------- 流水线 ----------
+
+    def _wait_questions(self) -> int:
+        deadline = perf_counter() + self.cfg["wait_seconds"]
+        while True:
+            count = self.call(self._count_questions)
+            if count or perf_counter() >= deadline:
+                return count
+            sleep(0.5)
+
+    def _batch_size(self) -> int:
+        if getattr(self.llm, "batch_enabled", False) and hasattr(self.llm, "answer_questions"):
+            return max(1, self.llm.batch_sizer.size())
+        return 1
+
+    def _ask(self, texts: List[str]) -> List[List[str]]:
+        """在线程池中执行：请求 LLM（多题时批量请求），返回与 texts 对应的答案列表。"""
+        start = perf_counter()
+        try:
+            if len(texts) == 1:
+                results = [self.llm.answer_question(texts[0])]
+            else:
+                results = self.llm.answer_questions(texts)
+            out = []
+            for result in results:
+                selected = result.get("selected") if isinstance(result, dict) else None
+                out.append([str(s).strip() for s in selected or []])
+            return out
+        finally:
+            self.timings["llm"].append(perf_counter() - start)
+
+    def _submit_batch(self, pool: ThreadPoolExecutor, batch: List[Tuple[int, Dict[str, Any]]]) -> Future:
+        return pool.submit(self._ask, [format_question(q) for _, q in batch])
+
+    def _apply(self, index: int, question: Dict[str, Any], selected: List[str]) -> bool:
+        self.answers[index] = selected
+        options = question.get("options") or []
+        indices = select_option_indices(selected, options)
+        start = perf_counter()
+        try:
+            clicked = self.call(self._click, index, indices)
+        except Exception as e:
+            logger.warning(f"第 {index + 1} 题点击选项失败：{e}")
+            clicked = 0
+        self.timings["click"].append(perf_counter() - start)
+        logger.debug(f"第 {index + 1} 题答案 {selected} -> 选项 {indices}")
+        return clicked > 0
+
+    def _drain(
+        self,
+        pending: List[Tuple[List[Tuple[int, Dict[str, Any]]], Future]],
+        answered: Dict[int, bool],
+        block: bool,
+    ):
+        """点击已返回答案的题目；block=True 时等待全部返回。"""
+        for item in list(pending):
+            batch, fut = item
+            if not (block or fut.done()):
+                continue
+            try:
+                results = fut.result()
+            except Exception as e:
+                logger.error(f"第 {', '.join(str(i + 1) for i, _ in batch)} 题 LLM 解答失败：{e}")
+                results = []
+            for k, (index, question) in enumerate(batch):
+                answered[index] = self._apply(index, question, results[k] if k < len(results) else [])
+            pending.remove(item)
+
+    def run(self) -> Dict[str, Any]:
+        start = perf_counter()
+        count = self._wait_questions()
+        if not count:
+            logger.error("未在测试页面找到题目，请检查 exam.question_selector 配置")
+            return {"questions": 0, "submitted": False}
+        logger.info(f"章节测试共 {count} 题，LLM 并发数 {self.cfg['llm_workers']}")
+
+        questions: Dict[int, Dict[str, Any]] = {}
+        answered: Dict[int, bool] = {}
+        pending: List[Tuple[List[Tuple[int, Dict[str, Any]]], Future]] = []
+        batch: List[Tuple[int, Dict[str, Any]]] = []
+        pipe_start = perf_counter()
+        with ThreadPoolExecutor(max_workers=self.cfg["llm_workers"], thread_name_prefix="ExamLLM") as pool:
+            for index in range(count):
+                t0 = perf_counter()
+                try:
+                    question = self.call(self._extract, index)
+                except Exception as e:
+                    logger.warning(f"第 {index + 1} 题提取失败：{e}")
+                    question = None
+                self.timings["extract"].append(perf_counter() - t0)
+                if not question:
+                    continue
+                questions[index] = question
+                batch.append((index, question))
+                if len(batch) >= self._batch_size():
+                    pending.append((batch, self._submit_batch(pool, batch)))
+                    batch = []
+                # 提取间隙点击已返回答案的题目
+                self._drain(pending, answered, block=False)
+            if batch:
+                pending.append((batch, self._submit_batch(pool, batch)))
+            self._drain(pending, answered, block=True)
+
+            # 完成率不足时对未作答的题目顺序补答一次
+            completion = self.call(self._completion)
+            missing = [i for i in questions if not answered.get(i)]
+            if completion < 100 and missing:
+                logger.warning(f"完成率 {completion:.0f}%，补答 {len(missing)} 题")
+                for index in missing:
+                    pending.append(([(index, questions[index])], self._submit_batch(pool, [(index, questions[index])])))
+                    self._drain(pending, answered, block=True)
+                completion = self.call(self._completion)
+        pipe_wall = perf_counter() - pipe_start
+
+        submitted = False
+        if completion >= 100:
+            submitted = bool(self.call(self._submit))
+            if submitted:
+                logger.info("章节测试完成率 100%，已提交")
+        else:
+            logger.warning(f"章节测试完成率 {completion:.0f}%，未提交，请手动检查")
+
+        wall = perf_counter() - start
+        # 各阶段的累计用时（LLM 为各次请求之和，批量请求一次覆盖多题、并发请求相互重叠，因此不据此推算加速比）
+        stages = {
+            stage: {"count": len(values), "total_s": round(sum(values), 2)}
+            for stage, values in self.timings.items()
+        }
+        metrics.observe("test", wall)
+        metrics.observe("test.answering", pipe_wall)
+        for stage, values in self.timings.items():
+            for v in values:
+                metrics.observe(f"test.{stage}", v, record_span=False)
+        detail = "，".join(f"{stage} {st['count']} 次共 {st['total_s']:.1f} 秒" for stage, st in stages.items())
+        logger.info(f"章节测试用时 {wall:.1f} 秒，作答 {pipe_wall:.1f} 秒（{detail}）")
+        return {
+            "questions": count,
+            "answered": sum(1 for v in answered.values() if v),
+            "completion": completion,
+            "submitted": submitted,
+            "wall_s": round(wall, 2),
+            "answering_s": round(pipe_wall, 2),
+            "stages": stages,
+            "answers": {i + 1: a for i, a in sorted(self.answers.items())},
+        }
@@ -0,0 +1,145 @@
+from threading import Event, Thread
+from time import monotonic
+from typing import Any, Callable, Dict, List, Optional
+from loguru import logger
+
+
+class PrewarmScheduler:
+    """
+    视频播放期间的空闲预热（后台线程，不发出任何 WebDriver 命令）：
+    - 课程开始后空跑一次 OCR 推理并向 LLM 服务发送保活请求，之后按间隔重复，
+      首个随堂测试不再承担 OCR 引擎创建、onnxruntime 初始化与建立连接的开销；
+    - 按本次运行中随堂测试出现过的位置（占总时长比例）预测本节课程的弹窗，
+      在预计位置前 lead_seconds 再预热一次，并让调度器在弹窗前后加快探测，缩短检测延迟；
+    - 答题进行中不做任何预热，避免与答题争用 CPU 与 OCR 引擎。
+    """
+
+    # 后台线程的检查间隔（秒）
+    tick = 1.0
+
+    def __init__(self, supervisor, solution_provider: Callable[[], Any], cfg: Dict[str, Any]):
+        # supervisor 为 ListenerSupervisor，提供播放位置、弹窗历史与答题状态
+        self.supervisor = supervisor
+        # 解题服务的获取函数（首次调用时创建，与答题共用同一实例）
+        self.solution_provider = solution_provider
+        self.cfg = cfg
+        self.stats = {"ocr": 0, "llm": 0, "windows": 0, "errors": 0}
+        self._llm_ok = True
+        self._lesson_started: Optional[float] = None
+        self._last_ocr: Optional[float] = None
+        self._last_llm: Optional[float] = None
+        # 本节课程已预热过的预计弹窗位置（秒）
+        self._warmed_points: set = set()
+        self._stop = Event()
+        self._wake = Event()
+        self._thread: Optional[Thread] = None
+
+    def begin_lesson(self):
+        """课程开始播放时调用。"""
+        self._lesson_started = monotonic()
+        self._last_ocr = self._last_llm = None
+        self._warmed_points = set()
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = Thread(target=self._run, name="PrewarmScheduler", daemon=True)
+            self._thread.start()
+        self._wake.set()
+
+    def end_lesson(self):
+        """课程结束（或中断）时调用，恢复正常探测间隔。"""
+        self._lesson_started = None
+        self.supervisor.fast_probe = None
+
+    def stop(self, timeout: float = 3):
+        self.end_lesson()
+        self._stop.set()
+        self._wake.set()
+        th = self._thread
+        if th and th.is_alive():
+            th.join(timeout=timeout)
+        self._thread = None
+        st = self.stats
+        logger.info(f"空闲预热统计：OCR {st['ocr']} 次，LLM 保活 {st['llm']} 次，预计弹窗 {st['windows']} 次，失败 {st['errors']} 次")
+
+    # ---------- 后台线程 ----------
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self._lesson_started is None:
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            try:
+                self._step(monotonic())
+            except Exception as e:
+                logger.debug(f"空闲预热异常：{e}")
+            self._stop.wait(self.tick)
+
+    def _step(self, now: float):
+        sup = self.supervisor
+        if sup.quiz_active.is_set() or self._lesson_started is None:
+            return
+        if now - self._lesson_started < self.cfg["start_delay_seconds"]:
+            return
+        if self._near_predicted_quiz():
+            sup.fast_probe = self.cfg["fast_probe_interval_seconds"]
+        else:
+            sup.fast_probe = None
+        if self._due(self._last_ocr, self.cfg["ocr_interval_seconds"], now):
+            self._warm_ocr(now)
+        if self._llm_ok and self._due(self._last_llm, self.cfg["llm_interval_seconds"], now):
+            self._ping_llm(now)
+
+    @staticmethod
+    def _due(last: Optional[float], interval: float, now: float) -> bool:
+        # 每节课程开始时至少预热一次；interval 为 0 时不做周期预热
+        return last is None or (interval > 0 and now - last >= interval)
+
+    def _predicted_points(self, dur: int) -> List[int]:
+        return [int(f * dur) for f in self.supervisor.quiz_fractions]
+
+    def _near_predicted_quiz(self) -> bool:
+        """
+        当前位置处于某个预计弹窗位置的 [p - lead, p + lead] 内时返回 True；
+        首次进入窗口时重新预热（距上次预热已较久时，缓存可能已被换出）。
+        """
+        pos = self.supervisor.position
+        if not pos:
+            return False
+        cur, dur = pos
+        lead = self.cfg["lead_seconds"]
+        near = False
+        for p in self._predicted_points(dur):
+            if p - lead <= cur <= p + lead:
+                near = True
+                if p not in self._warmed_points:
+                    self._warmed_points.add(p)
+                    self.stats["windows"] += 1
+                    logger.debug(f"接近预计随堂测试位置（{p} 秒），预热并加快探测")
+                    self._last_ocr = self._last_llm = None
+        return near
+
+    def _warm_ocr(self, now: float):
+        try:
+            self.solution_provider().warm_up_ocr()
+            self.stats["ocr"] += 1
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.debug(f"OCR 预热失败：{e}")
+        self._last_ocr = now
+
+    def _ping_llm(self, now: float):
+        self._last_llm = now
+        try:
+            llm = self.solution_provider().llm
+        except Exception as e:
+            # 未配置密钥等：本次运行不再尝试保活，由答题时报告错误
+            self._llm_ok = False
+            logger.debug(f"LLM 客户端不可用，停止保活：{e}")
+            return
+        try:
+            llm.ping()
+            self.stats["llm"] += 1
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.debug(f"LLM 保活请求失败：{e}")
@@ -0,0 +1,140 @@
+import os
+import json
+import hashlib
+import tempfile
+from pathlib import Path
+from threading import Event, Thread, Lock
+from typing import Callable, List, Dict, Any, Optional, Tuple
+from loguru import logger
+
+
+def normalize_cookies(cookies: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """规范化 Cookie：expiry 统一为整数，便于写入与再次注入。"""
+    out = []
+    for c in cookies or []:
+        c = dict(c)
+        if "expiry" in c and c["expiry"] is not None:
+            try:
+                c["expiry"] = int(c["expiry"])
+            except Exception:
+                c["expiry"] = None
+        out.append(c)
+    return out
+
+
+def dump_cookies(cookies: List[Dict[str, Any]]) -> str:
+    """紧凑、稳定排序的 JSON 文本，同一组 Cookie 总是得到相同的内容与哈希。"""
+    ordered = sorted(cookies, key=lambda c: (c.get("domain") or "", c.get("path") or "", c.get("name") or ""))
+    return json.dumps(ordered, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+
+
+def write_text_atomic(target: str, text: str):
+    """先写同目录临时文件再原子替换，写入中途崩溃不会损坏原文件。"""
+    path = Path(target)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except Exception:
+            pass
+        raise
+
+
+class SessionCheckpointer:
+    """
+    会话检查点：在后台线程中周期性（以及导航后按需）快照 Cookie 并写入文件。
+
+    - request() 仅置位唤醒事件，立即返回，不阻塞课程主循环；
+    - 短时间内的多次请求会被合并（防抖）；
+    - 内容哈希未变化时跳过写入；
+    - 写入采用紧凑格式 + 临时文件原子替换。
+    """
+
+    def __init__(
+        self,
+        snapshot: Callable[[], List[Dict[str, Any]]],
+        target: str,
+        interval_seconds: float = 60,
+        debounce_seconds: float = 3,
+    ):
+        self.snapshot = snapshot
+        self.target = target
+        self.interval_seconds = interval_seconds
+        self.debounce_seconds = debounce_seconds
+        self._wake = Event()
+        self._stop = Event()
+        self._lock = Lock()
+        self._thread: Optional[Thread] = None
+        self._last_digest = self._read_digest()
+
+    def _read_digest(self) -> Optional[str]:
+        """读取现有文件的内容哈希，首轮快照未变化时即可跳过写入。"""
+        try:
+            data = json.loads(Path(self.target).read_text(encoding="utf-8"))
+            if isinstance(data, list):
+                return hashlib.sha256(dump_cookies(normalize_cookies(data)).encode("utf-8")).hexdigest()
+        except Exception:
+            pass
+        return None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = Thread(target=self._worker, name="SessionCheckpointer", daemon=True)
+        self._thread.start()
+        logger.debug(f"会话检查点线程已启动，周期 {self.interval_seconds} 秒")
+
+    def request(self):
+        """请求一次检查点（如导航之后），由后台线程防抖后执行。"""
+        self._wake.set()
+
+    def stop(self, timeout: float = 3):
+        self._stop.set()
+        self._wake.set()
+        th = self._thread
+        if th and th.is_alive():
+            th.join(timeout=timeout)
+        logger.debug("会话检查点线程已停止")
+
+    def _worker(self):
+        while not self._stop.is_set():
+            self._wake.wait(timeout=self.interval_seconds)
+            if self._stop.is_set():
+                break
+            if self._wake.is_set():
+                # 防抖：等待导航后的 Cookie 稳定，期间的重复请求合并为一次
+                self._stop.wait(self.debounce_seconds)
+                self._wake.clear()
+                if self._stop.is_set():
+                    break
+            try:
+                self.checkpoint()
+            except Exception as e:
+                logger.debug(f"会话检查点失败：{e}")
+
+    def checkpoint(self) -> Tuple[str, int]:
+        """
+        快照并写入 Cookie，内容未变化时跳过。
+        返回 (结果, Cookie 条数)，结果为 written（已写入）、unchanged（未变化，跳过）或 empty（未读到 Cookie）。
+        """
+        cookies = normalize_cookies(self.snapshot())
+        if not cookies:
+            return "empty", 0
+        text = dump_cookies(cookies)
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        with self._lock:
+            if digest == self._last_digest:
+                logger.debug("Cookie 未变化，跳过检查点写入")
+                return "unchanged", len(cookies)
+            write_text_atomic(self.target, text)
+            self._last_digest = digest
+        logger.debug(f"会话检查点：已写入 {len(cookies)} 条 Cookie 到 {self.target}")
+        return "written", len(cookies)
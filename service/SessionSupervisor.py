@@ -0,0 +1,153 @@
+from threading import Event, Lock
+from time import monotonic
+from typing import Any, List, Optional
+from loguru import logger
+
+from tools.DriverHooks import add_command_listener
+from tools.Metrics import metrics
+
+# 会话失效时 WebDriver / HTTP 层常见的错误特征（小写）
+_DEAD_SESSION_MARKERS = (
+    "invalid session id",
+    "no such session",
+    "session deleted",
+    "session not created",
+    "disconnected",
+    "not reachable",
+    "browser has closed",
+    "connection refused",
+    "failed to establish a new connection",
+    "max retries exceeded",
+    "remote end closed connection",
+    "connection aborted",
+)
+# 对应的异常类型名（不直接导入 urllib3 等底层库）
+_DEAD_SESSION_TYPES = (
+    "InvalidSessionIdException",
+    "MaxRetryError",
+    "NewConnectionError",
+    "ProtocolError",
+    "RemoteDisconnected",
+    "ConnectionRefusedError",
+    "ConnectionResetError",
+    "ConnectionAbortedError",
+    "BrokenPipeError",
+)
+
+
+def is_dead_session_error(error: Optional[BaseException]) -> bool:
+    """判断异常是否表示浏览器进程或 WebDriver 会话已经结束。"""
+    if error is None:
+        return False
+    if type(error).__name__ in _DEAD_SESSION_TYPES:
+        return True
+    text = str(error).lower()
+    return any(m in text for m in _DEAD_SESSION_MARKERS)
+
+
+class SessionLost(Exception):
+    """浏览器或 WebDriver 会话已失效，需要重建驱动。"""
+
+
+class SessionSupervisor:
+    """
+    会话存活监督：
+    - 作为命令监听器观察每条 WebDriver 命令，出现会话失效类错误，或连续失败达到阈值且存活检查不通过时，
+      立即标记会话失效（lost），主流程据此中断等待；
+    - 由 WebEdgeService.recover_session 重建驱动后调用 recovered()，记录恢复耗时（MTTR）。
+    """
+
+    def __init__(self, failure_threshold: int = 3, max_restarts: int = 5):
+        self.failure_threshold = failure_threshold
+        self.max_restarts = max_restarts
+        self.lost = Event()
+        self.reason = ""
+        self.failures = 0
+        # attempts 为重建尝试次数（含失败），restarts 为成功恢复次数；
+        # consecutive_failures 为最近一次成功恢复以来连续失败的重建次数，达到 max_restarts 时停止重建
+        self.attempts = 0
+        self.consecutive_failures = 0
+        self.restarts = 0
+        self.recovery_seconds: List[float] = []
+        self._lost_at: Optional[float] = None
+        self._driver: Any = None
+        self._probing = False
+        self._lock = Lock()
+
+    def attach(self, driver):
+        """监听（重建后的）驱动的命令。"""
+        self._driver = driver
+        self.failures = 0
+        add_command_listener(driver, lambda *event: self._on_command(driver, *event))
+
+    def _on_command(self, driver, command: str, params: Any, elapsed: float, error: Optional[BaseException]):
+        if driver is not self._driver:
+            # 已被替换的旧驱动上残留的命令（如卡住的探测）不影响新会话
+            return
+        if error is None:
+            self.failures = 0
+            return
+        if is_dead_session_error(error):
+            self.mark_lost(f"{command}: {error}")
+            return
+        self.failures += 1
+        if self.failures >= self.failure_threshold and not self._probing and not self.alive():
+            self.mark_lost(f"连续 {self.failures} 条命令失败：{error}")
+
+    def alive(self) -> bool:
+        """存活检查：会话 id、驱动进程状态，再发一条轻量命令确认。"""
+        driver = self._driver
+        if driver is None or getattr(driver, "session_id", None) is None:
+            return False
+        process = getattr(getattr(driver, "service", None), "process", None)
+        if process is not None and process.poll() is not None:
+            return False
+        self._probing = True
+        try:
+            driver.execute("getTitle")
+            return True
+        except Exception as e:
+            return not is_dead_session_error(e)
+        finally:
+            self._probing = False
+
+    def mark_lost(self, reason: str):
+        with self._lock:
+            if self.lost.is_set():
+                return
+            self.reason = reason
+            self._lost_at = monotonic()
+            self.lost.set()
+        logger.error(f"检测到浏览器会话失效：{reason[:300]}")
+
+    def check(self):
+        """会话已失效时抛出 SessionLost，供主流程在各步骤之间调用。"""
+        if self.lost.is_set():
+            raise SessionLost(self.reason)
+
+    def can_restart(self) -> bool:
+        return self.consecutive_failures < self.max_restarts
+
+    def restart_failed(self):
+        """一次重建尝试未能回到课程页面时调用。"""
+        self.consecutive_failures += 1
+
+    def recovered(self):
+        """重建驱动并回到课程页面后调用，记录恢复耗时。"""
+        self.restarts += 1
+        self.consecutive_failures = 0
+        cost = monotonic() - (self._lost_at or monotonic())
+        self.recovery_seconds.append(cost)
+        metrics.observe("session.recovery", cost)
+        self.lost.clear()
+        self.reason = ""
+        self._lost_at = None
+        logger.info(f"浏览器会话已恢复（第 {self.restarts} 次），耗时 {cost:.1f} 秒")
+
+    def log_report(self):
+        """输出本次运行的会话恢复统计。"""
+        if not self.recovery_seconds:
+            return
+        n = len(self.recovery_seconds)
+        mttr = sum(self.recovery_seconds) / n
+        logger.info(f"会话恢复统计：共 {n} 次，平均恢复时间（MTTR）{mttr:.1f} 秒，最长 {max(self.recovery_seconds):.1f} 秒")
@@ -1,20 +1,142 @@
-import numpy as np
+from __future__ import annotations
 import tempfile
 import os
+import re
+import gc
+from threading import RLock
 
-from typing import List, Any, Optional
-from PIL import Image
+from typing import List, Any, Optional, Tuple
 from loguru import logger
-from cnocr import CnOcr
+from config.JsonLoadConfig import get_llm_vision_config, get_ocr_config, get_ocr_profile
+from tools.LazyImport import lazy_import
+from tools.Metrics import metrics
+from tools.OcrEngine import create_ocr
+from tools.SessionRecorder import recorder
+from tools.ArtifactWriter import artifacts
+from tools.PageHelpers import page_call
 from tools.llms.DeepSeek import DeepSeek, get_client
+from tools.llms.OpenAIVision import OpenAIVision, get_vision_client
 from io import BytesIO
 from time import sleep
 
+# 重量级依赖延迟到首次 OCR/截图时再导入
+np = lazy_import("numpy")
+Image = lazy_import("PIL.Image")
+
+
+# 判断题答案的同义写法
+_TRUE_ANSWERS = ("对", "正确", "TRUE", "T", "YES", "Y", "是")
+_FALSE_ANSWERS = ("错", "错误", "FALSE", "F", "NO", "N", "否")
+
+# 题目中含图片或公式时 OCR 容易丢失信息，改用视觉模型
+_RICH_CONTENT_SELECTOR = "img, svg, canvas, math, .MathJax, .katex, sup, sub"
+
+# 选项行（A. / B、/ C：等）：低分辨率下字母与标点最容易认错
+_OPTION_LABEL = re.compile(r"^\s*[A-Ha-h]\s*[\.．、:：)）]")
+
+
+def select_option_indices(selected: List[str], opt_texts: List[str]) -> List[int]:
+    """
+    将 LLM 返回的答案映射为选项索引（纯函数，便于离线基准测试）：
+    - 字母答案（A/B/C/...）直接按序号映射；
+    - 判断题答案匹配含“对/正确”或“错/错误”的选项；
+    - 无法匹配任何选项时，按提示词“无法判断则返回一个你认为对的选择”，选择第一个。
+    """
+    def match_true_false(ans: str):
+        a = str(ans).strip()
+        if a in _TRUE_ANSWERS:
+            for i, t in enumerate(opt_texts):
+                if "对" in t or "正确" in t:
+                    return i
+        if a in _FALSE_ANSWERS:
+            for i, t in enumerate(opt_texts):
+                if "错" in t or "错误" in t:
+                    return i
+        return None
+
+    # 提示词要求字母返回，统一转大写
+    normalized = [str(s).strip().upper() for s in selected or [] if s and str(s).strip()]
+
+    indices: List[int] = []
+    for ans in normalized:
+        # 字母选项（A/B/C/...）
+        if ans and ans[0].isalpha():
+            idx = ord(ans[0]) - ord('A')
+            if 0 <= idx < len(opt_texts):
+                indices.append(idx)
+                logger.info(f"选择字母答案: {ans} -> 选项索引 {idx}")
+                continue
+        # 判断题匹配
+        idx_tf = match_true_false(ans)
+        if idx_tf is not None:
+            indices.append(idx_tf)
+            logger.info(f"选择判断题答案: {ans} -> 选项索引 {idx_tf}")
+
+    if opt_texts and not indices:
+        indices = [0]
+        logger.info(f"未能从答案列表匹配到选项，按提示词策略选择第一个选项: {opt_texts[0]}")
+    return sorted(set(indices))
+
 
 class SolutionService:
-    def __init__(self, llm: Optional[DeepSeek] = None):
-        self.ocr = CnOcr()
-        self.llm = llm or get_client()
+    def __init__(self, llm: Optional[DeepSeek] = None, vision: Optional[OpenAIVision] = None):
+        # OCR 引擎与 LLM 客户端均在首次使用时创建
+        self._ocr = None
+        # 预热线程与答题线程共用 OCR 引擎，推理与重建互斥
+        self._ocr_lock = RLock()
+        self._llm = llm
+        self._vision = vision
+        self.vision_cfg = get_llm_vision_config()
+        self.ocr_cfg = get_ocr_config()
+        if not self.vision_cfg["enabled"]:
+            self.vision_cfg["mode"] = "never"
+
+    @property
+    def ocr(self):
+        if self._ocr is None:
+            logger.debug("首次使用 OCR，初始化 CnOcr")
+            self._ocr = create_ocr(get_ocr_profile(self.ocr_cfg["profile"]))
+        return self._ocr
+
+    def recycle_ocr(self):
+        """释放 OCR 引擎，下次识别时重新创建。"""
+        with self._ocr_lock:
+            if self._ocr is not None:
+                self._ocr = None
+                gc.collect()
+
+    @metrics.timed("prewarm.ocr")
+    def warm_up_ocr(self, size: Tuple[int, int] = (320, 48)):
+        """
+        空跑一次 OCR 推理（写有文字的小图），提前完成引擎创建与检测、识别两个 onnxruntime 会话的惰性初始化，
+        并让模型权重与推理缓冲区保持在内存中。
+        检测模型在图中找不到文字时不会调用识别模型，因此另按单行识别一次，确保识别会话也已运行。
+        """
+        from PIL import ImageDraw
+
+        im = Image.new("RGB", size, "white")
+        ImageDraw.Draw(im).text((8, size[1] // 4), "A. 12345 OCR warm up", fill="black")
+        img = np.array(im)
+        with self._ocr_lock:
+            self.ocr.ocr(img)
+            self.ocr.ocr_for_single_line(img)
+
+    @property
+    def llm(self) -> DeepSeek:
+        if self._llm is None:
+            self._llm = get_client()
+        return self._llm
+
+    @property
+    def vision(self) -> Optional[OpenAIVision]:
+        if self._vision is None and self.vision_cfg["mode"] != "never":
+            try:
+                self._vision = get_vision_client()
+            except Exception as e:
+                logger.error(f"视觉模型初始化失败，改用 OCR：{e}")
+            if self._vision is None:
+                self.vision_cfg["mode"] = "never"
+        return self._vision
 
     def _get_text(self, item) -> str:
         if isinstance(item, dict) and "text" in item:
@@ -23,36 +145,154 @@ class SolutionService:
             return str(item[0]).strip()
         return ""
 
+    def _get_score(self, item) -> Optional[float]:
+        try:
+            if isinstance(item, dict) and "score" in item:
+                return float(item["score"])
+            elif isinstance(item, (list, tuple)) and len(item) > 1:
+                return float(item[1])
+        except (TypeError, ValueError):
+            pass
+        return None
+
     def ocr_items(self, img_or_path) -> List[Any]:
         """
         执行 OCR，接受图片路径、PIL.Image 或 numpy 数组。
         返回原始识别项列表（字典/列表混合）。
         """
         try:
-            if isinstance(img_or_path, str):
-                out = self.ocr.ocr(img_or_path)
-            elif isinstance(img_or_path, Image.Image):
-                out = self.ocr.ocr(np.array(img_or_path))
-            else:
-                out = self.ocr.ocr(img_or_path)
-            return out or []
+            with self._ocr_lock:
+                if self.ocr_cfg["mode"] == "two_tier" and self.ocr_cfg["first_pass_scale"] < 1:
+                    if isinstance(img_or_path, str):
+                        with Image.open(img_or_path) as im:
+                            return self._ocr_two_tier(im.convert("RGB"))
+                    if isinstance(img_or_path, Image.Image):
+                        return self._ocr_two_tier(img_or_path)
+                if isinstance(img_or_path, str):
+                    out = self.ocr.ocr(img_or_path)
+                elif isinstance(img_or_path, Image.Image):
+                    out = self.ocr.ocr(np.array(img_or_path))
+                else:
+                    out = self.ocr.ocr(img_or_path)
+                return out or []
         except Exception as e:
             logger.error(f"OCR失败: {e}")
             return []
 
-    def ocr_text(self, img_or_path) -> str:
-        """执行 OCR 并返回拼接后的文本。"""
+    def _needs_refine(self, item) -> bool:
+        score = self._get_score(item)
+        if score is not None and score < self.ocr_cfg["min_line_score"]:
+            return True
+        return bool(_OPTION_LABEL.match(self._get_text(item)))
+
+    def _ocr_two_tier(self, img) -> List[Any]:
+        """
+        两级识别：先在缩小的图片上识别全部文字行（检测与识别都更快），
+        只有得分低于 min_line_score 或形如选项标签的行，按位置从原图裁剪后单行重识别，
+        重识别得分更高时替换。
+        """
+        scale = self.ocr_cfg["first_pass_scale"]
+        w, h = img.size
+        small = img.resize((max(1, int(w * scale)), max(1, int(h * scale))), Image.BILINEAR)
+        with metrics.span("quiz.ocr.first"):
+            items = list(self.ocr.ocr(np.array(small)) or [])
+        pad = self.ocr_cfg["crop_padding"]
+        refined = 0
+        with metrics.span("quiz.ocr.refine"):
+            for i, it in enumerate(items):
+                if not isinstance(it, dict) or it.get("position") is None or not self._needs_refine(it):
+                    continue
+                pos = np.asarray(it["position"], dtype=float) / scale
+                left, top = pos.min(axis=0) - pad
+                right, bottom = pos.max(axis=0) + pad
+                box = (max(0, int(left)), max(0, int(top)), min(w, int(right) + 1), min(h, int(bottom) + 1))
+                if box[2] <= box[0] or box[3] <= box[1]:
+                    continue
+                try:
+                    out = self.ocr.ocr_for_single_line(np.array(img.crop(box)))
+                except Exception as e:
+                    logger.debug(f"单行重识别失败: {e}")
+                    continue
+                text, score = self._get_text(out), self._get_score(out)
+                old = self._get_score(it)
+                if text and (old is None or (score is not None and score > old)):
+                    items[i] = {**it, "text": text, "score": score}
+                    refined += 1
+        logger.debug(f"两级 OCR：{len(items)} 行，重识别替换 {refined} 行")
+        return items
+
+    @metrics.timed("quiz.ocr")
+    def ocr_text_scored(self, img_or_path) -> Tuple[str, Optional[float]]:
+        """
+        执行 OCR，返回拼接后的文本与置信度。
+        置信度取各行得分的最小值（一行公式识别失败就足以答错），未识别出文字时为 0。
+        """
         items = self.ocr_items(img_or_path)
         lines: List[str] = []
+        scores: List[float] = []
         for it in items:
             txt = self._get_text(it)
             if txt:
                 lines.append(txt)
+                score = self._get_score(it)
+                if score is not None:
+                    scores.append(score)
         text = "".join(lines)
-        logger.debug(f"OCR提取{len(lines)}行")
-        return text
+        confidence = min(scores) if scores else (None if lines else 0.0)
+        logger.debug(f"OCR提取{len(lines)}行，置信度 {confidence}")
+        return text, confidence
+
+    def ocr_text(self, img_or_path) -> str:
+        """执行 OCR 并返回拼接后的文本。"""
+        return self.ocr_text_scored(img_or_path)[0]
+
+    def has_rich_content(self, driver: Any, ques_box: Any) -> bool:
+        """题目容器内是否含图片或公式。"""
+        try:
+            return bool(driver.execute_script(
+                "return !!arguments[0].querySelector(arguments[1]);", ques_box, _RICH_CONTENT_SELECTOR
+            ))
+        except Exception as e:
+            logger.debug(f"检查题目图片/公式失败：{e}")
+            return False
+
+    def answer_from_image(self, img, driver: Any = None, ques_box: Any = None) -> Tuple[dict, str, str]:
+        """
+        按题目选择解答方式并返回 (LLM 结果, 方式, OCR 文本)：
+        - text：OCR 文本交给 LLM；
+        - vision：截图直接交给视觉模型（题目含图片/公式，或 OCR 置信度低于 min_ocr_confidence）。
+        视觉模型请求失败时退回 OCR 文本。
+        """
+        cfg = self.vision_cfg
+        mode = cfg["mode"]
+        use_vision = mode == "always" or (
+            mode == "auto" and cfg["dom_check"] and driver is not None and ques_box is not None
+            and self.has_rich_content(driver, ques_box)
+        )
+        qa_text, confidence = "", None
+        if not use_vision:
+            try:
+                qa_text, confidence = self.ocr_text_scored(img)
+            except Exception as e:
+                logger.error(f"OCR处理失败: {e}")
+                qa_text, confidence = "", 0.0
+            logger.debug(f"OCR提取题目与选项：{qa_text}")
+            recorder.event("ocr", text=qa_text, confidence=confidence)
+            use_vision = mode == "auto" and confidence is not None and confidence < cfg["min_ocr_confidence"]
+
+        if use_vision and self.vision is not None:
+            logger.info(f"使用视觉模型解答（OCR 置信度：{confidence}）")
+            try:
+                return self.vision.answer_image(img, qa_text), "vision", qa_text
+            except Exception as e:
+                logger.warning(f"视觉模型解答失败，改用 OCR 文本：{e}")
+            if not qa_text:
+                qa_text = self.ocr_text(img)
+                recorder.event("ocr", text=qa_text)
+        return self.llm.answer_question(qa_text), "text", qa_text
 
     # 对指定元素图片进行 截屏
+    @metrics.timed("quiz.screenshot")
     def screenshot_web_element(self, element: Any, save_crop_path: Optional[str] = None) -> Image.Image:
         try:
             # 优先使用 screenshot_as_png 直接获取内存字节
@@ -64,7 +304,8 @@ class SolutionService:
                             f.write(png_bytes)
                     except Exception as e:
                         logger.warning(f"调试保存元素截图失败: {e}")
-                return Image.open(BytesIO(png_bytes)).convert("RGB")
+                with Image.open(BytesIO(png_bytes)) as im:
+                    return im.convert("RGB")
             # 兼容不支持属性的驱动，使用临时文件保存再读取
             with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmp:
                 tmp_path = tmp.name
@@ -80,7 +321,8 @@ class SolutionService:
                                 f.write(tmp_f.read())
                     except Exception as e:
                         logger.warning(f"调试保存元素截图失败: {e}")
-                return Image.open(tmp_path).convert("RGB")
+                with Image.open(tmp_path) as im:
+                    return im.convert("RGB")
             finally:
                 try:
                     os.remove(tmp_path)
@@ -90,7 +332,45 @@ class SolutionService:
             logger.error(f"元素截图失败: {e}")
             return Image.new("RGB", (0, 0))
     
+    # 点击选项
+    @metrics.timed("quiz.click")
+    def _click_options(self, driver: Any, options: List[Any], indices: List[int]):
+        # 去重并按索引升序点击（避免重复点击）；页面内一次点击全部选项，失败的再逐个原生点击
+        indices = sorted(set(indices))
+        try:
+            clicked = set(page_call(driver, "answer", indices) or [])
+        except Exception as e:
+            logger.debug(f"页面内点击选项失败: {e}")
+            clicked = set()
+        for idx in indices:
+            if idx in clicked:
+                continue
+            try:
+                options[idx].click()
+            except Exception as e:
+                logger.warning(f"点击选项索引 {idx} 失败: {e}")
+
+    # 提交答案
+    @metrics.timed("quiz.submit")
+    def _submit_answer(self, driver: Any):
+        submit = driver.execute_script(
+            "return document.querySelector('div.question-body .submit-footer .submit-btn span.submits');"
+        )
+        if submit:
+            try:
+                driver.execute_script("arguments[0].click();", submit)
+                logger.info("已点击提交按钮")
+            except Exception:
+                try:
+                    submit.click()
+                    logger.info("已点击提交按钮")
+                except Exception as e2:
+                    logger.warning(f"提交按钮点击失败: {e2}")
+        else:
+            logger.warning("未找到提交按钮")
+
     # 对指定元素图片进行 OCR 识别，并将识别结果拼成字符串交给 LLM 解答。
+    @metrics.timed("quiz.total")
     def solve_answers_from_image(self, element: Any = None, save_crop_path: Optional[str] = None, driver: Any = None) -> bool:
         # 校验 driver 并定位题目容器元素
         if driver is None and element is None:
@@ -110,19 +390,19 @@ class SolutionService:
         # 截取元素图片
         img = self.screenshot_web_element(ques_box, save_crop_path)
     
-        # 对元素图片进行 OCR，得到题目与选项文本
-        try:
-            qa_text = self.ocr_text(img)
-        except Exception as e:
-            logger.error(f"OCR处理失败: {e}")
-            qa_text = ""
-        logger.debug(f"OCR提取题目与选项：{qa_text}")
-        
-        # 交给 LLM 获取答案列表
+        # OCR 文本或截图交给 LLM 获取答案列表；截图用完即释放，被采样的交给后台写入调试样本
+        keep = artifacts.sample()
         selected: List[str] = []
+        opt_texts: List[str] = []
+        qa_text, mode = "", "text"
         try:
-            result = self.llm.answer_question(qa_text)
-            logger.debug(f"LLM返回: {result}")
+            try:
+                result, mode, qa_text = self.answer_from_image(img, driver, ques_box)
+            finally:
+                if not keep:
+                    img.close()
+            logger.debug(f"LLM返回（{mode}）: {result}")
+            recorder.event("llm", result=result, mode=mode)
             if isinstance(result, dict):
                 sel = result.get("selected")
                 if isinstance(sel, list):
@@ -134,141 +414,41 @@ class SolutionService:
         # 若提供 driver，则执行页面选项定位与点击，并提交
         if driver:
             try:
-                # 获取所有选项元素
-                options = driver.execute_script(
-                    "return Array.from(document.querySelectorAll('.ques .item.ques-card-box .options .option'));"
-                )
+                # 一次取回所有选项元素与文本（文本便于匹配判断题）
+                found = page_call(driver, "options") or {}
+                options = found.get("els") or []
+                opt_texts = [t or "" for t in found.get("texts") or []]
                 if not options:
                     logger.error("未找到选项元素 .ques .item.ques-card-box .options .option")
-                logger.debug(f"页面选项元素数量: {len(options) if options else 0}")
-                
-                # 预取每个选项文本（便于匹配判断题）
-                opt_texts = []
-                for el in options or []:
-                    try:
-                        txt = driver.execute_script(
-                            "return (arguments[0].innerText||arguments[0].textContent||'').trim();",
-                            el,
-                        ) or ""
-                    except Exception:
-                        txt = ""
-                    opt_texts.append(txt)
+                logger.debug(f"页面选项元素数量: {len(options)}")
                 logger.debug(f"选项文本列表: {opt_texts}")
-                
-                # 点击选项
-                def click_opt(el):
-                    try:
-                        driver.execute_script("arguments[0].click();", el)
-                    except Exception:
-                        try:
-                            el.click()
-                        except Exception as e2:
-                            logger.warning(f"选项点击失败: {e2}")
-        
-                def match_true_false(ans: str):
-                    a = str(ans).strip()
-                    if a in ("对","正确","TRUE","T","YES","Y","是"):
-                        for i, t in enumerate(opt_texts):
-                            if "对" in t or "正确" in t:
-                                return i
-                    if a in ("错","错误","FALSE","F","NO","N","否"):
-                        for i, t in enumerate(opt_texts):
-                            if "错" in t or "错误" in t:
-                                return i
-                    return None
         
                 # 依据提示词：优先按字母选项；判断题则匹配“对/错”；无法判断时也要选择一个
-                normalized = []
-                for s in selected or []:
-                    if not s:
-                        continue
-                    s2 = str(s).strip()
-                    # 提示词要求字母返回，统一转大写
-                    normalized.append(s2.upper())
-        
-                indices_to_click = []
-                for ans in normalized:
-                    # 字母选项（A/B/C/...）
-                    if ans and ans[0].isalpha():
-                        idx = ord(ans[0]) - ord('A')
-                        if options and 0 <= idx < len(options):
-                            indices_to_click.append(idx)
-                            logger.info(f"选择字母答案: {ans} -> 选项索引 {idx}")
-                            continue
-                    # 判断题匹配
-                    idx_tf = match_true_false(ans)
-                    if idx_tf is not None:
-                        indices_to_click.append(idx_tf)
-                        logger.info(f"选择判断题答案: {ans} -> 选项索引 {idx_tf}")
+                indices_to_click = select_option_indices(selected, opt_texts)
         
-                # 若仍未有任何可点击索引，按提示词“无法判断则返回一个你认为对的选择”，选择第一个
-                if options and not indices_to_click:
-                    indices_to_click = [0]
-                    logger.info(f"未能从答案列表匹配到选项，按提示词策略选择第一个选项: {opt_texts[0]}")
-        
-                # 去重并按索引升序点击（避免重复点击）
-                for idx in sorted(set(indices_to_click)):
-                    try:
-                        click_opt(options[idx])
-                    except Exception as e:
-                        logger.warning(f"点击选项索引 {idx} 失败: {e}")
-        
-                # 提交答案
-                submit = driver.execute_script(
-                    "return document.querySelector('div.question-body .submit-footer .submit-btn span.submits');"
-                )
-                if submit:
-                    try:
-                        driver.execute_script("arguments[0].click();", submit)
-                        logger.info("已点击提交按钮")
-                    except Exception:
-                        try:
-                            submit.click()
-                            logger.info("已点击提交按钮")
-                        except Exception as e2:
-                            logger.warning(f"提交按钮点击失败: {e2}")
-                else:
-                    logger.warning("未找到提交按钮")
+                # 点击选项并提交答案
+                self._click_options(driver, options, indices_to_click)
+                self._submit_answer(driver)
             except Exception as e:
                 logger.error(f"页面答题流程失败: {e}")
+            if keep:
+                artifacts.submit(img, text=qa_text, answer=selected, options=opt_texts, mode=mode)
 
             sleep(2)
             
             # HACK: 关闭页面
-            close_box = driver.execute_script(
-                """
-                var root = document.querySelector('div.ai-test-question-wrapper');
-                if (!root) return null;
-                return root.querySelector('.header-box .close-box')
-                    || root.querySelector('.header-box [class*="close"]')
-                    || root.querySelector('.header-box .right-box .close-box')
-                    || root.querySelector('.header-box .close');
-                """
-            )
+            # 查找关闭按钮并派发点击事件，返回按钮元素
+            try:
+                close_box = page_call(driver, "closeQuiz")
+            except Exception as e:
+                logger.warning(f"关闭按钮事件派发失败: {e}")
+                close_box = None
             if close_box:
-                try:
-                    driver.execute_script(
-                        """
-                        var el = arguments[0];
-                        try { el.scrollIntoView({block:'center', inline:'center'}); } catch(e){}
-                        try { el.click(); } catch(e){}
-                        try {
-                            var rect = el.getBoundingClientRect();
-                            var opts = {view: window, bubbles: true, cancelable: true, clientX: rect.left + rect.width/2, clientY: rect.top + rect.height/2};
-                            ['pointerdown','mousedown','mouseup','click'].forEach(function(t){ try { el.dispatchEvent(new MouseEvent(t, opts)); } catch(e){} });
-                        } catch(e) {}
-                        """,
-                        close_box,
-                    )
-                    logger.info("已触发关闭按钮事件")
-                except Exception as e:
-                    logger.warning(f"关闭按钮事件派发失败: {e}")
+                logger.info("已触发关闭按钮事件")
 
                 # 验证是否关闭
                 try:
-                    closed = driver.execute_script(
-                        "var r=document.querySelector('div.ai-test-question-wrapper'); return !r || r.style.display==='none' || r.offsetParent===null;"
-                    )
+                    closed = page_call(driver, "quizClosed")
                 except Exception:
                     closed = False
                 if not closed:
@@ -276,4 +456,6 @@ class SolutionService:
             else:
                 logger.error("未找到关闭按钮")
             return True
-        return False
\ No newline at end of file
+        if keep:
+            artifacts.submit(img, text=qa_text, answer=selected, mode=mode)
+        return False
@@ -3,7 +3,7 @@ import json
 from pathlib import Path
 from typing import Optional, List, Dict
 from time import sleep, time
-from threading import Event, Thread
+from threading import Lock
 from loguru import logger
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
@@ -13,13 +13,37 @@ from selenium.webdriver.remote.webelement import WebElement
 from selenium.webdriver.common.action_chains import ActionChains
 
 from config.WebdriverConfig import WebDriverConfigurator
-from config.JsonLoadConfig import resolve_cookie_file_path
+from config.JsonLoadConfig import resolve_cookie_file_path, get_session_config, get_listener_config, get_site_config, get_exam_config, get_watchdog_config, get_prewarm_config
 from service.SolutionService import SolutionService
+from service.ChapterTestService import ChapterTestService
+from service.ListenerSupervisor import ListenerSupervisor, PRIORITY_IDLE, CALL_TIMEOUT
+from service.PrewarmScheduler import PrewarmScheduler
+from service.SessionSupervisor import SessionSupervisor, SessionLost, is_dead_session_error
+from tools.Metrics import metrics
+from tools.CommandTracer import tracer
+from tools.SessionRecorder import recorder
+from tools.MemoryGuard import memory_guard
+from tools.ArtifactWriter import artifacts
+from tools.PageHelpers import page_call
+from service.SessionCheckpointer import SessionCheckpointer, normalize_cookies, dump_cookies, write_text_atomic
+
+
+# 解题服务（OCR 模型与 LLM 客户端较重，首次遇到随堂测试时才创建）
+_solution_service: Optional[SolutionService] = None
+# 答题线程与预热线程都可能首先创建解题服务
+_solution_lock = Lock()
+
+
+def get_solution_service() -> SolutionService:
+    global _solution_service
+    with _solution_lock:
+        if _solution_service is None:
+            _solution_service = SolutionService()
+            # 内存超出预算时重建 OCR 引擎（释放 onnxruntime 的缓冲区）
+            memory_guard.register_recycler("ocr", _solution_service.recycle_ocr)
+        return _solution_service
 
 
-# 初始化解题服务
-solution_service = SolutionService()
-
 class WebEdgeService:
     def __init__(
         self, 
@@ -28,7 +52,7 @@ class WebEdgeService:
     ):
         # 统一 cookies 路径：从 JsonLoadConfig 解析
         self._shutdown_done = False
-        self.cookies_file = resolve_cookie_file_path()
+        self.cookies_file = cookies_file or resolve_cookie_file_path()
         cookies_cfg_path: Optional[str] = self.cookies_file
         try:
             p = Path(self.cookies_file)
@@ -53,10 +77,57 @@ class WebEdgeService:
             logger.warning(f"Cookie 文件检查异常，跳过加载：{e}")
             cookies_cfg_path = None
 
+        # 课程元素 id -> 课程名称（目录扫描时记录）
+        self._lesson_names: Dict[str, str] = {}
+        # 课程页被刷新（停滞恢复）后，之前扫描得到的目录元素全部失效，主流程需重新扫描目录
+        self.catalogue_stale = False
+        # 课程页地址（会话重建后据此回到课程）
+        self._course_url: Optional[str] = None
+
         # 构建驱动配置，只有在 cookies 文件有效时才传入路径，否则禁用加载
         self.configurator = configurator or WebDriverConfigurator(cookies_file=cookies_cfg_path)
         self.driver = self.configurator.build()
 
+        # 会话检查点：长时间运行中周期性保存 Cookie，崩溃时不丢失刷新过的登录态
+        session_cfg = get_session_config()
+        self.session_cfg = session_cfg
+        # 会话存活监督：浏览器或驱动崩溃时尽快发现，由 recover_session 重建
+        self.session_supervisor = SessionSupervisor(session_cfg["failure_threshold"], session_cfg["max_restarts"])
+        self.session_supervisor.attach(self.driver)
+        self.checkpointer = SessionCheckpointer(
+            snapshot=self._snapshot_cookies,
+            target=self.cookies_file,
+            interval_seconds=session_cfg["checkpoint_interval_seconds"],
+            debounce_seconds=session_cfg["checkpoint_debounce_seconds"],
+        )
+        self.checkpointer.start()
+
+    def _snapshot_cookies(self) -> List[Dict]:
+        """读取当前浏览器 Cookie，会话已结束或正在重建时返回空列表。"""
+        driver = getattr(self, "driver", None)
+        if driver is None or getattr(driver, "session_id", None) is None:
+            return []
+        # 重建期间调度器已停止，不与 recover_session 在主线程上的命令并发
+        guard = getattr(self, "session_supervisor", None)
+        if guard is not None and guard.lost.is_set():
+            return []
+        # 调度器运行时经命令线程执行，避免与探测命令并发
+        supervisor = getattr(self, "supervisor", None)
+        if supervisor:
+            return supervisor.call(driver.get_cookies, priority=PRIORITY_IDLE, timeout=30)
+        return driver.get_cookies()
+
+    def _call(self, fn, *args, timeout: Optional[float] = CALL_TIMEOUT):
+        """主线程的 WebDriver 操作：调度器已创建时经命令线程执行，与探测、Cookie 快照等命令串行。"""
+        supervisor = getattr(self, "supervisor", None)
+        if supervisor:
+            return supervisor.call(fn, *args, timeout=timeout)
+        return fn(*args)
+
+    def _until(self, condition):
+        """包装 WebDriverWait 的等待条件：每次轮询单独经命令线程执行，轮询间隔中其他命令可以插入。"""
+        return lambda driver: self._call(condition, driver)
+
     def _save_cookies(
         self, 
         file_path: Optional[str] = None
@@ -75,50 +146,108 @@ class WebEdgeService:
             # 若检查本身异常，不影响后续保存流程
             pass
         try:
-            cookies = self.driver.get_cookies()
-            try:
-                Path(target).parent.mkdir(parents=True, exist_ok=True)
-            except Exception as e:
-                logger.error(f"创建Cookie目录失败: {e}")
+            # 默认文件交由检查点处理（内容未变化时跳过写入）
+            if target == self.cookies_file:
+                result, count = self.checkpointer.checkpoint()
+                if result == "written":
+                    logger.info(f"已保存 {count} 条 Cookie 到 {target}")
+                elif result == "unchanged":
+                    logger.info(f"Cookie 未变化（{count} 条），无需重新保存：{target}")
+                else:
+                    logger.warning(f"未读取到 Cookie，未保存到 {target}")
                 return
-            for c in cookies:
-                if "expiry" in c and c["expiry"] is not None:
-                    try:
-                        c["expiry"] = int(c["expiry"])
-                    except Exception:
-                        c["expiry"] = None
-            with open(target, "w", encoding="utf-8") as f:
-                json.dump(cookies, f, ensure_ascii=False, indent=2)
+            cookies = normalize_cookies(self.driver.get_cookies())
+            write_text_atomic(target, dump_cookies(cookies))
             logger.info(f"已保存 {len(cookies)} 条 Cookie 到 {target}")
         except Exception as e:
             logger.error(f"保存 Cookie 失败: {e}")
 
+    # 读取当前页面的导航计时指标
+    def _log_navigation_timing(
+        self,
+        label: str
+    ) -> Optional[Dict]:
+        """
+        读取 Performance API 的导航计时与资源数量并记录日志，便于核对资源屏蔽与 eager 策略的效果。
+        """
+        try:
+            data = self._call(
+                self.driver.execute_script,
+                """
+                var n = performance.getEntriesByType('navigation')[0];
+                if (!n) return null;
+                var res = performance.getEntriesByType('resource');
+                var bytes = 0;
+                for (var i = 0; i < res.length; i++) { bytes += res[i].transferSize || 0; }
+                return { url: location.href,
+                         ttfb: Math.round(n.responseStart),
+                         dcl: Math.round(n.domContentLoadedEventEnd),
+                         load: Math.round(n.loadEventEnd),
+                         resources: res.length,
+                         kb: Math.round((bytes + (n.transferSize || 0)) / 1024) };
+                """
+            )
+        except Exception as e:
+            logger.debug(f"读取导航计时失败[{label}]：{e}")
+            return None
+        if data:
+            # load 为 0 表示 eager 策略下 load 事件尚未触发
+            logger.info(
+                f"页面计时[{label}] TTFB={data.get('ttfb')}ms DOMContentLoaded={data.get('dcl')}ms "
+                f"load={data.get('load') or '-'}ms 资源数={data.get('resources')} 传输={data.get('kb')}KB"
+            )
+        return data
+
     # 打开入口并确保登录进入学习页面
     def _ensure_login_and_enter_study(
         self, 
-        base_url: str = "https://onlineweb.zhihuishu.com/", 
-        study_url_hint: str = "https://onlineweb.zhihuishu.com/onlinestuh5", 
-        login_domain_hint: str = "passport.zhihuishu.com", 
+        base_url: Optional[str] = None, 
+        study_url_hint: Optional[str] = None, 
+        login_domain_hint: Optional[str] = None, 
         login_wait_seconds: int = 180
     ) -> bool:
         """
         打开入口页，若未登录则提示用户在浏览器中完成登录，并等待进入学习页面。
-        返回是否成功进入学习页。
+        返回是否成功进入学习页。地址缺省时读取 config.json 的 site 段。
         """
+        site = get_site_config()
+        base_url = base_url or site["base_url"]
+        study_url_hint = study_url_hint or site["study_url_hint"]
+        login_domain_hint = login_domain_hint or site["login_domain_hint"]
         driver = self.driver
-        driver.get(base_url)
-        logger.debug(f"已打开入口页：{base_url}")
-
-        try:
-            WebDriverWait(driver, 2).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-        except Exception:
-            pass
+        configurator = self.configurator
+        with configurator.phase("open_entry"):
+            self._call(driver.get, base_url)
+            logger.debug(f"已打开入口页：{base_url}")
 
-        current_url = driver.current_url
+            try:
+                WebDriverWait(driver, 2).until(self._until(EC.presence_of_element_located((By.TAG_NAME, "body"))))
+            except Exception:
+                pass
+        self._log_navigation_timing("entry")
+
+        with configurator.phase("enter_study"):
+            entered = self._wait_enter_study(study_url_hint, login_domain_hint, login_wait_seconds)
+        configurator.log_startup_summary()
+        if entered:
+            self._log_navigation_timing("study")
+            self.checkpointer.request()
+        return entered
+
+    @metrics.timed("login_wait")
+    def _wait_enter_study(
+        self,
+        study_url_hint: str,
+        login_domain_hint: str,
+        login_wait_seconds: int
+    ) -> bool:
+        """等待进入学习页，未登录时提示用户完成登录。"""
+        driver = self.driver
+        current_url = self._call(lambda: driver.current_url)
         if login_domain_hint in current_url:
             logger.warning("检测到未登录，请在浏览器窗口内完成登录（扫码或知到APP）。系统将自动监听登录状态，登录成功后会自动跳转到学习页面。")
             try:
-                WebDriverWait(driver, login_wait_seconds, poll_frequency=1).until(EC.url_contains(study_url_hint))
+                WebDriverWait(driver, login_wait_seconds, poll_frequency=1).until(self._until(EC.url_contains(study_url_hint)))
                 logger.info("登录成功，已进入学习页面。")
                 return True
             except TimeoutException:
@@ -126,40 +255,41 @@ class WebEdgeService:
                 return False
         else:
             try:
-                WebDriverWait(driver, login_wait_seconds, poll_frequency=1).until(EC.url_contains(study_url_hint))
+                WebDriverWait(driver, login_wait_seconds, poll_frequency=1).until(self._until(EC.url_contains(study_url_hint)))
                 logger.info("已登录，自动进入学习页面。")
                 return True
             except TimeoutException:
-                logger.warning(f"未在预期时间进入学习页面，当前地址：{driver.current_url}")
+                logger.warning(f"未在预期时间进入学习页面，当前地址：{self._call(lambda: driver.current_url)}")
                 return False
 
     # 提示用户选择课程;进入课程页面后关闭课前必读并提取课程名称
     def _wait_course_and_prepare(
         self, 
-        course_url_hint: str = "https://studywisdomh5.zhihuishu.com/study/index", 
+        course_url_hint: Optional[str] = None, 
         wait_seconds: int = 30
     ) -> Optional[str]:
         """
         提示用户选择课程并等待课程页面，关闭课前必读弹窗，返回课程名称。
         """
+        course_url_hint = course_url_hint or get_site_config()["course_url_hint"]
         driver = self.driver
         logger.warning(f"请在{wait_seconds}秒内选择要进入的课程。")
         sleep(3)
         try:
-            WebDriverWait(driver, wait_seconds, poll_frequency=1).until(EC.url_contains(course_url_hint))
-            overlays = driver.find_elements(By.CSS_SELECTOR, ".el-overlay.ss2077-custom-modal")
-            for overlay in overlays:
-                style = overlay.get_attribute("style") or ""
-                if not re.search(r"display\s*:\s*none\s*;", style, flags=re.IGNORECASE):
-                    new_style = style.rstrip(";") + "; display: none;"
-                    driver.execute_script("arguments[0].setAttribute('style', arguments[1]);", overlay, new_style)
+            WebDriverWait(driver, wait_seconds, poll_frequency=1).until(self._until(EC.url_contains(course_url_hint)))
+            self._course_url = self._call(lambda: driver.current_url)
+            self._call(self._close_overlays)
             logger.info("已关闭课前必读窗口。")
+            self._log_navigation_timing("course")
+            self.checkpointer.request()
 
             try:
-                container = WebDriverWait(driver, 5, poll_frequency=1).until(EC.presence_of_element_located((By.CSS_SELECTOR, "div.course-name")))
-                spans = container.find_elements(By.TAG_NAME, "span")
+                container = WebDriverWait(driver, 5, poll_frequency=1).until(
+                    self._until(EC.presence_of_element_located((By.CSS_SELECTOR, "div.course-name")))
+                )
+                spans = self._call(container.find_elements, By.TAG_NAME, "span")
                 if len(spans) >= 2:
-                    course_name = spans[1].text.strip()
+                    course_name = self._call(lambda: spans[1].text).strip()
                     logger.info(f"当前课程名称: {course_name}")
                     return course_name
                 else:
@@ -172,18 +302,36 @@ class WebEdgeService:
                 logger.error(f"提取课程名称时发生异常: {e}")
                 return None
         except TimeoutException:
-            logger.error(f"未在{wait_seconds}秒内选择课程，操作终止。当前URL：{driver.current_url}")
+            logger.error(f"未在{wait_seconds}秒内选择课程，操作终止。当前URL：{self._call(lambda: driver.current_url)}")
             return None
 
+    # 关闭课程页的课前必读等遮罩弹窗
+    def _close_overlays(self):
+        driver = self.driver
+        overlays = driver.find_elements(By.CSS_SELECTOR, ".el-overlay.ss2077-custom-modal")
+        for overlay in overlays:
+            style = overlay.get_attribute("style") or ""
+            if not re.search(r"display\s*:\s*none\s*;", style, flags=re.IGNORECASE):
+                new_style = style.rstrip(";") + "; display: none;"
+                driver.execute_script("arguments[0].setAttribute('style', arguments[1]);", overlay, new_style)
+
     # 获取所有课程和测试
     def _get_course_and_test_account(
         self
+    ) -> Dict[str, List[WebElement]]:
+        """扫描课程目录（经命令线程执行，与探测、Cookie 快照等命令串行）。"""
+        return self._call(self._scan_catalogue)
+
+    @metrics.timed("catalogue_scan")
+    def _scan_catalogue(
+        self
     ) -> Dict[str, List[WebElement]]:
         res: Dict[str, List[WebElement]] = {
             "unfinished_course": [],
             "unfinished_test": []
         }
         driver = self.driver
+        self.catalogue_stale = False
         
         # 以 catalogue 容器为锚点查找
         try:
@@ -252,6 +400,7 @@ class WebEdgeService:
                     logger.debug(f"已完成课程: {current_course_name}")
                 else:
                     res["unfinished_course"].append(child_info_el)
+                    self._lesson_names[child_info_el.id] = current_course_name
                     logger.debug(f"待完成课程: {current_course_name}")
 
             # 遍历剩余测试数
@@ -396,29 +545,22 @@ class WebEdgeService:
     # 设置播放速度为1.5x
     def _set_15x_play(
         self
-    ):
+    ) -> bool:
+        """设置 1.5 倍速并确保播放；随堂测试窗口可见时返回 False，待调度器答题后重试。"""
         driver = self.driver
         
         # 确保 controlsBar 可见
         if not self._is_controls_bar_visible():
             self.show_controls_bar()
         
-        # 在设置播放速度前，若检测到随堂测试窗口，则等待其结束
+        # 在设置播放速度前，若检测到随堂测试窗口，则交由调度器先处理
         try:
-            has_test = driver.execute_script("return !!document.querySelector('div.ai-test-question-wrapper');")
+            has_test = driver.execute_script("var el=document.querySelector('div.ai-test-question-wrapper'); return !!el && el.offsetParent!==null;")
         except Exception:
             has_test = False
         if has_test:
-            logger.info("设置倍速前检测到随堂测试窗口")
-            while True:
-                try:
-                    present = driver.execute_script("var el=document.querySelector('div.ai-test-question-wrapper'); return !!el && el.offsetParent!==null;")
-                except Exception:
-                    present = False
-                if not present:
-                    break
-                sleep(0.5)
-            logger.info("随堂测试结束")
+            logger.info("设置倍速前检测到随堂测试窗口，待随堂测试结束后重试")
+            return False
         
         # 设置倍速
         speed15 = driver.execute_script("return document.querySelector('div.speedBox .speedTab.speedTab15');")
@@ -444,310 +586,174 @@ class WebEdgeService:
             driver.execute_script("arguments[0].setAttribute('style', 'z-index: 2; overflow: hidden; display: none;');", controls_bar)
         except Exception:
             pass
+        return True
     
-    # FIXME: 视频结束监听线程
-    def _listen_video_play_end(
+    # 读取播放器状态（供调度器探测）
+    def _read_player_state(
         self
-    ):
-        """
-        启动一个后台线程，周期性读取页面上的当前播放时间和总时长，
-        当检测到当前时间达到总时长或达到最大等待时长后，置位 finished 事件。
-        线程支持通过 pause/stop 事件进行暂停与停止控制。
-        """
+    ) -> Dict:
+        """一次调用同时读取随堂测试窗口是否可见、当前播放时间与总时长。"""
+        try:
+            return page_call(self.driver, "state") or {}
+        except Exception:
+            return {"quiz": False, "cur": None, "dur": None}
+
+    # 视频回拖几秒并重新调用 play()（停滞恢复：跳出缓冲卡死）
+    def _nudge_playback(
+        self, seconds: float = 2
+    ) -> bool:
+        ok = self.driver.execute_script(
+            """
+            var v = document.querySelector('video');
+            if (!v) return false;
+            try { v.currentTime = Math.max(0, v.currentTime - arguments[0]); } catch (e) {}
+            var p = v.play();
+            if (p && p.catch) p.catch(function () {});
+            return true;
+            """,
+            seconds
+        )
+        if not ok:
+            logger.warning("未找到 video 元素，无法回拖")
+        return bool(ok)
+
+    # 刷新课程页并重新进入当前课程（停滞恢复的最后手段）
+    def _reload_lesson(
+        self, lesson_name: str = ""
+    ) -> bool:
+        """刷新后在目录中按名称找到当前课程并重新进入，恢复倍速与播放。"""
         driver = self.driver
+        driver.refresh()
+        self.catalogue_stale = True
+        try:
+            WebDriverWait(driver, 15, poll_frequency=0.5).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "div.el-scrollbar.catalogue"))
+            )
+        except TimeoutException:
+            logger.warning("刷新后未在限定时间找到课程目录")
+            return False
+        self._close_overlays()
+        el = None
+        if lesson_name:
+            el = driver.execute_script(
+                """
+                var spans = document.querySelectorAll('div.child div.child-line span');
+                for (var i = 0; i < spans.length; i++) {
+                    if (spans[i].textContent.trim() !== arguments[0]) continue;
+                    var child = spans[i].closest('div.child');
+                    return child && (child.querySelector('div.child-info.cur.hasvideo') || child.querySelector('div.child-info'));
+                }
+                return null;
+                """,
+                lesson_name
+            )
+        if el is not None:
+            self._lesson_names[el.id] = lesson_name
+            self._open_lesson(el)
+        else:
+            logger.warning(f"刷新后未在目录中找到课程「{lesson_name}」，直接恢复播放")
+        self._set_15x_play()
+        logger.info("已刷新并重新进入当前课程")
+        return el is not None
 
-        # 控制事件（若不存在则创建），并清理初始状态
-        pause_event = getattr(self, "_video_pause_event", None) or Event()
-        stop_event = getattr(self, "_video_stop_event", None) or Event()
-        finished_event = getattr(self, "_video_finished_event", None) or Event()
-        self._video_pause_event = pause_event
-        self._video_stop_event = stop_event
-        self._video_finished_event = finished_event
-        finished_event.clear()
-        stop_event.clear()
-
-        def js_read_times():
-            """从页面读取当前播放时间与总时长文本。"""
-            try:
-                return driver.execute_script(
-                    """
-                    var el = document.querySelector("div.nPlayTime[class='nPlayTime 33322']")
-                             || document.querySelector("div.nPlayTime");
-                    var cur = el ? el.querySelector("span.currentTime") : null;
-                    var dur = el ? el.querySelector("span.duration") : null;
-                    return { cur: cur ? cur.textContent.trim() : null,
-                             dur: dur ? dur.textContent.trim() : null };
-                    """
-                )
-            except Exception:
-                return {"cur": None, "dur": None}
-        
-        def parse_time(text: str):
-            """将类似 00:23:45 的时间文本转为秒。"""
-            if not text:
-                return None
-            parts = str(text).split(":")
-            try:
-                vals = [int(p) for p in parts]
-            except Exception:
-                return None
-            sec = 0
-            for v in vals:
-                sec = sec * 60 + v
-            return sec
-        
-        def worker():
-            """后台线程：监控播放进度，设置 finished 事件。"""
-            interval = 0.5  # 固定检查间隔
-            # 优先使用课程上下文中读取的总时长文本（在 _handle_course 中设置）
-            attr_dur_txt = getattr(self, "_video_total_text", None)
-            dur_sec_attr = parse_time(attr_dur_txt) if attr_dur_txt else None
-            if attr_dur_txt:
-                logger.debug(f"视频结束监控线程开始，总时长：{attr_dur_txt}")
-            else:
-                logger.debug("视频结束监控线程开始，总时长信息未就绪，稍后继续读取")
-            # 最大等待时间：若能读到时长则+60秒余量，否则固定30分钟
-            max_wait = (dur_sec_attr + 60) if dur_sec_attr is not None else 1800
-            logger.debug(f"视频结束监控线程开始，最大等待时间：{max_wait}秒")
-            logged_dur = bool(attr_dur_txt)
-            start_ts = time()  # 新增：监控起始时间，用于最大等待时间判断
-            
-            while not stop_event.is_set():
-                if pause_event.is_set():
-                    sleep(interval)
-                    continue
-                data = js_read_times()
-                cur_txt = data.get("cur") if data else None
-                dur_txt = data.get("dur") if data else None
-                cur_sec = parse_time(cur_txt)
-                dur_sec2 = parse_time(dur_txt)
-                # 首次读取到总时长时更新日志与最大等待时间
-                if dur_txt and not logged_dur:
-                    logger.debug(f"已读取到总时长：{dur_txt}")
-                    if dur_sec2 is not None:
-                        max_wait = dur_sec2 + 60
-                        logger.debug(f"更新最大等待时间：{max_wait}秒")
-                    logged_dur = True
-                # 达到总时长或接近结束（差1秒以内）即认为完成
-                if (cur_txt and dur_txt and cur_txt == dur_txt) or (
-                    cur_sec is not None and dur_sec2 is not None and cur_sec >= (dur_sec2 - 1)
-                ) or (
-                    cur_sec is not None and dur_sec_attr is not None and cur_sec >= (dur_sec_attr - 1)
-                ):
-                    finished_event.set()
-                    logger.debug("视频结束监控线程检测到视频结束")
-                    break
-                # 超过最大等待时间也认为完成，防止卡死
-                if (time() - start_ts) > max_wait:
-                    finished_event.set()
-                    logger.debug("视频结束监控线程超过最大等待时间，认为视频结束")
-                    break
-                sleep(interval)
-            logger.debug("视频结束监控线程已退出")
-        
-        # 若旧线程仍在运行，先停止并回收
-        old = getattr(self, "_video_thread", None)
-        if old and old.is_alive():
-            logger.debug("正在停止旧视频结束监控线程")
-            stop_event.set()
-            try:
-                logger.debug("等待旧视频结束监控线程停止")
-                old.join(timeout=3)
-            except Exception:
-                pass
-            logger.debug("旧视频结束监控线程已停止")
-            stop_event.clear()
-        
-        # 启动新线程
-        th = Thread(target=worker, name="VideoPlayEndMonitor", daemon=True)
-        th.start()
-        logger.debug("视频结束监控线程已启动")
-        self._video_thread = th
-        
-        # 返回控制事件（也存放在 self 上，外部可直接访问）
-        return {
-            "thread": th,
-            "pause": pause_event,
-            "stop": stop_event,
-            "finished": finished_event,
-        }
+    # 随堂测试窗口是否已关闭
+    def _is_quiz_closed(
+        self
+    ) -> bool:
+        try:
+            return bool(page_call(self.driver, "quizClosed"))
+        except Exception:
+            return False
 
-    # HACK: 监听随堂测试窗口是否出现
-    def _listen_in_class_test(
+    # 解答当前随堂测试
+    def _solve_in_class_test(
         self
     ) -> bool:
-        driver = self.driver
+        try:
+            return get_solution_service().solve_answers_from_image(driver=self.driver)
+        finally:
+            memory_guard.checkpoint("quiz", tracer.scope)
 
-        # 标记：随堂测试检测状态，供外部主循环暂停/恢复使用
-        setattr(self, "_in_class_test_detected", False)
-        stop_event = getattr(self, "_in_class_test_stop_event", None)
-        pause_event = getattr(self, "_in_class_test_pause_event", None)
-        while True:
-            # 支持暂停与停止
-            if stop_event and stop_event.is_set():
-                setattr(self, "_in_class_test_detected", False)
-                logger.debug("随堂测试监听停止")
-                return False
-            if pause_event and pause_event.is_set():
-                sleep(0.5)
-                continue
-            try:
-                # 检测弹窗是否可见（offsetParent 为 null 表示不可见）
-                present = driver.execute_script(
-                    "var el=document.querySelector('div.ai-test-question-wrapper'); return !!el && el.offsetParent!==null;"
-                )
-                if present:
-                    logger.info("检测到随堂测试窗口")
-                    # 通知主循环：测试已出现
-                    setattr(self, "_in_class_test_detected", True)
-
-                    # 暂停视频结束监控线程
-                    v_pause = getattr(self, "_video_pause_event", None)
-                    if v_pause:
-                        v_pause.set()
-
-                    # 小幅等待以确保弹窗渲染完成
-                    sleep(0.5)
-
-                    # 开始答题
-                    ok = solution_service.solve_answers_from_image(driver=driver)
-                    if ok:
-                        logger.info("随堂测试已完成并已提交")
-                        # 等待弹窗消失，最多 30 秒
-                        try:
-                            WebDriverWait(driver, 30, poll_frequency=0.5).until(
-                                lambda d: d.execute_script(
-                                    "var el=document.querySelector('div.ai-test-question-wrapper'); return !el || el.offsetParent===null;"
-                                )
-                            )
-                        except Exception:
-                            pass
-                        sleep(2)
-                        self._change_play_state(pause=False)
-                    else:
-                        logger.error("解决随堂测试失败")
-
-                    # 恢复视频结束监控线程
-                    if v_pause:
-                        v_pause.clear()
-
-                    # 清除测试检测标记，允许后续再次检测与处理
-                    setattr(self, "_in_class_test_detected", False)
-            except Exception:
-                pass
-            sleep(0.5)
-    
-    # 初始化线程
+    # 初始化监听
     def init_listeners(
         self
     ):
-        """初始化并启动监听线程（随堂测试与视频监控），默认置为暂停状态。"""
-        # 初始化随堂测试监听
-        self._in_class_test_stop_event = getattr(self, "_in_class_test_stop_event", None) or Event()
-        self._in_class_test_pause_event = getattr(self, "_in_class_test_pause_event", None) or Event()
-        self._in_class_test_pause_event.set()  # 初始暂停
-        th_test = getattr(self, "_in_class_test_thread", None)
-        if not th_test or not th_test.is_alive():
-            th_test = Thread(target=self._listen_in_class_test, name="InClassTestListener", daemon=True)
-            th_test.start()
-            self._in_class_test_thread = th_test
-            logger.debug("随堂测试监听线程已初始化并启动（暂停中）")
-        
-        # 初始化视频结束监控线程
-        ctrl = self._listen_video_play_end()  # 创建事件与线程
-        ctrl["pause"].set()  # 初始暂停
-        logger.debug("视频结束监控线程已初始化并启动（暂停中）")
+        """启动监听调度器（随堂测试与视频进度），默认置为暂停状态。"""
+        supervisor = getattr(self, "supervisor", None)
+        if supervisor is None:
+            supervisor = ListenerSupervisor(
+                self,
+                probe_interval=get_listener_config()["probe_interval_seconds"],
+                watchdog=get_watchdog_config(),
+            )
+            self.supervisor = supervisor
+            prewarm_cfg = get_prewarm_config()
+            if prewarm_cfg["enabled"]:
+                # 视频播放期间预热 OCR 与 LLM 连接，并在预计弹窗前加快探测
+                self.prewarm = PrewarmScheduler(supervisor, get_solution_service, prewarm_cfg)
+        supervisor.start()
     
-    # 恢复线程
+    # 恢复监听
     def resume_listeners(
         self
     ):
-        """恢复线程（清除暂停）。"""
-        # 清除随堂测试监听的暂停
-        pause_evt = getattr(self, "_in_class_test_pause_event", None)
-        if pause_evt:
-            pause_evt.clear()
-        # 清除视频监控的暂停，并重置完成事件
-        v_pause = getattr(self, "_video_pause_event", None)
-        v_finished = getattr(self, "_video_finished_event", None)
-        if v_finished:
-            v_finished.clear()
-        if v_pause:
-            v_pause.clear()
-        logger.debug("已恢复线程")
+        """恢复监听（清除暂停与视频完成标记）。"""
+        supervisor = getattr(self, "supervisor", None)
+        if supervisor:
+            supervisor.resume()
+        logger.debug("已恢复监听")
     
-    # 暂停线程
+    # 暂停监听
     def pause_listeners(
         self
     ):
-        """暂停线程。"""
-        p1 = getattr(self, "_in_class_test_pause_event", None)
-        if p1:
-            p1.set()
-        p2 = getattr(self, "_video_pause_event", None)
-        if p2:
-            p2.set()
-        logger.debug("已暂停线程")
+        """暂停监听。"""
+        supervisor = getattr(self, "supervisor", None)
+        if supervisor:
+            supervisor.pause()
+        logger.debug("已暂停监听")
     
-    # 释放线程
+    # 释放监听
     def release_listeners(
         self
     ):
-        """停止并释放线程资源。"""
-        # 停止视频监控
-        v_stop = getattr(self, "_video_stop_event", None)
-        v_th = getattr(self, "_video_thread", None)
-        try:
-            if v_stop:
-                v_stop.set()
-            if v_th and v_th.is_alive():
-                v_th.join(timeout=3)
-        except Exception:
-            pass
-        # 停止随堂测试监听
-        t_stop = getattr(self, "_in_class_test_stop_event", None)
-        t_th = getattr(self, "_in_class_test_thread", None)
-        try:
-            if t_stop:
-                t_stop.set()
-            if t_th and t_th.is_alive():
-                t_th.join(timeout=3)
-        except Exception:
-            pass
-        logger.debug("已释放线程资源")
-
-    # TODO: 处理单个课程
-    def _handle_course(
+        """停止调度器并释放资源。"""
+        prewarm = getattr(self, "prewarm", None)
+        if prewarm:
+            prewarm.stop()
+        supervisor = getattr(self, "supervisor", None)
+        if supervisor:
+            supervisor.stop()
+            supervisor.log_stall_report()
+        logger.debug("已释放监听资源")
+
+    # 进入课程并读取视频总时长
+    def _open_lesson(
         self, 
         course_element: WebElement
-    ):
+    ) -> Optional[str]:
         # 点击进入课程页面
+        load_start = time()
         course_element.click()
         logger.debug(f"点击进入课程：{course_element}")
+        self.checkpointer.request()
         sleep(1)
 
-        # 等待播放器时间区域加载，并在课程上下文中读取总时长文本，供监控线程使用
+        # 等待播放器时间区域加载，并在课程上下文中读取总时长文本，供进度检查使用
         driver = self.driver
+        dur_txt = None
         try:
             WebDriverWait(driver, 15, poll_frequency=0.5).until(
                 EC.presence_of_element_located((By.CSS_SELECTOR, "div.nPlayTime"))
             )
-            info = driver.execute_script(
-                """
-                var el = document.querySelector("div.nPlayTime[class='nPlayTime 33322']")
-                         || document.querySelector("div.nPlayTime");
-                var dur = el ? el.querySelector("span.duration") : null;
-                return { dur: dur ? dur.textContent.trim() : null };
-                """
-            )
+            info = page_call(driver, "times")
             dur_txt = (info or {}).get("dur")
-            setattr(self, "_video_total_text", dur_txt)
+            logger.info(f"页面计时[lesson] 点击到播放器就绪耗时 {(time() - load_start) * 1000:.0f}ms")
             if dur_txt:
                 logger.debug(f"读取到视频总时长文本：{dur_txt}")
             else:
-                logger.debug("未读取到视频总时长文本，监控线程将继续尝试获取")
+                logger.debug("未读取到视频总时长文本，进度检查将继续尝试获取")
         except TimeoutException:
-            setattr(self, "_video_total_text", None)
             logger.warning("等待播放器时间区域加载超时，可能导致总时长不可读")
 
         # 课程开始前：确保 controlsBar 可见
@@ -757,58 +763,230 @@ class WebEdgeService:
                 sleep(1)
         except Exception:
             pass
+        return dur_txt
 
-        # 启动当次课程的监听（取消暂停），并清除视频完成标记
-        self.resume_listeners()
+    # 目录元素对应的课程名称（目录扫描时记录）
+    def lesson_name(
+        self,
+        course_element: WebElement
+    ) -> str:
+        return self._lesson_names.get(getattr(course_element, "id", None), "")
+
+    # 处理单个课程
+    @metrics.timed("lesson")
+    def _handle_course(
+        self, 
+        course_element: WebElement
+    ):
+        supervisor = self.supervisor
+        lesson_name = self.lesson_name(course_element)
+        tracer.set_scope(lesson_name or str(getattr(course_element, "id", "lesson")))
+        # 进入课程（经调度器执行，与探测命令串行）
+        supervisor.pause()
+        dur_txt = supervisor.call(self._open_lesson, course_element)
+
+        # 开始跟踪当次课程进度（恢复探测），并清除视频完成标记
+        supervisor.begin_lesson(dur_txt, lesson_name)
+        prewarm = getattr(self, "prewarm", None)
+        if prewarm:
+            prewarm.begin_lesson()
         sleep(1)
         
-        # 设置播放速度 1.5x 并确保播放
-        self._set_15x_play()
-        sleep(1)
+        # 设置播放速度 1.5x 并确保播放；若随堂测试在先，等待调度器答题后重试
+        for _ in range(10):
+            try:
+                if supervisor.call(self._set_15x_play):
+                    break
+            except TimeoutError as e:
+                # 命令线程被耗时的答题占用（如 LLM 响应缓慢），等答题结束后重试
+                logger.warning(f"设置倍速等待超时：{e}")
+            sleep(1)
+            while supervisor.quiz_active.is_set():
+                sleep(0.5)
 
-        # 主循环：等待播放完成或处理随堂测试
+        # 等待播放完成（随堂测试由调度器处理，答题期间不计入最大等待时间）
         try:
-            while True:
-                # 播放结束：置位 finished
-                finished_evt = getattr(self, "_video_finished_event", None)
-                if finished_evt and finished_evt.is_set():
-                    logger.info("当前视频播放完成")
-                    # 课程结束后暂停监听，控制权交还给外层循环
-                    self.pause_listeners()
-                    return
-                # 若随堂测试监听线程检测到测试窗口出现，则暂停视频结束监控线程
-                if getattr(self, "_in_class_test_detected", False):
-                    logger.info("检测到随堂测试窗口，暂停视频结束监控线程")
-                    v_pause = getattr(self, "_video_pause_event", None)
-                    if v_pause:
-                        v_pause.set()
-                    # 等待随堂测试结束
-                    while getattr(self, "_in_class_test_detected", False):
-                        sleep(0.5)
-                    logger.info("随堂测试结束，恢复视频结束监控线程")
-                    if v_pause:
-                        v_pause.clear()
-                sleep(0.5)
+            while not supervisor.finished.wait(timeout=1):
+                # 会话失效时不再等待，交由主流程重建
+                self.session_supervisor.check()
+            logger.info("当前视频播放完成")
         finally:
-            # 兜底：课程退出时确保监听被暂停（资源释放在全局 release_listeners 中处理）
+            # 课程退出时确保监听被暂停（资源释放在全局 release_listeners 中处理）
+            if prewarm:
+                prewarm.end_lesson()
             self.pause_listeners()
+            if tracer.enabled:
+                tracer.log_report(tracer.scope)
+            memory_guard.checkpoint("lesson", lesson_name)
 
 
-    # TODO: 完成测试功能
-    # - 测试界面URL：https://onlineexamh5new.zhihuishu.com/
-    # - 当完成率为100时说明以及答完所有题目，提交答案
-    def _handle_test(self, test_element: WebElement):
-        pass
+    # 点击章节测试的“去完成”
+    def _open_test(
+        self,
+        test_element: WebElement
+    ):
+        driver = self.driver
+        target = driver.execute_script(
+            "return arguments[0].querySelector('span.float-right') || arguments[0];", test_element
+        )
+        try:
+            target.click()
+        except Exception:
+            driver.execute_script("arguments[0].click();", target)
+        logger.debug("已点击章节测试入口")
+
+    # 等待进入测试页面：新标签页打开时切换过去，返回是否为新标签页；超时返回 None
+    def _switch_to_exam(
+        self,
+        call,
+        handles_before: set,
+        url_hint: str,
+        wait_seconds: float
+    ) -> Optional[bool]:
+        driver = self.driver
+        deadline = time() + wait_seconds
+        while time() < deadline:
+            new = [h for h in call(lambda: driver.window_handles) if h not in handles_before]
+            if new:
+                call(driver.switch_to.window, new[-1])
+                logger.debug("测试页面在新标签页打开，已切换")
+                return True
+            if url_hint in (call(lambda: driver.current_url) or ""):
+                return False
+            sleep(0.5)
+        return None
+
+    # 离开测试页面并回到课程页，刷新目录以更新测试状态
+    def _leave_exam(
+        self,
+        call,
+        origin: str,
+        course_url: str,
+        opened_new: Optional[bool]
+    ):
+        driver = self.driver
+        try:
+            if opened_new:
+                call(driver.close)
+                call(driver.switch_to.window, origin)
+                call(driver.refresh)
+            else:
+                call(driver.get, course_url)
+            sleep(2)
+            call(self._close_overlays)
+        except Exception as e:
+            logger.warning(f"返回课程页面失败：{e}")
+
+    # 处理单个章节测试：流水线提取题目与请求 LLM，完成率 100% 后提交
+    def _handle_test(
+        self,
+        test_element: WebElement
+    ) -> Dict:
+        exam_cfg = get_exam_config()
+        driver = self.driver
+        supervisor = getattr(self, "supervisor", None)
+        call = supervisor.call if supervisor else (lambda fn, *args: fn(*args))
+        if supervisor:
+            supervisor.pause()
+        tracer.set_scope("chapter_test")
+
+        origin = call(lambda: driver.current_window_handle)
+        course_url = call(lambda: driver.current_url)
+        handles_before = set(call(lambda: driver.window_handles))
+        result: Dict = {"submitted": False}
+        opened_new: Optional[bool] = None
+        try:
+            call(self._open_test, test_element)
+            opened_new = self._switch_to_exam(call, handles_before, exam_cfg["url_hint"], exam_cfg["wait_seconds"])
+            if opened_new is None:
+                logger.error(f"未在{exam_cfg['wait_seconds']:.0f}秒内进入章节测试页面")
+                return result
+            self.checkpointer.request()
+            service = ChapterTestService(driver, get_solution_service().llm, call, exam_cfg)
+            result = service.run()
+        except Exception as e:
+            logger.error(f"章节测试处理异常：{e}")
+        finally:
+            if opened_new is not None:
+                self._leave_exam(call, origin, course_url, opened_new)
+            if tracer.enabled:
+                tracer.log_report(tracer.scope)
+        return result
     
     
+    # 判断异常是否由浏览器或会话失效引起
+    def session_lost(
+        self,
+        error: Optional[BaseException] = None
+    ) -> bool:
+        guard = self.session_supervisor
+        if guard.lost.is_set():
+            return True
+        if isinstance(error, SessionLost) or is_dead_session_error(error) or not guard.alive():
+            guard.mark_lost(str(error) if error else "存活检查失败")
+            return True
+        return False
+
+    # 会话失效后重建驱动、恢复 Cookie 并回到课程页面
+    def recover_session(
+        self
+    ) -> bool:
+        """
+        停止调度器、丢弃旧驱动，经 WebDriverConfigurator 重建驱动（注入检查点保存的 Cookie），
+        打开课程页并等待目录加载；连续失败 max_restarts 次后放弃（成功恢复后重新计数）。之后由主流程重新扫描目录，从当前课程继续。
+        """
+        guard = self.session_supervisor
+        if not self.session_cfg["restart_enabled"]:
+            logger.error("会话已失效，未开启自动重建（session.restart_enabled）")
+            return False
+        supervisor = getattr(self, "supervisor", None)
+        while guard.can_restart():
+            guard.attempts += 1
+            logger.warning(
+                f"开始重建浏览器会话（第 {guard.attempts} 次，连续失败 {guard.consecutive_failures}/{guard.max_restarts} 次）"
+            )
+            if supervisor:
+                supervisor.stop()
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+            # 启动时 Cookie 文件可能为空，运行中检查点已写入最新登录态
+            if Path(self.cookies_file).exists():
+                self.configurator.cookies_file = self.cookies_file
+            try:
+                self.driver = self.configurator.build()
+                guard.attach(self.driver)
+                # 新驱动就绪后先启动调度器（暂停中），回到课程页的命令同样经命令线程执行
+                if supervisor:
+                    supervisor.start()
+                    supervisor.pause()
+                recover_wait = self.session_cfg["recovery_wait_seconds"]
+                self._call(self.driver.get, self._course_url or get_site_config()["base_url"])
+                WebDriverWait(self.driver, recover_wait, poll_frequency=1).until(
+                    self._until(EC.presence_of_element_located((By.CSS_SELECTOR, "div.el-scrollbar.catalogue")))
+                )
+                self._call(self._close_overlays)
+            except Exception as e:
+                logger.error(f"重建会话后未能回到课程页面：{e}")
+                guard.restart_failed()
+                sleep(2)
+                continue
+            self.checkpointer.request()
+            guard.recovered()
+            return True
+        logger.error(f"会话重建已连续失败 {guard.max_restarts} 次，停止运行")
+        return False
+
     # FIXME: 关闭浏览器并保存 Cookie,释放线程
     def shutdown(self):
-        """结束服务，先保存 Cookie，再释放线程，最后关闭浏览器。"""
+        """结束服务，先保存 Cookie，再释放线程，最后关闭浏览器（附加模式下保留用户的浏览器）。"""
         if self._shutdown_done:
             return
         self._shutdown_done = True
         try:
             logger.info("触发服务关闭：准备先保存 Cookie")
+            self.checkpointer.stop()
             self._save_cookies(self.cookies_file)
         except Exception as e:
             logger.warning(f"服务关闭保存 Cookie 失败：{e}")
@@ -819,7 +997,24 @@ class WebEdgeService:
             except Exception:
                 pass
             try:
-                self.driver.quit()
-                logger.info("浏览器已关闭，退出程序。")
+                if self.configurator.mode == "attach":
+                    # 附加模式：浏览器由用户启动，只结束驱动进程并丢弃引用，浏览器保持运行
+                    service = getattr(self.driver, "service", None)
+                    if service is not None:
+                        service.stop()
+                    self.driver = None
+                    logger.info("已断开附加的浏览器（浏览器保持运行），退出程序。")
+                else:
+                    self.driver.quit()
+                    logger.info("浏览器已关闭，退出程序。")
             except Exception:
-                pass
\ No newline at end of file
+                pass
+            try:
+                self.session_supervisor.log_report()
+                metrics.export()
+                tracer.export()
+                memory_guard.export()
+                artifacts.close()
+                recorder.close()
+            except Exception as e:
+                logger.warning(f"导出阶段耗时统计失败：{e}")
\ No newline at end of file
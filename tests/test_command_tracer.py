@@ -0,0 +1,41 @@
+import pytest
+
+pytest.importorskip("loguru")
+
+from tools.CommandTracer import CommandTracer
+from tools.DriverHooks import add_command_listener
+from tools.PageHelpers import page_call
+
+# 模拟 selenium 的驱动：编译到项目外的文件名下，与 site-packages 中的 selenium 一样不会被当作调用方
+_FAKE_DRIVER = '''
+class FakeDriver:
+    def __init__(self):
+        self.commands = []
+
+    def execute(self, command, params=None):
+        self.commands.append(command)
+        return {"value": {"quiz": False, "cur": "00:10", "dur": "10:00"}}
+
+    def execute_script(self, script, *args):
+        return self.execute("w3cExecuteScript", {"script": script, "args": list(args)})["value"]
+'''
+_namespace = {}
+exec(compile(_FAKE_DRIVER, "<selenium-webdriver>", "exec"), _namespace)
+FakeDriver = _namespace["FakeDriver"]
+
+
+def probe_page(driver):
+    return page_call(driver, "state")
+
+
+def test_helper_call_is_attributed_to_real_caller():
+    driver = FakeDriver()
+    tracer = CommandTracer()
+    add_command_listener(driver, tracer.listener)
+
+    assert probe_page(driver)["dur"] == "10:00"
+
+    rows = tracer.report()
+    assert len(rows) == 1
+    assert rows[0]["command"] == "w3cExecuteScript"
+    assert rows[0]["caller"].startswith("test_command_tracer.probe_page:")
@@ -0,0 +1,51 @@
+import os
+import re
+import sys
+import subprocess
+import textwrap
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("loguru")
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# 与热键退出相同的路径：记录日志后经 Main.exit_process 调用 os._exit
+SCRIPT = textwrap.dedent("""
+    import sys
+    from loguru import logger
+    from config.JsonLoadConfig import get_logging_config
+    from config.LoggerConfig import LoggerConfigurator
+    import Main
+
+    log_dir = sys.argv[1]
+    log_config = LoggerConfigurator(cfg={**get_logging_config(), "dir": log_dir, "rate_limits": {}}, console=sys.stdout)
+    log_config.setup()
+    for i in range(2000):
+        logger.info(f"line {i}")
+    logger.info("last line")
+    Main.exit_process(log_config)
+""")
+
+
+def test_exit_process_drains_log_queue(tmp_path):
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(ROOT), os.environ.get("PYTHONPATH")]))}
+    proc = subprocess.run(
+        [sys.executable, "-c", SCRIPT, str(tmp_path)],
+        cwd=str(ROOT), env=env, capture_output=True, text=True, encoding="utf-8", timeout=60,
+    )
+    assert proc.returncode == 0, proc.stderr
+
+    console = re.sub(r"\x1b\[[0-9;]*m", "", proc.stdout).splitlines()
+    assert sum(" | line " in line for line in console) == 2000
+    assert console[-1].endswith("last line")
+
+    text_logs = list(tmp_path.glob("*.log"))
+    assert len(text_logs) == 1
+    lines = text_logs[0].read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 2001
+    assert lines[-1].endswith("last line")
+
+    json_lines = (tmp_path / "azs.jsonl").read_text(encoding="utf-8").splitlines()
+    assert len(json_lines) == 2001
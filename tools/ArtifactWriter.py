@@ -0,0 +1,176 @@
+import json
+import random
+import datetime as dt
+from io import BytesIO
+from pathlib import Path
+from queue import Queue, Full
+from threading import Thread, Lock
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+from config.JsonLoadConfig import get_artifacts_config
+from service.SessionCheckpointer import write_text_atomic
+
+INDEX_NAME = "answers.json"
+
+
+class ArtifactWriter:
+    """
+    随堂测试调试样本的后台写入（默认关闭）：
+    - 答题线程只做采样判断与入队，队列满时直接丢弃，不为调试数据增加答题延迟；
+    - 后台线程把截图编码为紧凑格式（默认无损 WebP）写入 dir，并在 answers.json 中记录 OCR 文本、选项与 LLM 答案，
+      目录结构与离线基准测试的样本目录一致，可直接作为 --fixtures 使用；
+    - 目录总大小超过 max_mb 时删除最早的样本。
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.dir = Path("./artifacts")
+        self.sample_rate = 1.0
+        self.max_bytes = 200 * 2 ** 20
+        self.image_format = "webp"
+        self.dropped = 0
+        self.written = 0
+        self._queue: Queue = Queue(maxsize=32)
+        self._thread: Optional[Thread] = None
+        self._index: Dict[str, Dict[str, Any]] = {}
+        self._sizes: Dict[str, int] = {}
+        self._seq = 0
+        self._lock = Lock()
+
+    def configure(
+        self,
+        enabled: bool,
+        out_dir: str = "./artifacts",
+        sample_rate: float = 1.0,
+        max_mb: float = 200,
+        image_format: str = "webp",
+        queue_size: int = 32,
+    ):
+        self.enabled = enabled
+        self.dir = Path(out_dir)
+        self.sample_rate = sample_rate
+        self.max_bytes = int(max_mb * 2 ** 20)
+        self.image_format = image_format
+        self._queue = Queue(maxsize=max(1, queue_size))
+        if enabled:
+            self._load_index()
+            self._thread = Thread(target=self._run, name="ArtifactWriter", daemon=True)
+            self._thread.start()
+            logger.info(f"调试样本写入已开启：{self.dir}，采样率 {sample_rate}，上限 {max_mb}MB")
+
+    def sample(self) -> bool:
+        """是否采集本题（在截图用完前判断，未采中的截图可立即释放）。"""
+        return self.enabled and random.random() < self.sample_rate
+
+    def submit(self, img, text: str = "", answer: Optional[List[str]] = None, options: Optional[List[str]] = None, **meta):
+        """入队一个样本；队列满时丢弃。img 的所有权交给写入线程。"""
+        try:
+            self._queue.put_nowait((img, text, list(answer or []), options, meta))
+        except Full:
+            self.dropped += 1
+            try:
+                img.close()
+            except Exception:
+                pass
+
+    # ---------- 写入线程 ----------
+
+    def _load_index(self):
+        path = self.dir / INDEX_NAME
+        try:
+            self._index = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+        except Exception as e:
+            logger.warning(f"读取样本索引失败，将重新生成：{e}")
+            self._index = {}
+        self._sizes = {}
+        for name in list(self._index):
+            f = self.dir / name
+            if f.exists():
+                self._sizes[name] = f.stat().st_size
+            else:
+                self._index.pop(name)
+
+    def _encode(self, img) -> Tuple[bytes, str]:
+        buf = BytesIO()
+        if self.image_format == "webp":
+            try:
+                img.save(buf, format="WEBP", lossless=True, method=4)
+                return buf.getvalue(), "webp"
+            except Exception:
+                # 部分 Pillow 构建不含 WebP 编码器
+                buf = BytesIO()
+        img.save(buf, format="PNG", optimize=True)
+        return buf.getvalue(), "png"
+
+    def _evict(self, incoming: int):
+        """按写入顺序删除最早的样本，直到能容纳新样本。"""
+        total = sum(self._sizes.values())
+        for name in list(self._index):
+            if total + incoming <= self.max_bytes:
+                break
+            try:
+                (self.dir / name).unlink()
+            except OSError:
+                pass
+            total -= self._sizes.pop(name, 0)
+            self._index.pop(name, None)
+
+    def _write(self, item):
+        img, text, answer, options, meta = item
+        try:
+            data, ext = self._encode(img)
+        finally:
+            img.close()
+        if len(data) > self.max_bytes:
+            return
+        self._evict(len(data))
+        self._seq += 1
+        name = f"q-{dt.datetime.now().strftime('%Y%m%d-%H%M%S')}-{self._seq:04d}.{ext}"
+        self.dir.mkdir(parents=True, exist_ok=True)
+        (self.dir / name).write_bytes(data)
+        self._sizes[name] = len(data)
+        # answer 为 LLM 的答案，ocr_text 为本次 OCR 结果；作为基准测试样本前应人工核对，并补充 text（题目原文）
+        entry = {"answer": answer, "ocr_text": text, "source": "llm"}
+        if options:
+            entry["options"] = options
+        entry.update({k: v for k, v in meta.items() if v is not None})
+        self._index[name] = entry
+        write_text_atomic(str(self.dir / INDEX_NAME), json.dumps(self._index, ensure_ascii=False, indent=2))
+        self.written += 1
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            try:
+                with self._lock:
+                    self._write(item)
+            except Exception as e:
+                logger.warning(f"写入调试样本失败：{e}")
+            finally:
+                self._queue.task_done()
+
+    def close(self, timeout: float = 5.0):
+        """写完队列中剩余的样本后停止写入线程。"""
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except Full:
+            pass
+        self._thread.join(timeout)
+        self._thread = None
+        logger.info(f"调试样本：写入 {self.written} 个，丢弃 {self.dropped} 个")
+
+
+# 全局样本写入实例
+artifacts = ArtifactWriter()
+
+
+def configure_artifacts():
+    """按 config.json 的 artifacts 段配置全局样本写入实例。"""
+    a = get_artifacts_config()
+    artifacts.configure(a["enabled"], a["dir"], a["sample_rate"], a["max_mb"], a["format"], a["queue_size"])
+    return artifacts
@@ -0,0 +1,150 @@
+import sys
+import json
+import hashlib
+import datetime as dt
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+from config.JsonLoadConfig import get_project_root, get_tracer_config
+
+# 执行脚本类命令，按脚本内容计算指纹
+_SCRIPT_COMMANDS = ("w3cExecuteScript", "w3cExecuteScriptAsync", "executeScript", "executeAsyncScript")
+# 元素查找类命令，按定位方式与表达式区分
+_FIND_COMMANDS = ("findElement", "findElements", "findChildElement", "findChildElements")
+# 查找调用方时跳过的文件（钩子、追踪器自身与页面辅助脚本的调用包装）
+_SKIP_FILES = ("DriverHooks.py", "CommandTracer.py", "Metrics.py", "PageHelpers.py")
+
+
+def script_fingerprint(command: str, params: Any) -> str:
+    """命令指纹：脚本取内容哈希与摘要，查找取定位表达式，其余为空。"""
+    if not isinstance(params, dict):
+        return ""
+    if command in _SCRIPT_COMMANDS:
+        script = str(params.get("script") or "")
+        digest = hashlib.sha1(script.encode("utf-8")).hexdigest()[:8]
+        preview = " ".join(script.split())[:60]
+        return f"{digest} {preview}"
+    if command in _FIND_COMMANDS:
+        return f"{params.get('using')}={params.get('value')}"
+    return ""
+
+
+class CommandTracer:
+    """
+    WebDriver 命令追踪：记录每条命令的名称、脚本指纹、耗时与项目内的调用函数，
+    按课程（scope）聚合，输出最耗时的调用排行，用于定位值得优化的往返。
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.top_n = 15
+        self.out_dir = Path("./logs")
+        self.scope = "startup"
+        self._root = str(get_project_root())
+        # (scope, command, fingerprint, caller) -> [次数, 总耗时, 最大耗时, 失败次数]
+        self._stats: Dict[Tuple[str, str, str, str], List[float]] = {}
+        self._lock = Lock()
+
+    def configure(self, enabled: bool, top_n: int = 15, out_dir: str = "./logs"):
+        self.enabled = enabled
+        self.top_n = top_n
+        self.out_dir = Path(out_dir)
+
+    def set_scope(self, scope: str):
+        """切换聚合范围（通常为当前课程名）。"""
+        self.scope = scope or "unknown"
+
+    def _caller(self) -> str:
+        """向上查找第一个位于项目内、且不是钩子本身的调用帧。"""
+        frame = sys._getframe(3)
+        while frame is not None:
+            filename = frame.f_code.co_filename
+            if (
+                filename.startswith(self._root)
+                and "site-packages" not in filename
+                and not filename.endswith(_SKIP_FILES)
+            ):
+                return f"{Path(filename).stem}.{frame.f_code.co_name}:{frame.f_lineno}"
+            frame = frame.f_back
+        return "<external>"
+
+    def listener(self, command: str, params: Any, elapsed: float, error: Optional[BaseException]):
+        key = (self.scope, command, script_fingerprint(command, params), self._caller())
+        with self._lock:
+            st = self._stats.get(key)
+            if st is None:
+                st = self._stats[key] = [0, 0.0, 0.0, 0]
+            st[0] += 1
+            st[1] += elapsed
+            st[2] = max(st[2], elapsed)
+            if error is not None:
+                st[3] += 1
+
+    def report(self, scope: Optional[str] = None) -> List[Dict[str, Any]]:
+        """按总耗时排序的热点调用；scope 为空时汇总所有范围。"""
+        merged: Dict[Tuple[str, str, str], List[float]] = {}
+        with self._lock:
+            for (sc, command, fp, caller), st in self._stats.items():
+                if scope is not None and sc != scope:
+                    continue
+                key = (command, fp, caller)
+                m = merged.setdefault(key, [0, 0.0, 0.0, 0])
+                m[0] += st[0]
+                m[1] += st[1]
+                m[2] = max(m[2], st[2])
+                m[3] += st[3]
+        rows = [
+            {
+                "command": command,
+                "fingerprint": fp,
+                "caller": caller,
+                "count": int(m[0]),
+                "total_ms": round(m[1] * 1000, 1),
+                "avg_ms": round(m[1] * 1000 / m[0], 2) if m[0] else 0,
+                "max_ms": round(m[2] * 1000, 1),
+                "errors": int(m[3]),
+            }
+            for (command, fp, caller), m in merged.items()
+        ]
+        rows.sort(key=lambda r: r["total_ms"], reverse=True)
+        return rows
+
+    def log_report(self, scope: Optional[str] = None):
+        rows = self.report(scope)
+        if not rows:
+            return
+        total = sum(r["count"] for r in rows)
+        logger.info(f"命令追踪[{scope or '全部'}]：共 {total} 条命令，耗时最高的 {min(self.top_n, len(rows))} 项：")
+        for r in rows[: self.top_n]:
+            logger.info(
+                f"  {r['total_ms']:>9.1f}ms x{r['count']:<5} avg={r['avg_ms']:.1f}ms "
+                f"{r['command']} @ {r['caller']} {r['fingerprint']}"
+            )
+
+    def scopes(self) -> List[str]:
+        with self._lock:
+            return sorted({k[0] for k in self._stats})
+
+    def export(self) -> Optional[str]:
+        """导出所有范围的排行到 JSON 文件。"""
+        if not self.enabled or not self._stats:
+            return None
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        path = self.out_dir / f"trace-{dt.datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+        data = {"total": self.report(), "scopes": {sc: self.report(sc) for sc in self.scopes()}}
+        path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        logger.info(f"命令追踪报告已导出：{path}")
+        return str(path)
+
+
+# 全局追踪实例
+tracer = CommandTracer()
+
+
+def configure_tracer():
+    """按 config.json 的 tracer 段配置全局追踪实例。"""
+    t = get_tracer_config()
+    tracer.configure(t["enabled"], t["top_n"], t["dir"])
+    return tracer
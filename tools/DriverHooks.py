@@ -0,0 +1,40 @@
+from time import perf_counter
+from typing import Any, Callable, Optional
+
+from loguru import logger
+
+# 命令监听器签名：(命令名, 参数, 耗时秒, 异常或 None)
+CommandListener = Callable[[str, Any, float, Optional[BaseException]], None]
+
+
+def add_command_listener(driver, listener: CommandListener):
+    """
+    为驱动的每条 WebDriver 命令注册监听器。
+
+    通过在实例上覆盖 execute 实现：WebElement 的操作同样经由 driver.execute 发出，
+    因此元素查找、点击、截图等都会被统计。同一驱动只包装一次，多个监听器共享。
+    """
+    listeners = getattr(driver, "_azs_command_listeners", None)
+    if listeners is None:
+        listeners = []
+        original = driver.execute
+
+        def execute(driver_command, params=None):
+            start = perf_counter()
+            error = None
+            try:
+                return original(driver_command, params)
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                elapsed = perf_counter() - start
+                for fn in listeners:
+                    try:
+                        fn(driver_command, params, elapsed, error)
+                    except Exception as e:
+                        logger.debug(f"命令监听器异常：{e}")
+
+        driver.execute = execute
+        driver._azs_command_listeners = listeners
+    listeners.append(listener)
@@ -0,0 +1,42 @@
+import importlib
+from threading import Lock
+from types import ModuleType
+
+
+class LazyModule(ModuleType):
+    """
+    延迟导入的模块代理：首次访问属性时才真正导入目标模块。
+    用于 numpy、cnocr、openai 等重量级依赖，避免程序启动时就付出导入开销。
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_name"] = name
+        self.__dict__["_lazy_module"] = None
+        self.__dict__["_lazy_lock"] = Lock()
+
+    def _load(self) -> ModuleType:
+        mod = self.__dict__["_lazy_module"]
+        if mod is None:
+            # 监听线程与主线程可能同时首次访问，加锁避免重复导入
+            with self.__dict__["_lazy_lock"]:
+                mod = self.__dict__["_lazy_module"]
+                if mod is None:
+                    mod = importlib.import_module(self.__dict__["_lazy_name"])
+                    self.__dict__["_lazy_module"] = mod
+        return mod
+
+    def __getattr__(self, item):
+        return getattr(self._load(), item)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.__dict__["_lazy_module"] is not None
+
+
+def lazy_import(name: str) -> LazyModule:
+    """返回一个延迟导入的模块代理。"""
+    return LazyModule(name)
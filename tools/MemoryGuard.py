@@ -0,0 +1,158 @@
+import gc
+import json
+import threading
+import tracemalloc
+import datetime as dt
+from pathlib import Path
+from threading import Lock
+from time import time
+from typing import Any, Callable, Dict, List, Optional
+
+from loguru import logger
+from config.JsonLoadConfig import get_memory_config
+from tools.ProcessStats import memory_mb
+
+
+class MemoryGuard:
+    """
+    长时间运行的内存观测与保护（默认关闭）：
+    - 每节课程、每次随堂测试后记录常驻内存、tracemalloc 分配量与线程数；
+    - 与上一次检查点比较 tracemalloc 快照，输出增长最多的分配位置；
+    - 常驻内存相对基线的增长超过 budget_mb 时告警，并执行已注册的回收动作（如重建 OCR 引擎）。
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.budget_mb = 300.0
+        self.recycle = True
+        self.top_n = 10
+        self.frames = 1
+        self.out_dir = Path("./logs")
+        self._baseline: Optional[float] = None
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._rows: List[Dict[str, Any]] = []
+        self._recyclers: Dict[str, Callable[[], Any]] = {}
+        self._lock = Lock()
+
+    def configure(
+        self,
+        enabled: bool,
+        budget_mb: float = 300.0,
+        recycle: bool = True,
+        top_n: int = 10,
+        frames: int = 1,
+        out_dir: str = "./logs",
+    ):
+        self.enabled = enabled
+        self.budget_mb = budget_mb
+        self.recycle = recycle
+        self.top_n = top_n
+        self.frames = frames
+        self.out_dir = Path(out_dir)
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            logger.info(f"内存观测已开启：预算 {budget_mb:.0f}MB，tracemalloc 栈深 {frames}")
+
+    def register_recycler(self, name: str, fn: Callable[[], Any]):
+        """注册超出预算时执行的回收动作。"""
+        self._recyclers[name] = fn
+
+    def _top_growth(self, snapshot: tracemalloc.Snapshot) -> List[Dict[str, Any]]:
+        if self._snapshot is None:
+            return []
+        stats = snapshot.compare_to(self._snapshot, "lineno")
+        rows = []
+        for st in stats[: self.top_n]:
+            if st.size_diff <= 0:
+                break
+            frame = st.traceback[0]
+            rows.append({
+                "where": f"{frame.filename}:{frame.lineno}",
+                "diff_kb": round(st.size_diff / 1024, 1),
+                "size_kb": round(st.size / 1024, 1),
+                "count_diff": st.count_diff,
+            })
+        return rows
+
+    def checkpoint(self, kind: str, label: str = "") -> Optional[Dict[str, Any]]:
+        """记录一个检查点（kind 为 lesson / quiz 等）；未启用时直接返回。"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            rss, peak = memory_mb()
+            traced, traced_peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+            snapshot = None
+            if tracemalloc.is_tracing():
+                # 排除 tracemalloc 自身的分配
+                snapshot = tracemalloc.take_snapshot().filter_traces((
+                    tracemalloc.Filter(False, tracemalloc.__file__),
+                ))
+            top = self._top_growth(snapshot) if snapshot is not None else []
+            if snapshot is not None:
+                self._snapshot = snapshot
+            if self._baseline is None and rss is not None:
+                self._baseline = rss
+            growth = rss - self._baseline if rss is not None and self._baseline is not None else None
+            row = {
+                "ts": round(time(), 3),
+                "kind": kind,
+                "label": label,
+                "rss_mb": round(rss, 1) if rss is not None else None,
+                "peak_rss_mb": round(peak, 1) if peak is not None else None,
+                "growth_mb": round(growth, 1) if growth is not None else None,
+                "traced_mb": round(traced / 2 ** 20, 1),
+                "traced_peak_mb": round(traced_peak / 2 ** 20, 1),
+                "threads": threading.active_count(),
+                "gc_objects": len(gc.get_objects()),
+                "top": top,
+            }
+            self._rows.append(row)
+
+        logger.info(
+            f"内存检查点[{kind} {label}]：常驻 {row['rss_mb']}MB（较基线 +{row['growth_mb']}MB），"
+            f"Python 分配 {row['traced_mb']}MB，线程 {row['threads']}"
+        )
+        for t in top[:5]:
+            logger.debug(f"  +{t['diff_kb']}KB x{t['count_diff']} {t['where']}")
+        if growth is not None and growth > self.budget_mb:
+            self._over_budget(growth)
+        return row
+
+    def _over_budget(self, growth: float):
+        logger.warning(f"常驻内存较基线增长 {growth:.0f}MB，超过预算 {self.budget_mb:.0f}MB")
+        if not self.recycle:
+            return
+        for name, fn in self._recyclers.items():
+            try:
+                fn()
+                logger.warning(f"已执行内存回收：{name}")
+            except Exception as e:
+                logger.warning(f"内存回收 {name} 失败：{e}")
+        gc.collect()
+        rss, _ = memory_mb()
+        if rss is not None:
+            logger.info(f"回收后常驻内存 {rss:.1f}MB，以此作为新的基线")
+            self._baseline = rss
+
+    def export(self) -> Optional[str]:
+        """导出全部检查点到 JSONL 文件。"""
+        if not self.enabled or not self._rows:
+            return None
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        path = self.out_dir / f"memory-{dt.datetime.now().strftime('%Y%m%d-%H%M%S')}.jsonl"
+        with path.open("w", encoding="utf-8") as f:
+            for row in self._rows:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        logger.info(f"内存检查点已导出：{path}")
+        return str(path)
+
+
+# 全局内存观测实例
+memory_guard = MemoryGuard()
+
+
+def configure_memory_guard():
+    """按 config.json 的 memory 段配置全局内存观测实例。"""
+    m = get_memory_config()
+    memory_guard.configure(m["enabled"], m["budget_mb"], m["recycle"], m["top_n"], m["tracemalloc_frames"], m["dir"])
+    return memory_guard
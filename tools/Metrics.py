@@ -0,0 +1,215 @@
+import json
+import math
+import random
+import datetime as dt
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+from threading import Lock
+from time import perf_counter, time
+from typing import Any, Deque, Dict, List, Optional, Sequence
+
+from loguru import logger
+from config.JsonLoadConfig import get_metrics_config
+
+# 直方图桶上界（秒），覆盖单条 WebDriver 命令到整节课程
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900, 1800, 3600,
+)
+
+
+def percentile(values: Sequence[float], q: float) -> Optional[float]:
+    """最近秩法百分位数，q 取 0~100。"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(values: Sequence[float]) -> Dict[str, Any]:
+    """计算样本的数量、均值与 p50/p95/p99（秒）。"""
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values),
+    }
+
+
+class Histogram:
+    """固定桶直方图，同时保留有限的样本用于计算精确百分位数。"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS, max_samples: int = 20000):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.samples: List[float] = []
+        self.max_samples = max_samples
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.sum += seconds
+        for i, le in enumerate(self.buckets):
+            if seconds <= le:
+                self.counts[i] += 1
+                break
+        # 样本超出上限后使用蓄水池抽样，内存恒定
+        if len(self.samples) < self.max_samples:
+            self.samples.append(seconds)
+        else:
+            j = random.randrange(self.count)
+            if j < self.max_samples:
+                self.samples[j] = seconds
+
+    def summary(self) -> Dict[str, Any]:
+        out = summarize(self.samples)
+        out["count"] = self.count
+        out["sum"] = self.sum
+        return out
+
+
+class MetricsRegistry:
+    """
+    阶段耗时统计：span/timed 记录各阶段耗时，按阶段聚合为直方图，
+    运行结束时导出为 Prometheus 文本文件或 JSONL，无需任何外部服务。
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.out_dir = Path("./logs")
+        self.formats: List[str] = []
+        self._hists: Dict[str, Histogram] = {}
+        # 明细只保留最近 max_spans 条，长时间运行时内存不随运行时长增长；直方图不受影响
+        self._spans: Deque[Dict[str, Any]] = deque(maxlen=10000)
+        self.dropped_spans = 0
+        self._lock = Lock()
+
+    def configure(
+        self,
+        enabled: bool,
+        out_dir: str = "./logs",
+        formats: Optional[List[str]] = None,
+        max_spans: int = 10000,
+    ):
+        self.enabled = enabled
+        self.out_dir = Path(out_dir)
+        self.formats = list(formats or ["prometheus", "jsonl"])
+        with self._lock:
+            self._spans = deque(self._spans, maxlen=max(0, max_spans))
+
+    def observe(self, stage: str, seconds: float, record_span: bool = True, **labels):
+        """记录一次耗时；record_span=False 时只计入直方图，不保留明细（用于高频命令）。"""
+        if not self.enabled:
+            return
+        with self._lock:
+            hist = self._hists.get(stage)
+            if hist is None:
+                hist = self._hists[stage] = Histogram()
+            hist.observe(seconds)
+            if record_span:
+                span = {"ts": round(time(), 3), "stage": stage, "ms": round(seconds * 1000, 3)}
+                if labels:
+                    span.update(labels)
+                if len(self._spans) == self._spans.maxlen:
+                    self.dropped_spans += 1
+                self._spans.append(span)
+
+    @contextmanager
+    def span(self, stage: str, **labels):
+        """记录一段代码的耗时。"""
+        if not self.enabled:
+            yield
+            return
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, perf_counter() - start, **labels)
+
+    def timed(self, stage: str):
+        """装饰器：记录函数调用耗时；未启用时仅多一次属性判断。"""
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                start = perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.observe(stage, perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {stage: hist.summary() for stage, hist in sorted(self._hists.items())}
+
+    def to_prometheus(self) -> str:
+        lines = [
+            "# HELP azs_stage_seconds 各阶段耗时（秒）",
+            "# TYPE azs_stage_seconds histogram",
+        ]
+        with self._lock:
+            for stage, hist in sorted(self._hists.items()):
+                cumulative = 0
+                for le, c in zip(hist.buckets, hist.counts):
+                    cumulative += c
+                    lines.append(f'azs_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+                lines.append(f'azs_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {hist.count}')
+                lines.append(f'azs_stage_seconds_sum{{stage="{stage}"}} {hist.sum:.6f}')
+                lines.append(f'azs_stage_seconds_count{{stage="{stage}"}} {hist.count}')
+        return "\n".join(lines) + "\n"
+
+    def export(self) -> List[str]:
+        """导出到配置目录，返回写入的文件路径列表。"""
+        if not self.enabled or not self._hists:
+            return []
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        stamp = dt.datetime.now().strftime("%Y%m%d-%H%M%S")
+        written = []
+        if "prometheus" in self.formats:
+            path = self.out_dir / f"metrics-{stamp}.prom"
+            path.write_text(self.to_prometheus(), encoding="utf-8")
+            written.append(str(path))
+        if "jsonl" in self.formats:
+            path = self.out_dir / f"metrics-{stamp}.jsonl"
+            with self._lock:
+                spans = list(self._spans)
+            with path.open("w", encoding="utf-8") as f:
+                for span in spans:
+                    f.write(json.dumps({"type": "span", **span}, ensure_ascii=False) + "\n")
+                for stage, s in self.summary().items():
+                    f.write(json.dumps({"type": "summary", "stage": stage, **s}, ensure_ascii=False) + "\n")
+            written.append(str(path))
+            if self.dropped_spans:
+                logger.info(f"耗时明细仅保留最近 {len(spans)} 条，较早的 {self.dropped_spans} 条已丢弃（直方图包含全部记录）")
+        for stage, s in self.summary().items():
+            logger.info(
+                f"阶段耗时[{stage}] n={s['count']} p50={s['p50'] * 1000:.0f}ms "
+                f"p95={s['p95'] * 1000:.0f}ms p99={s['p99'] * 1000:.0f}ms"
+            )
+        logger.info(f"阶段耗时统计已导出：{written}")
+        return written
+
+    def command_listener(self, command: str, params: Any, elapsed: float, error: Optional[BaseException]):
+        """WebDriver 命令监听器：按命令名记录耗时。"""
+        self.observe(f"webdriver.{command}", elapsed, record_span=False)
+
+
+# 全局统计实例
+metrics = MetricsRegistry()
+
+
+def configure_metrics():
+    """按 config.json 的 metrics 段配置全局统计实例。"""
+    m = get_metrics_config()
+    metrics.configure(m["enabled"], m["dir"], m["formats"], m["max_spans"])
+    return metrics
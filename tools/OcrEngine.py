@@ -0,0 +1,101 @@
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Any, Dict, Optional
+
+from loguru import logger
+from config.JsonLoadConfig import get_ocr_profile
+from tools.LazyImport import lazy_import
+
+cnocr = lazy_import("cnocr")
+ort = lazy_import("onnxruntime")
+
+_GRAPH_LEVELS = {
+    "disable": "ORT_DISABLE_ALL",
+    "basic": "ORT_ENABLE_BASIC",
+    "extended": "ORT_ENABLE_EXTENDED",
+    "all": "ORT_ENABLE_ALL",
+}
+
+
+def build_session_options(opts: Dict[str, Any]):
+    """按档位生成 onnxruntime.SessionOptions，没有任何设置时返回 None（使用默认）。"""
+    if not opts or not any(opts.values()):
+        return None
+    so = ort.SessionOptions()
+    if opts.get("intra_op_threads"):
+        so.intra_op_num_threads = int(opts["intra_op_threads"])
+    if opts.get("inter_op_threads"):
+        so.inter_op_num_threads = int(opts["inter_op_threads"])
+    level = _GRAPH_LEVELS.get(opts.get("graph_optimization") or "")
+    if level:
+        so.graph_optimization_level = getattr(ort.GraphOptimizationLevel, level)
+    return so
+
+
+@contextmanager
+def session_options(opts: Dict[str, Any]):
+    """
+    CnOcr 不暴露 onnxruntime 的会话选项，创建引擎期间为未指定 sess_options 的
+    InferenceSession 注入档位中的线程数与图优化级别，退出后恢复。
+    """
+    so = build_session_options(opts)
+    if so is None:
+        yield
+        return
+    cls = ort.InferenceSession
+    original = cls.__init__
+
+    def init(self, path_or_bytes, sess_options=None, *args, **kwargs):
+        original(self, path_or_bytes, sess_options or so, *args, **kwargs)
+
+    cls.__init__ = init
+    try:
+        yield
+    finally:
+        cls.__init__ = original
+
+
+# 不使用检测模型（整图按单行识别），不在 cnstd 的模型列表中
+_NAIVE_DET = "naive_det"
+
+
+def check_profile(profile: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    返回档位中传给 CnOcr 的参数：识别/检测模型不在已安装 cnocr / cnstd 的模型列表中（按后端，默认 onnx）时
+    去掉该项并告警，改用默认模型。
+    """
+    kwargs = dict(profile.get("cnocr") or {})
+    checks = (
+        ("rec_model_name", "rec_model_backend", cnocr.REC_AVAILABLE_MODELS),
+        ("det_model_name", "det_model_backend", cnocr.DET_AVAILABLE_MODELS),
+    )
+    for key, backend_key, registry in checks:
+        name = kwargs.get(key)
+        if not name or name == _NAIVE_DET:
+            continue
+        backend = kwargs.get(backend_key) or "onnx"
+        if (name, backend) not in registry:
+            logger.warning(f"OCR 档位 {profile.get('name')} 的 {key}={name}（{backend}）不在已安装版本的模型列表中，改用默认模型")
+            kwargs.pop(key)
+            kwargs.pop(backend_key, None)
+    return kwargs
+
+
+def create_ocr(profile: Optional[Dict[str, Any]] = None):
+    """
+    按档位创建 CnOcr 引擎，缺省使用 config.json 中 ocr.profile 指定的档位。
+    档位中的模型无法加载时告警并改用默认模型，不让每次答题都因此失败。
+    """
+    profile = profile or get_ocr_profile()
+    kwargs = check_profile(profile)
+    start = perf_counter()
+    with session_options(profile.get("onnxruntime") or {}):
+        try:
+            engine = cnocr.CnOcr(**kwargs)
+        except Exception as e:
+            if not kwargs:
+                raise
+            logger.warning(f"按档位 {profile.get('name')} 创建 CnOcr 失败（{e}），改用默认模型")
+            engine = cnocr.CnOcr()
+    logger.info(f"CnOcr 初始化完成，档位 {profile.get('name')}，用时 {perf_counter() - start:.2f} 秒")
+    return engine
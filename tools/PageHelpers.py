@@ -0,0 +1,135 @@
+import re
+from typing import Any, Optional
+from loguru import logger
+
+# 页面辅助脚本版本：修改 HELPER_SCRIPT 时递增，旧版本的页面会被重新注入
+HELPER_VERSION = 1
+# 页面中没有（或版本不符的）辅助脚本时，调用包装返回该标记
+MISSING = "__azs_missing__"
+# 会点击页面元素的辅助函数（会话回放据此归纳决策）
+CLICK_HELPERS = ("answer", "closeQuiz")
+
+# 页面辅助脚本：每个文档注入一次，之后各处只发送 __azs.xxx() 这样的短调用，
+# 浏览器不必在每次探测时重新解析整段脚本
+HELPER_SCRIPT = """
+(function () {
+  var V = %d;
+  if (window.__azs && window.__azs.v === V) return;
+  var QUIZ = 'div.ai-test-question-wrapper';
+  var OPTIONS = '.ques .item.ques-card-box .options .option';
+  function text(el) { return (el.innerText || el.textContent || '').trim(); }
+  function playTime() {
+    var el = document.querySelector("div.nPlayTime[class='nPlayTime 33322']")
+             || document.querySelector('div.nPlayTime');
+    var cur = el ? el.querySelector('span.currentTime') : null;
+    var dur = el ? el.querySelector('span.duration') : null;
+    return { cur: cur ? cur.textContent.trim() : null, dur: dur ? dur.textContent.trim() : null };
+  }
+  function closeBox() {
+    var root = document.querySelector(QUIZ);
+    if (!root) return null;
+    return root.querySelector('.header-box .close-box')
+        || root.querySelector('.header-box [class*="close"]')
+        || root.querySelector('.header-box .right-box .close-box')
+        || root.querySelector('.header-box .close');
+  }
+  function fire(el) {
+    try { el.scrollIntoView({block: 'center', inline: 'center'}); } catch (e) {}
+    try { el.click(); } catch (e) {}
+    try {
+      var rect = el.getBoundingClientRect();
+      var opts = {view: window, bubbles: true, cancelable: true,
+                  clientX: rect.left + rect.width / 2, clientY: rect.top + rect.height / 2};
+      ['pointerdown', 'mousedown', 'mouseup', 'click'].forEach(function (t) {
+        try { el.dispatchEvent(new MouseEvent(t, opts)); } catch (e) {}
+      });
+    } catch (e) {}
+  }
+  window.__azs = {
+    v: V,
+    // 播放时间文本 {cur, dur}
+    times: playTime,
+    // 调度器探测：随堂测试窗口是否可见与播放时间
+    state: function () {
+      var q = document.querySelector(QUIZ);
+      var t = playTime();
+      return { quiz: !!q && q.offsetParent !== null, cur: t.cur, dur: t.dur };
+    },
+    quizClosed: function () {
+      var r = document.querySelector(QUIZ);
+      return !r || r.style.display === 'none' || r.offsetParent === null;
+    },
+    // 随堂测试的选项元素与文本，一次取回
+    options: function () {
+      var els = Array.prototype.slice.call(document.querySelectorAll(OPTIONS));
+      return { els: els, texts: els.map(text) };
+    },
+    // 按下标点击选项，返回已点击的下标
+    answer: function (indices) {
+      var els = document.querySelectorAll(OPTIONS);
+      var done = [];
+      (indices || []).forEach(function (i) {
+        if (!els[i]) return;
+        try { els[i].click(); done.push(i); } catch (e) {}
+      });
+      return done;
+    },
+    // 派发关闭按钮的点击事件，返回关闭按钮（未找到时为 null）
+    closeQuiz: function () {
+      var el = closeBox();
+      if (el) fire(el);
+      return el;
+    }
+  };
+})();
+""" % HELPER_VERSION
+
+_CALL_TEMPLATE = 'var h=window.__azs;return h&&h.v===%d?h.%s.apply(h,arguments):"%s";'
+_CALL_NAME = re.compile(r"^var h=window\.__azs;return h&&h\.v===\d+\?h\.(\w+)\.apply")
+_calls = {}
+
+
+def _call_script(name: str) -> str:
+    script = _calls.get(name)
+    if script is None:
+        script = _calls[name] = _CALL_TEMPLATE % (HELPER_VERSION, name, MISSING)
+    return script
+
+
+def helper_name(script: str) -> Optional[str]:
+    """调用包装脚本对应的辅助函数名，其他脚本返回 None。"""
+    m = _CALL_NAME.match(script or "")
+    return m.group(1) if m else None
+
+
+def install_page_helpers(driver) -> bool:
+    """
+    通过 Page.addScriptToEvaluateOnNewDocument 让浏览器在每个新文档中自动注入辅助脚本；
+    驱动不支持 CDP（如 Firefox）时返回 False，由 page_call 在首次调用时注入。
+    """
+    if not hasattr(driver, "execute_cdp_cmd"):
+        logger.debug("驱动不支持 CDP，页面辅助脚本改为按需注入。")
+        return False
+    try:
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": HELPER_SCRIPT})
+        logger.debug(f"已注册页面辅助脚本（v{HELPER_VERSION}）")
+        return True
+    except Exception as e:
+        logger.debug(f"注册页面辅助脚本失败，改为按需注入：{e}")
+        return False
+
+
+def page_call(driver, name: str, *args) -> Any:
+    """
+    调用页面辅助函数 __azs.<name>(*args)。
+    页面尚未注入（导航后 CDP 未生效、附加模式下已打开的页面、不支持 CDP 的浏览器）时注入后重试一次。
+    """
+    script = _call_script(name)
+    result = driver.execute_script(script, *args)
+    if isinstance(result, str) and result == MISSING:
+        logger.debug(f"页面缺少辅助脚本 v{HELPER_VERSION}，重新注入")
+        driver.execute_script(HELPER_SCRIPT)
+        result = driver.execute_script(script, *args)
+        if isinstance(result, str) and result == MISSING:
+            raise RuntimeError("页面辅助脚本注入失败")
+    return result
@@ -0,0 +1,76 @@
+import os
+import sys
+from typing import Optional, Tuple
+
+
+def _windows_memory() -> Tuple[Optional[float], Optional[float]]:
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD),
+            ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+    handle = ctypes.windll.kernel32.GetCurrentProcess()
+    if not ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+        return None, None
+    return counters.WorkingSetSize / 2 ** 20, counters.PeakWorkingSetSize / 2 ** 20
+
+
+def memory_mb() -> Tuple[Optional[float], Optional[float]]:
+    """
+    返回当前进程的 (常驻内存, 峰值常驻内存)，单位 MB，无法获取时为 None。
+    优先使用 psutil（未安装时不强制依赖），否则 Windows 走 psapi，Linux 读 /proc 与 getrusage。
+    """
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        peak = getattr(info, "peak_wset", None)
+        rss = info.rss / 2 ** 20
+        if peak is None:
+            peak = _unix_peak_mb()
+        else:
+            peak = peak / 2 ** 20
+        return rss, peak
+    except ImportError:
+        pass
+    except Exception:
+        return None, None
+    try:
+        if sys.platform == "win32":
+            return _windows_memory()
+        return _unix_rss_mb(), _unix_peak_mb()
+    except Exception:
+        return None, None
+
+
+def _unix_rss_mb() -> Optional[float]:
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except Exception:
+        return None
+
+
+def _unix_peak_mb() -> Optional[float]:
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux 单位为 KB，macOS 为字节
+        return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+    except Exception:
+        return None
+
@@ -0,0 +1,102 @@
+import io
+import json
+import pstats
+import datetime as dt
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+PROFILERS = ("cprofile", "pyinstrument")
+
+
+class RunProfiler:
+    """
+    完整运行流程的性能分析（cProfile 或 pyinstrument），只覆盖主线程：
+    调度器与命令线程的耗时体现在主线程的等待中，命令本身由阶段耗时统计（metrics）记录。
+    结束后在 out_dir 写入原始分析文件，并返回累计耗时最高的函数列表。
+    """
+
+    def __init__(self, kind: str, out_dir: str = "./logs", top: int = 30):
+        self.kind = kind
+        self.out_dir = Path(out_dir)
+        self.top = top
+        self._profiler: Any = None
+
+    def start(self) -> bool:
+        if self.kind == "cprofile":
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif self.kind == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                logger.error("未安装 pyinstrument（pip install pyinstrument），本次运行不做性能分析")
+                return False
+            self._profiler = Profiler(async_mode="disabled")
+            self._profiler.start()
+        else:
+            logger.error(f"未知的性能分析器：{self.kind}")
+            return False
+        logger.info(f"性能分析已开启：{self.kind}")
+        return True
+
+    def _path(self, suffix: str) -> Path:
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        return self.out_dir / f"profile-{dt.datetime.now().strftime('%Y%m%d-%H%M%S')}{suffix}"
+
+    def stop(self) -> Optional[Dict[str, Any]]:
+        """停止分析并写出结果；未成功开启时返回 None。"""
+        profiler, self._profiler = self._profiler, None
+        if profiler is None:
+            return None
+        if self.kind == "cprofile":
+            profiler.disable()
+            path = self._path(".prof")
+            profiler.dump_stats(str(path))
+            report = {"kind": self.kind, "file": str(path), "top": self._cprofile_top(profiler)}
+        else:
+            profiler.stop()
+            from pyinstrument.renderers import JSONRenderer
+            path = self._path(".html")
+            path.write_text(profiler.output_html(), encoding="utf-8")
+            json_path = path.with_suffix(".json")
+            json_path.write_text(profiler.output(renderer=JSONRenderer()), encoding="utf-8")
+            report = {"kind": self.kind, "file": str(path), "json": str(json_path), "top": self._pyinstrument_top(json_path)}
+        logger.info(f"性能分析结果已写入：{path}")
+        return report
+
+    def _cprofile_top(self, profiler) -> List[Dict[str, Any]]:
+        stats = pstats.Stats(profiler, stream=io.StringIO())
+        rows = []
+        for (filename, line, func), (cc, nc, tt, ct, _) in stats.stats.items():
+            rows.append({
+                "function": f"{filename}:{line}({func})",
+                "calls": nc,
+                "tottime_ms": round(tt * 1000, 2),
+                "cumtime_ms": round(ct * 1000, 2),
+            })
+        rows.sort(key=lambda r: r["cumtime_ms"], reverse=True)
+        return rows[: self.top]
+
+    def _pyinstrument_top(self, json_path: Path) -> List[Dict[str, Any]]:
+        """按自身耗时汇总 pyinstrument 调用树中的函数。"""
+        try:
+            root = json.loads(json_path.read_text(encoding="utf-8")).get("root_frame") or {}
+        except Exception:
+            return []
+        totals: Dict[str, Dict[str, Any]] = {}
+        stack = [root]
+        while stack:
+            frame = stack.pop()
+            children = frame.get("children") or []
+            stack.extend(children)
+            own = frame.get("time", 0.0) - sum(c.get("time", 0.0) for c in children)
+            key = f"{frame.get('file_path_short') or frame.get('file_path')}:{frame.get('line_no')}({frame.get('function')})"
+            row = totals.setdefault(key, {"function": key, "self_ms": 0.0})
+            row["self_ms"] += own * 1000
+        rows = sorted(totals.values(), key=lambda r: r["self_ms"], reverse=True)[: self.top]
+        for r in rows:
+            r["self_ms"] = round(r["self_ms"], 2)
+        return rows
@@ -0,0 +1,187 @@
+import json
+import datetime as dt
+from pathlib import Path
+from threading import Lock, local
+from time import perf_counter, time
+from typing import Any, Dict, Optional
+
+from loguru import logger
+from config.JsonLoadConfig import get_recorder_config
+
+# 触发 DOM 快照的命令：导航后记录目录与播放器，点击后记录播放器
+_SNAPSHOT_AFTER = {"get": "navigate", "elementClick": "click"}
+
+# 快照脚本：目录、随堂测试弹窗（可见时）与播放器控制栏
+_SNAPSHOT_SCRIPT = """
+var q = document.querySelector('div.ai-test-question-wrapper');
+var cat = document.querySelector('div.el-scrollbar.catalogue');
+var bar = document.querySelector('div.controlsBar');
+return { url: location.href,
+         catalogue: cat ? cat.outerHTML : null,
+         quiz: (q && q.offsetParent !== null) ? q.outerHTML : null,
+         player: bar ? bar.outerHTML : null };
+"""
+
+
+class RecordingExecutor:
+    """
+    包装 driver.command_executor：每条命令的参数、原始响应与耗时写入录制文件，
+    回放时原样返回给 selenium，错误响应同样由 selenium 自身转换为异常。
+    """
+
+    def __init__(self, inner, recorder: "SessionRecorder"):
+        self._inner = inner
+        self._recorder = recorder
+
+    def __getattr__(self, name):
+        return getattr(self._inner, name)
+
+    def execute(self, command: str, params: Dict[str, Any]):
+        rec = self._recorder
+        if rec.suppressed:
+            return self._inner.execute(command, params)
+        start = perf_counter()
+        error = None
+        response = None
+        try:
+            response = self._inner.execute(command, params)
+            return response
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            rec.command(command, params, response, perf_counter() - start, error)
+            if error is None:
+                rec.after_command(command, response)
+
+
+class SessionRecorder:
+    """
+    页面会话录制：记录 WebDriver 命令时间线、随堂测试的 OCR/LLM 结果，
+    以及目录、随堂测试弹窗与播放器的 DOM 快照，供回放工具确定性地复现一次运行。
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.snapshots = True
+        self.out_dir = Path("./recordings")
+        self.path: Optional[Path] = None
+        self._file = None
+        self._driver = None
+        self._start = 0.0
+        self._seq = 0
+        self._quiz_visible = False
+        self._lock = Lock()
+        self._local = local()
+
+    def configure(self, enabled: bool, out_dir: str = "./recordings", snapshots: bool = True):
+        self.enabled = enabled
+        self.out_dir = Path(out_dir)
+        self.snapshots = snapshots
+
+    @property
+    def suppressed(self) -> bool:
+        """快照命令不写入时间线，避免影响回放。"""
+        return getattr(self._local, "suppressed", False)
+
+    def attach(self, driver):
+        """
+        开始录制：包装驱动的命令执行器，并写入会话信息（回放时用于应答 newSession）。
+        会话重建后对新驱动再次调用时，继续写入同一录制文件，并以 driver_rebuilt 事件标记切换位置。
+        """
+        if not self.enabled or driver is self._driver:
+            return
+        if self._driver is not None and self._file is not None:
+            self._driver = driver
+            self._quiz_visible = False
+            driver.command_executor = RecordingExecutor(driver.command_executor, self)
+            self.event(
+                "driver_rebuilt",
+                session_id=driver.session_id,
+                capabilities=getattr(driver, "caps", {}) or {},
+            )
+            logger.info("会话录制已切换到重建后的驱动")
+            return
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.path = self.out_dir / f"session-{dt.datetime.now().strftime('%Y%m%d-%H%M%S')}.jsonl"
+        self._file = self.path.open("w", encoding="utf-8")
+        self._start = perf_counter()
+        self._driver = driver
+        self._write({
+            "type": "meta",
+            "version": 1,
+            "started": round(time(), 3),
+            "session_id": driver.session_id,
+            "capabilities": getattr(driver, "caps", {}) or {},
+        })
+        driver.command_executor = RecordingExecutor(driver.command_executor, self)
+        logger.info(f"会话录制已开启：{self.path}")
+
+    def _write(self, row: Dict[str, Any]):
+        with self._lock:
+            if self._file is None:
+                return
+            self._seq += 1
+            row = {"seq": self._seq, "t": round(perf_counter() - self._start, 4), **row}
+            self._file.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+            self._file.flush()
+
+    def command(self, command: str, params: Any, response: Any, elapsed: float, error: Optional[BaseException]):
+        row = {"type": "cmd", "command": command, "params": params, "elapsed": round(elapsed, 6), "response": response}
+        if error is not None:
+            row["error"] = f"{type(error).__name__}: {error}"
+        self._write(row)
+
+    def event(self, kind: str, **data):
+        """记录一条非命令事件（OCR 文本、LLM 结果、阶段标记等）。"""
+        if self._file is None:
+            return
+        self._write({"type": "event", "kind": kind, **data})
+
+    def after_command(self, command: str, response: Any):
+        """在关键命令之后采集 DOM 快照；随堂测试弹窗首次可见时也采集一次。"""
+        if not self.snapshots:
+            return
+        label = _SNAPSHOT_AFTER.get(command)
+        if label is None and isinstance(response, dict):
+            value = response.get("value")
+            if isinstance(value, dict) and "quiz" in value:
+                visible = bool(value.get("quiz"))
+                if visible and not self._quiz_visible:
+                    label = "quiz"
+                self._quiz_visible = visible
+        if label:
+            self.snapshot(label)
+
+    def snapshot(self, label: str):
+        driver = self._driver
+        if driver is None:
+            return
+        self._local.suppressed = True
+        try:
+            dom = driver.execute_script(_SNAPSHOT_SCRIPT) or {}
+            self._write({"type": "snapshot", "label": label, **dom})
+        except Exception as e:
+            logger.debug(f"DOM 快照失败：{e}")
+        finally:
+            self._local.suppressed = False
+
+    def close(self):
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.close()
+            self._file = None
+        self._driver = None
+        logger.info(f"会话录制已保存：{self.path}")
+
+
+# 全局录制实例
+recorder = SessionRecorder()
+
+
+def configure_recorder():
+    """按 config.json 的 recorder 段配置全局录制实例。"""
+    r = get_recorder_config()
+    recorder.configure(r["enabled"], r["dir"], r["snapshots"])
+    return recorder
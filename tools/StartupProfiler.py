@@ -0,0 +1,144 @@
+"""
+启动导入耗时分析
+
+基于 `python -X importtime` 统计指定模块的冷导入耗时，并与记录的基线比较：
+- 记录基线：python -m tools.StartupProfiler --record
+- 检查预算：python -m tools.StartupProfiler（超出基线容差时退出码为 1）
+"""
+
+import re
+import sys
+import json
+import argparse
+import subprocess
+from pathlib import Path
+from statistics import median
+from typing import Dict, Any, List, Optional
+
+from config.JsonLoadConfig import get_project_root
+from tools.bench.BenchCommon import write_results
+
+# 默认统计的入口模块：Main 应保持轻量，WebEdgeService 为首次进入业务流程的导入量
+DEFAULT_MODULES = ["Main", "service.WebEdgeService"]
+DEFAULT_BASELINE = get_project_root() / "tools" / "import_baseline.json"
+
+# 形如 "import time:       123 |        456 |   package.module"
+_LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)\s*$")
+
+
+def parse_importtime(stderr: str, exclude: Optional[set] = None) -> Dict[str, Any]:
+    """
+    解析 -X importtime 输出，返回总耗时（微秒）与自身耗时最高的模块。
+    exclude 为解释器启动阶段本身就会导入的顶层模块，不计入总耗时。
+    """
+    exclude = exclude or set()
+    total = 0
+    modules: List[Dict[str, Any]] = []
+    for line in stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if not m:
+            continue
+        self_us, cumulative_us, indent, name = int(m.group(1)), int(m.group(2)), m.group(3), m.group(4)
+        # 顶层导入的缩进为 1 个空格，嵌套导入每层多 2 个空格
+        if len(indent) == 1 and name not in exclude:
+            total += cumulative_us
+        modules.append({"module": name, "self_us": self_us, "cumulative_us": cumulative_us})
+    modules.sort(key=lambda x: x["self_us"], reverse=True)
+    return {"total_us": total, "top": modules[:15]}
+
+
+def _run_importtime(code: str) -> str:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=str(get_project_root()),
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        tail = proc.stderr.strip().splitlines()[-1:] or [""]
+        raise RuntimeError(f"执行 {code!r} 失败：{tail[0]}")
+    return proc.stderr
+
+
+def _interpreter_modules() -> set:
+    """空跑解释器时就会导入的顶层模块（site、encodings 等）。"""
+    out = set()
+    for line in _run_importtime("pass").splitlines():
+        m = _LINE_RE.match(line)
+        if m and len(m.group(3)) == 1:
+            out.add(m.group(4))
+    return out
+
+
+def measure_module(module: str, runs: int = 3) -> Dict[str, Any]:
+    """在独立子进程中多次冷导入模块，取总耗时中位数。"""
+    samples = []
+    last: Optional[Dict[str, Any]] = None
+    exclude = _interpreter_modules()
+    for _ in range(max(1, runs)):
+        last = parse_importtime(_run_importtime(f"import {module}"), exclude)
+        samples.append(last["total_us"])
+    return {"module": module, "total_us": int(median(samples)), "samples_us": samples, "top": last["top"]}
+
+
+def profile_startup(modules: Optional[List[str]] = None, runs: int = 3) -> Dict[str, Any]:
+    """统计各入口模块的冷导入耗时。"""
+    return {m: measure_module(m, runs) for m in (modules or DEFAULT_MODULES)}
+
+
+def check_budget(result: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """返回超出基线预算的描述列表，为空表示通过。"""
+    failures = []
+    for module, cur in result.items():
+        base = baseline.get(module)
+        if not base:
+            continue
+        budget = base["total_us"] * (1 + tolerance)
+        if cur["total_us"] > budget:
+            failures.append(
+                f"{module}: {cur['total_us'] / 1000:.1f}ms > 预算 {budget / 1000:.1f}ms"
+                f"（基线 {base['total_us'] / 1000:.1f}ms，容差 {tolerance:.0%}）"
+            )
+    return failures
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="统计启动导入耗时并与基线比较")
+    parser.add_argument("--modules", nargs="*", default=DEFAULT_MODULES, help="要统计的模块")
+    parser.add_argument("--runs", type=int, default=3, help="每个模块的冷导入次数")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="基线文件路径")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="允许超出基线的比例")
+    parser.add_argument("--record", action="store_true", help="将本次结果记录为新的基线")
+    parser.add_argument("--out", default=None, help="结果 JSON 路径")
+    args = parser.parse_args(argv)
+
+    def emit(report: Dict[str, Any]):
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        path = write_results("startup", report, args.out)
+        print(f"结果已写入：{path}", file=sys.stderr)
+
+    result = profile_startup(args.modules, args.runs)
+    baseline_path = Path(args.baseline)
+    report: Dict[str, Any] = {"result": result, "baseline": str(baseline_path), "failures": []}
+
+    if args.record:
+        baseline_path.write_text(
+            json.dumps({m: {"total_us": r["total_us"]} for m, r in result.items()}, indent=2),
+            encoding="utf-8",
+        )
+        emit(report)
+        return 0
+
+    if not baseline_path.exists():
+        report["failures"].append("未找到基线文件，请先使用 --record 记录")
+        emit(report)
+        return 2
+
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    report["failures"] = check_budget(result, baseline, args.tolerance)
+    emit(report)
+    return 1 if report["failures"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+基准测试公共工具：题目截图样本加载、结果写入与版本信息。
+
+样本目录结构：
+    fixtures/
+    ├── q001.png
+    ├── q002.png
+    └── answers.json
+
+answers.json 以文件名为键：
+    {"q001.png": {"answer": ["A"], "options": ["A. 10和11", "B. 11和10"], "text": "可选：题目原文"}}
+- answer：标准答案（选项字母或“对/错”）；
+- options：可选，选项文本，缺省时按 A~D 四个选项处理；
+- text：可选，题目与选项的原文，用于计算 OCR 准确率；
+- rich：可选，题目含图片或公式（对应页面上的图片/公式检查）。
+"""
+
+import json
+import subprocess
+import datetime as dt
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from config.JsonLoadConfig import get_project_root
+from tools.Metrics import summarize
+
+DEFAULT_FIXTURES_DIR = get_project_root() / "tools" / "bench" / "fixtures"
+DEFAULT_RESULTS_DIR = get_project_root() / "bench_results"
+DEFAULT_OPTIONS = ["A", "B", "C", "D"]
+
+
+def load_fixtures(fixtures_dir: Optional[str] = None) -> List[Dict[str, Any]]:
+    """读取样本目录，返回 [{name, path, answer, options, text, rich}]，按文件名排序。"""
+    root = Path(fixtures_dir) if fixtures_dir else DEFAULT_FIXTURES_DIR
+    index_path = root / "answers.json"
+    if not index_path.exists():
+        raise FileNotFoundError(f"未找到样本标注文件：{index_path}")
+    index = json.loads(index_path.read_text(encoding="utf-8"))
+    fixtures = []
+    for name in sorted(index):
+        path = root / name
+        if not path.exists():
+            continue
+        meta = index[name] or {}
+        fixtures.append({
+            "name": name,
+            "path": str(path),
+            "answer": [str(a).strip() for a in meta.get("answer") or []],
+            "options": list(meta.get("options") or DEFAULT_OPTIONS),
+            "text": meta.get("text"),
+            "rich": bool(meta.get("rich")),
+        })
+    return fixtures
+
+
+def require_fixtures(fixtures_dir: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+    """
+    加载样本；样本目录不存在或没有可用样本时，向 stdout 输出 JSON 错误结果并返回 None，
+    调用方以退出码 2 结束（仓库不附带截图样本，需自行准备或由 artifacts 采集）。
+    """
+    root = Path(fixtures_dir) if fixtures_dir else DEFAULT_FIXTURES_DIR
+    try:
+        fixtures = load_fixtures(fixtures_dir)
+        error = None if fixtures else "样本目录中没有可用的样本"
+    except FileNotFoundError as e:
+        fixtures, error = [], str(e)
+    if error is None:
+        return fixtures
+    print(json.dumps({
+        "error": error,
+        "fixtures": str(root),
+        "hint": "按 tools/bench/BenchCommon.py 说明准备样本目录，或开启 artifacts 采集后用 --fixtures 指定",
+    }, ensure_ascii=False, indent=2))
+    return None
+
+
+def text_similarity(expected: Optional[str], actual: str) -> Optional[float]:
+    """忽略空白后的字符级相似度（0~1），无标注原文时返回 None。"""
+    if not expected:
+        return None
+    a = "".join(str(expected).split())
+    b = "".join(str(actual or "").split())
+    return SequenceMatcher(None, a, b).ratio()
+
+
+def git_revision() -> str:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=str(get_project_root()),
+            capture_output=True,
+            text=True,
+        )
+        return out.stdout.strip() or "unknown"
+    except Exception:
+        return "unknown"
+
+
+def write_results(name: str, results: Dict[str, Any], out: Optional[str] = None) -> str:
+    """写入 JSON 结果（附带版本与时间），返回文件路径。"""
+    results = {"bench": name, "revision": git_revision(), "time": dt.datetime.now().isoformat(timespec="seconds"), **results}
+    if out:
+        path = Path(out)
+    else:
+        DEFAULT_RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        path = DEFAULT_RESULTS_DIR / f"{name}-{dt.datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+    return str(path)
+
+
+def stage_summary_ms(samples: Dict[str, List[float]]) -> Dict[str, Dict[str, Any]]:
+    """将各阶段的秒级样本汇总为毫秒级的 p50/p95/p99。"""
+    out = {}
+    for stage, values in samples.items():
+        s = summarize(values)
+        out[stage] = {k: (round(v * 1000, 2) if k != "count" else v) for k, v in s.items()}
+    return out
@@ -0,0 +1,144 @@
+"""
+课程目录扫描基准测试
+
+在无头浏览器中打开保存下来的课程页 HTML（或按仿真目录结构生成的静态页面），
+重复执行 WebEdgeService._get_course_and_test_account，统计每次扫描的耗时与 WebDriver 命令数。
+样本 HTML 可来自浏览器“另存为”，也可从会话录制的目录快照中提取：
+
+    python -m tools.bench.CatalogueBench --chapters 10 --lessons 8 --repeat 5
+    python -m tools.bench.CatalogueBench --html tools/bench/catalogue.html
+    python -m tools.bench.CatalogueBench --from-recording recordings/session-20250101-120000.jsonl --save tools/bench/catalogue.html
+"""
+
+import sys
+import json
+import html
+import argparse
+import tempfile
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from tools.bench.BenchCommon import write_results, stage_summary_ms
+from tools.replica.ReplicaServer import build_course
+
+
+def build_catalogue_html(chapters: List[Dict[str, Any]]) -> str:
+    """按真实页面的目录结构（item / item-main / child / child-info）生成不含脚本的静态页面。"""
+    parts = ['<div class="el-scrollbar catalogue"><div class="el-scrollbar__view">']
+    for chapter in chapters:
+        parts.append('<div class="item"><div class="item-main">')
+        for lesson in chapter["lessons"]:
+            finish = '<img class="finish-icon" alt="">' if lesson.get("finished") else ""
+            parts.append(
+                '<div class="child"><div class="child-info cur hasvideo">'
+                f'<div class="child-main"><div class="child-line"><span>{html.escape(lesson["name"])}</span></div></div>'
+                f"{finish}</div></div>"
+            )
+        if chapter.get("test"):
+            status = "已完成" if chapter["test"].get("done") else "去完成"
+            parts.append(f'<div class="item-test"><span>章节测试</span><span class="float-right">{status}</span></div>')
+        parts.append("</div></div>")
+    parts.append("</div></div>")
+    return wrap_page("".join(parts))
+
+
+def wrap_page(body: str) -> str:
+    return f'<!DOCTYPE html><html lang="zh-CN"><head><meta charset="utf-8"><title>catalogue</title></head><body>{body}</body></html>'
+
+
+def catalogue_from_recording(path: str) -> Optional[str]:
+    """取会话录制中最后一个目录快照（目录状态最完整），包装为可直接打开的页面。"""
+    found = None
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except Exception:
+                continue
+            if row.get("type") == "snapshot" and row.get("catalogue"):
+                found = row["catalogue"]
+    return wrap_page(found) if found else None
+
+
+def run_bench(html_path: str, repeat: int = 5, browser: Optional[str] = None) -> Dict[str, Any]:
+    from config.WebdriverConfig import WebDriverConfigurator
+    from service.WebEdgeService import WebEdgeService
+    from tools.DriverHooks import add_command_listener
+
+    tmp = Path(tempfile.mkdtemp(prefix="azs-catalogue-"))
+    cookies = str(tmp / "cookies.json")
+    configurator = WebDriverConfigurator(
+        cookies_file=cookies,
+        user_data_dir=str(tmp / "profile"),
+        blocked_urls=[],
+        browser=browser,
+        headless=True,
+    )
+    service = WebEdgeService(configurator=configurator, cookies_file=cookies)
+    counter = {"n": 0}
+    add_command_listener(service.driver, lambda *event: counter.__setitem__("n", counter["n"] + 1))
+    try:
+        service.driver.get(Path(html_path).resolve().as_uri())
+        samples: List[float] = []
+        commands: List[int] = []
+        found: Dict[str, int] = {}
+        for _ in range(max(1, repeat)):
+            counter["n"] = 0
+            t0 = perf_counter()
+            res = service._get_course_and_test_account()
+            samples.append(perf_counter() - t0)
+            commands.append(counter["n"])
+            found = {k: len(v) for k, v in res.items()}
+    finally:
+        service.shutdown()
+    return {
+        "scans": len(samples),
+        "first_scan_ms": round(samples[0] * 1000, 2),
+        "stages_ms": stage_summary_ms({"catalogue_scan": samples}),
+        "commands_per_scan": round(sum(commands) / len(commands), 1),
+        "found": found,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="课程目录扫描基准测试")
+    parser.add_argument("--html", default=None, help="保存的课程页 HTML（默认按 --chapters/--lessons 生成）")
+    parser.add_argument("--from-recording", default=None, help="从会话录制的目录快照生成样本")
+    parser.add_argument("--save", default=None, help="把使用的样本 HTML 另存到该路径")
+    parser.add_argument("--chapters", type=int, default=10)
+    parser.add_argument("--lessons", type=int, default=8, help="每章课程数")
+    parser.add_argument("--finished", type=int, default=0, help="预先标记为已完成的课程数")
+    parser.add_argument("--repeat", type=int, default=5, help="扫描次数")
+    parser.add_argument("--browser", default=None, help="浏览器（默认取 web_config.browser）")
+    parser.add_argument("--out", default=None, help="结果 JSON 路径")
+    args = parser.parse_args(argv)
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    if args.html:
+        page = Path(args.html).read_text(encoding="utf-8")
+    elif args.from_recording:
+        page = catalogue_from_recording(args.from_recording)
+        if not page:
+            logger.error("录制中没有目录快照")
+            return 2
+    else:
+        page = build_catalogue_html(build_course(args.chapters, args.lessons, finished=args.finished, tests=True))
+    target = Path(args.save) if args.save else Path(tempfile.mkdtemp(prefix="azs-catalogue-")) / "catalogue.html"
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(page, encoding="utf-8")
+
+    results = run_bench(str(target), args.repeat, args.browser)
+    results["params"] = vars(args)
+    path = write_results("catalogue", results, args.out)
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+    print(f"结果已写入：{path}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
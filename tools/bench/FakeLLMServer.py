@@ -0,0 +1,168 @@
+"""
+本地模拟的 OpenAI 兼容 LLM 服务，供离线基准测试使用。
+
+- POST */chat/completions：按配置的延迟返回 {"selected": [...]} 形式的回复；
+  批量请求（题目以 [题号] 开头）返回 {"answers": [{"id": 1, "selected": [...]}, ...]}，
+  每道题额外增加 per_item_ms 延迟；
+- GET */models：空列表，可用于连接保活；
+- 通过 prime() 预置下一题的标准答案，accuracy 控制返回正确答案的概率。
+"""
+
+import re
+import json
+import time
+import random
+import string
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread, Lock
+from typing import Any, Deque, Dict, List, Optional
+
+
+class FakeLLMServer:
+    def __init__(
+        self,
+        latency_ms: float = 800,
+        jitter_ms: float = 200,
+        accuracy: float = 1.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed: Optional[int] = 0,
+        per_item_ms: float = 0,
+    ):
+        self.latency_ms = latency_ms
+        self.per_item_ms = per_item_ms
+        self.jitter_ms = jitter_ms
+        self.accuracy = accuracy
+        self._rand = random.Random(seed)
+        self._answers: Deque[List[str]] = deque()
+        self._lock = Lock()
+        self.requests = 0
+        # 最近一次请求的消息体，便于调试与断言
+        self.last_messages: List[Dict[str, Any]] = []
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeLLMServer":
+        self._thread = Thread(target=self._server.serve_forever, name="FakeLLMServer", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def prime(self, answer: List[str]):
+        """预置下一次请求的标准答案（按请求顺序依次取出）。"""
+        with self._lock:
+            self._answers.append(list(answer))
+
+    def reset(self):
+        """清空尚未取出的预置答案。"""
+        with self._lock:
+            self._answers.clear()
+
+    def _next_answer(self) -> List[str]:
+        with self._lock:
+            answer = self._answers.popleft() if self._answers else ["A"]
+            correct = self._rand.random() < self.accuracy
+            if not correct:
+                # 给出一个错误答案，模拟模型答错
+                pool = [c for c in string.ascii_uppercase[:4] if c not in answer] or ["A"]
+                answer = [self._rand.choice(pool)]
+        return answer
+
+    def _next_content(self) -> str:
+        return json.dumps({"selected": self._next_answer()}, ensure_ascii=False)
+
+    def _batch_content(self, ids: List[int]) -> str:
+        answers = [{"id": i, "selected": self._next_answer()} for i in ids]
+        return json.dumps({"answers": answers}, ensure_ascii=False)
+
+    @staticmethod
+    def batch_ids(payload: Dict[str, Any]) -> List[int]:
+        """批量请求中的题号（用户消息里以 [题号] 开头的行），非批量请求返回空列表。"""
+        messages = payload.get("messages") or []
+        user = next((m.get("content") for m in reversed(messages) if m.get("role") == "user"), "")
+        if not isinstance(user, str):
+            return []
+        return [int(m) for m in re.findall(r"^\[(\d+)\]", user, flags=re.M)]
+
+    def _delay(self, items: int = 1):
+        ms = self.latency_ms + self.per_item_ms * items + self._rand.uniform(-self.jitter_ms, self.jitter_ms)
+        if ms > 0:
+            time.sleep(ms / 1000)
+
+    def _completion(self, content: str, model: str) -> Dict[str, Any]:
+        return {
+            "id": f"fake-{self.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, code: int, body: Dict[str, Any]):
+                raw = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def do_GET(self):
+                if self.path.rstrip("/").endswith("/models"):
+                    self._send(200, {"object": "list", "data": []})
+                else:
+                    self._send(404, {"error": "not found"})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    payload = json.loads(self.rfile.read(length) or b"{}")
+                except Exception:
+                    payload = {}
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send(404, {"error": "not found"})
+                    return
+                with server._lock:
+                    server.requests += 1
+                    server.last_messages = payload.get("messages") or []
+                content = server.respond(payload)
+                server._delay(max(1, len(server.batch_ids(payload))))
+                self._send(200, server._completion(content, payload.get("model") or "fake"))
+
+        return Handler
+
+    def respond(self, payload: Dict[str, Any]) -> str:
+        """生成回复内容；子类可覆盖以模拟其他回复格式。"""
+        ids = self.batch_ids(payload)
+        if ids:
+            return self._batch_content(ids)
+        return self._next_content()
@@ -0,0 +1,133 @@
+"""
+批量解答基准测试
+
+同一组章节测试题分别以固定批大小（1 即逐题请求）与自适应批大小交给 DeepSeek.answer_questions，
+请求发往本地模拟服务，比较每题分摊延迟、请求数与准确率；drop_rate 模拟模型漏答，用于检验拆分重试：
+
+    python -m tools.bench.LlmBatchBench --questions 40 --latency-ms 800 --per-item-ms 150 --sizes 1 2 5 10 20
+"""
+
+import re
+import sys
+import json
+import argparse
+from time import perf_counter
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from service.ChapterTestService import format_question
+from service.SolutionService import select_option_indices
+from tools.llms.BatchSizer import BatchSizer
+from tools.llms.DeepSeek import DeepSeek
+from tools.bench.FakeLLMServer import FakeLLMServer
+from tools.bench.BenchCommon import write_results
+from tools.replica.ReplicaServer import build_exam
+
+
+class KeyedLLMServer(FakeLLMServer):
+    """按题干返回标准答案，批量回复中的答案与题号对应关系可直接核对；drop_rate 概率漏答某题。"""
+
+    def __init__(self, answers: Dict[str, List[str]], drop_rate: float = 0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.answers = answers
+        self.drop_rate = drop_rate
+
+    def _lookup(self, text: str) -> List[str]:
+        for stem, answer in self.answers.items():
+            if stem in text:
+                return answer
+        return ["A"]
+
+    def respond(self, payload: Dict[str, Any]) -> str:
+        messages = payload.get("messages") or []
+        user = next((m.get("content") for m in reversed(messages) if m.get("role") == "user"), "") or ""
+        ids = self.batch_ids(payload)
+        if not ids:
+            return json.dumps({"selected": self._lookup(user)}, ensure_ascii=False)
+        blocks = re.split(r"^\[(\d+)\]\s*$", user, flags=re.M)
+        out = []
+        # re.split 结果：[前缀, 题号, 正文, 题号, 正文, ...]
+        for i in range(1, len(blocks) - 1, 2):
+            with self._lock:
+                dropped = self._rand.random() < self.drop_rate
+            if not dropped:
+                out.append({"id": int(blocks[i]), "selected": self._lookup(blocks[i + 1])})
+        return json.dumps({"answers": out}, ensure_ascii=False)
+
+
+def run_mode(
+    server: KeyedLLMServer,
+    exam: List[Dict[str, Any]],
+    sizer: BatchSizer,
+    repeat: int = 1,
+) -> Dict[str, Any]:
+    llm = DeepSeek(api_key="bench", base_url=server.base_url, model="fake")
+    llm.batch_enabled = True
+    llm.batch_sizer = sizer
+    texts = [format_question(q) for q in exam]
+    requests_before = server.requests
+    correct = 0
+    total = 0
+    sizes: List[int] = []
+    start = perf_counter()
+    for _ in range(max(1, repeat)):
+        sizes.append(sizer.size())
+        results = llm.answer_questions(texts)
+        for q, result in zip(exam, results):
+            chosen = select_option_indices(result.get("selected") or [], q["options"])
+            correct += int(chosen == select_option_indices(q["answer"], q["options"]))
+            total += 1
+    wall = perf_counter() - start
+    return {
+        "questions": total,
+        "requests": server.requests - requests_before,
+        "wall_s": round(wall, 3),
+        "per_question_ms": round(wall * 1000 / total, 2) if total else None,
+        "accuracy": round(correct / total, 4) if total else None,
+        "batch_sizes": sizes + [sizer.size()],
+        "fit": sizer.fit(),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="批量解答基准测试")
+    parser.add_argument("--questions", type=int, default=40, help="每轮题目数")
+    parser.add_argument("--repeat", type=int, default=3, help="每种批大小的轮数")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[1, 2, 5, 10, 20], help="固定批大小")
+    parser.add_argument("--latency-ms", type=float, default=800, help="模拟 LLM 每次请求的固定延迟")
+    parser.add_argument("--per-item-ms", type=float, default=150, help="模拟 LLM 每道题额外的延迟")
+    parser.add_argument("--jitter-ms", type=float, default=100, help="模拟 LLM 的延迟抖动")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="批量回复中漏答某题的概率")
+    parser.add_argument("--target-latency", type=float, default=5.0, help="自适应模式的目标单次请求耗时（秒）")
+    parser.add_argument("--out", default=None, help="结果 JSON 路径")
+    args = parser.parse_args(argv)
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    exam = build_exam(args.questions)
+    answers = {q["stem"]: q["answer"] for q in exam}
+    modes: Dict[str, Any] = {}
+    with KeyedLLMServer(
+        answers,
+        drop_rate=args.drop_rate,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        per_item_ms=args.per_item_ms,
+    ) as server:
+        for size in args.sizes:
+            sizer = BatchSizer(size, size, size, args.target_latency)
+            modes[f"fixed_{size}"] = run_mode(server, exam, sizer, args.repeat)
+        sizer = BatchSizer(max(args.sizes or [5]) // 2 or 1, 1, max(args.sizes or [20]), args.target_latency)
+        modes["adaptive"] = run_mode(server, exam, sizer, args.repeat)
+
+    results = {"params": vars(args), "modes": modes}
+    path = write_results("llm_batch", results, args.out)
+    print(json.dumps(modes, ensure_ascii=False, indent=2))
+    print(f"结果已写入：{path}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
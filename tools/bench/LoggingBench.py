@@ -0,0 +1,111 @@
+"""
+日志开销基准测试
+
+分别以旧配置（同步控制台、无 JSON、无限流）与 config.json 的 logging 配置初始化日志，
+在调用线程上测量单条 DEBUG / INFO 日志与被限流丢弃的日志耗时，以及队列写完所需的时间，
+再按一节课程的日志量（每秒一次探测类 DEBUG 日志加若干 INFO 日志）估算每节课程的日志开销：
+
+    python -m tools.bench.LoggingBench --calls 5000 --lesson-seconds 600 --hot-sites 3
+"""
+
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+from time import perf_counter
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from config.JsonLoadConfig import get_logging_config
+from config.LoggerConfig import LoggerConfigurator
+from tools.bench.BenchCommon import write_results
+
+# 旧配置：与引入轮转/限流之前的行为一致
+LEGACY = {
+    "console_async": False,
+    "json": False,
+    "rate_limits": {},
+    "rotation": None,
+    "compression": None,
+    "retention": None,
+    "max_files": 0,
+}
+
+
+def _measure(cfg: Dict[str, Any], calls: int, level: str, hot: bool) -> Dict[str, float]:
+    """初始化日志后在同一调用位置输出 calls 条日志，返回每条的调用耗时与写完队列的耗时（毫秒）。"""
+    tmp = tempfile.mkdtemp(prefix="azs-logbench-")
+    devnull = open(os.devnull, "w", encoding="utf-8")
+    try:
+        rules = {__name__: 3600.0} if hot else {}
+        configurator = LoggerConfigurator(cfg={**cfg, "dir": tmp, "rate_limits": rules}, console=devnull)
+        configurator.setup()
+        log = getattr(logger, level)
+        start = perf_counter()
+        for i in range(calls):
+            log(f"进度检查 cur=00:{i % 60:02d} dur=10:00 quiz=False")
+        caller = perf_counter() - start
+        t0 = perf_counter()
+        configurator.flush()
+        drain = perf_counter() - t0
+        logger.remove()
+        return {"per_call_us": round(caller * 1e6 / calls, 2), "drain_ms": round(drain * 1000, 1)}
+    finally:
+        logger.configure(patcher=None)
+        logger.remove()
+        devnull.close()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def run_config(cfg: Dict[str, Any], args) -> Dict[str, Any]:
+    debug = _measure(cfg, args.calls, "debug", hot=False)
+    info = _measure(cfg, args.calls, "info", hot=False)
+    limited = _measure(cfg, args.calls, "debug", hot=True) if cfg.get("rate_limits") else None
+
+    # 每节课程：探测类 DEBUG 日志每秒 hot_sites 条，限流后每个位置每 interval 秒输出一条
+    hot_lines = args.lesson_seconds * args.hot_sites
+    rules = cfg.get("rate_limits") or {}
+    interval = rules.get("service.ListenerSupervisor") or max(rules.values() or [0])
+    emitted = min(hot_lines, args.hot_sites * (args.lesson_seconds / interval + 1)) if interval else hot_lines
+    suppressed = hot_lines - emitted
+    overhead_us = emitted * debug["per_call_us"] + args.info_lines * info["per_call_us"]
+    if limited is not None:
+        overhead_us += suppressed * limited["per_call_us"]
+    return {
+        "debug": debug,
+        "info": info,
+        "rate_limited": limited,
+        "lesson": {
+            "debug_lines": hot_lines,
+            "emitted_debug_lines": round(emitted),
+            "info_lines": args.info_lines,
+            "overhead_ms": round(overhead_us / 1000, 2),
+        },
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="日志开销基准测试")
+    parser.add_argument("--calls", type=int, default=5000, help="每项测量的日志条数")
+    parser.add_argument("--lesson-seconds", type=int, default=600, help="一节课程的时长（秒）")
+    parser.add_argument("--hot-sites", type=int, default=3, help="每秒输出一次的 DEBUG 日志位置数")
+    parser.add_argument("--info-lines", type=int, default=40, help="每节课程的 INFO 日志条数")
+    parser.add_argument("--out", default=None, help="结果 JSON 路径")
+    args = parser.parse_args(argv)
+
+    configured = get_logging_config()
+    results = {
+        "legacy": run_config({**configured, **LEGACY}, args),
+        "configured": run_config(configured, args),
+    }
+    path = write_results("logging", {"params": vars(args), "configs": results}, args.out)
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+    print(f"结果已写入：{path}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
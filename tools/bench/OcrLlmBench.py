@@ -0,0 +1,132 @@
+"""
+离线 OCR + LLM 基准测试
+
+回放样本目录中保存的 ques-card-box 截图，依次经过 SolutionService.ocr_text、
+DeepSeek.answer_question（含 parse_content，请求发往本地模拟服务）与选项匹配逻辑，
+统计吞吐量、各阶段延迟百分位数与准确率，结果写入 JSON 便于跨提交对比。
+模拟服务按标注答案作答，不代表真实模型的解题能力，因此准确率以 OCR 文本与标注原文（text）的相似度衡量；
+option_mapping_accuracy 只检验“模型答案 → 页面选项”的映射逻辑：
+
+    python -m tools.bench.OcrLlmBench --fixtures tools/bench/fixtures --latency-ms 800
+"""
+
+import sys
+import json
+import argparse
+from time import perf_counter
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from service.SolutionService import SolutionService, select_option_indices, Image
+from tools.llms.DeepSeek import DeepSeek
+from tools.bench.FakeLLMServer import FakeLLMServer
+from tools.bench.BenchCommon import (
+    require_fixtures,
+    text_similarity,
+    write_results,
+    stage_summary_ms,
+)
+
+
+def run_bench(
+    fixtures: List[Dict[str, Any]],
+    server: FakeLLMServer,
+    repeat: int = 1,
+    solution: Optional[SolutionService] = None,
+) -> Dict[str, Any]:
+    llm = DeepSeek(api_key="bench", base_url=server.base_url, model="fake")
+    solution = solution or SolutionService(llm=llm)
+
+    # 预热：OCR 模型加载不计入统计
+    init_start = perf_counter()
+    _ = solution.ocr
+    init_s = perf_counter() - init_start
+
+    samples: Dict[str, List[float]] = {"ocr": [], "llm": [], "match": [], "total": []}
+    correct = 0
+    similarities: List[float] = []
+    details = []
+    wall_start = perf_counter()
+    for _ in range(max(1, repeat)):
+        for fx in fixtures:
+            with Image.open(fx["path"]) as im:
+                img = im.convert("RGB")
+
+            t0 = perf_counter()
+            text = solution.ocr_text(img)
+            t1 = perf_counter()
+            # 模拟服务按标注答案作答（受 --llm-accuracy 影响），只用于检验选项映射
+            server.prime(fx["answer"])
+            result = solution.llm.answer_question(text or fx["name"])
+            t2 = perf_counter()
+            chosen = select_option_indices(result.get("selected") or [], fx["options"])
+            t3 = perf_counter()
+
+            expected = select_option_indices(fx["answer"], fx["options"])
+            ok = chosen == expected
+            correct += int(ok)
+            sim = text_similarity(fx["text"], text)
+            if sim is not None:
+                similarities.append(sim)
+
+            samples["ocr"].append(t1 - t0)
+            samples["llm"].append(t2 - t1)
+            samples["match"].append(t3 - t2)
+            samples["total"].append(t3 - t0)
+            details.append({
+                "name": fx["name"],
+                "mapping_ok": ok,
+                "chosen": chosen,
+                "expected": expected,
+                "ocr_similarity": sim,
+                "total_ms": round((t3 - t0) * 1000, 2),
+            })
+    wall_s = perf_counter() - wall_start
+
+    n = len(details)
+    if not similarities:
+        logger.warning("样本未标注题目原文（text），无法计算 OCR 准确率")
+    return {
+        "questions": n,
+        "ocr_init_s": round(init_s, 3),
+        "wall_s": round(wall_s, 3),
+        "throughput_qps": round(n / wall_s, 3) if wall_s else None,
+        # 准确率：OCR 文本与标注原文的平均相似度（仅统计标注了 text 的样本）
+        "accuracy": round(sum(similarities) / len(similarities), 4) if similarities else None,
+        "accuracy_samples": len(similarities),
+        "option_mapping_accuracy": round(correct / n, 4) if n else None,
+        "stages_ms": stage_summary_ms(samples),
+        "details": details,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="离线 OCR + LLM 基准测试")
+    parser.add_argument("--fixtures", default=None, help="样本目录（含 answers.json）")
+    parser.add_argument("--latency-ms", type=float, default=800, help="模拟 LLM 的平均延迟")
+    parser.add_argument("--jitter-ms", type=float, default=200, help="模拟 LLM 的延迟抖动")
+    parser.add_argument("--llm-accuracy", type=float, default=1.0, help="模拟 LLM 返回标注答案的概率（只影响选项映射检验）")
+    parser.add_argument("--repeat", type=int, default=1, help="样本重复轮数")
+    parser.add_argument("--out", default=None, help="结果 JSON 路径")
+    args = parser.parse_args(argv)
+
+    # 基准测试只关心结果，降低日志噪音
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    fixtures = require_fixtures(args.fixtures)
+    if fixtures is None:
+        return 2
+    with FakeLLMServer(args.latency_ms, args.jitter_ms, args.llm_accuracy) as server:
+        results = run_bench(fixtures, server, args.repeat)
+    results["params"] = vars(args)
+    path = write_results("ocr_llm", results, args.out)
+    summary = {k: v for k, v in results.items() if k != "details"}
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    print(f"结果已写入：{path}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
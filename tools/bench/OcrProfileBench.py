@@ -0,0 +1,144 @@
+"""
+OCR 档位基准测试
+
+对 config.json 中 ocr.profiles 的每个档位（可叠加 --threads 覆盖 onnxruntime 线程数）在样本截图上执行 OCR，
+输出初始化耗时、内存（初始化后与峰值常驻内存）、识别延迟与 OCR 准确率矩阵，便于按机器选择档位。
+每个档位在独立子进程中运行，内存读数互不干扰：
+
+    python -m tools.bench.OcrProfileBench --fixtures tools/bench/fixtures --threads 1 2 4 --repeat 3
+"""
+
+import sys
+import json
+import argparse
+import subprocess
+from time import perf_counter
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from config.JsonLoadConfig import get_project_root, get_ocr_profiles
+from tools.ProcessStats import memory_mb
+from tools.bench.BenchCommon import require_fixtures, text_similarity, write_results, stage_summary_ms
+
+
+def run_profile(profile: Dict[str, Any], fixtures: List[Dict[str, Any]], repeat: int = 1) -> Dict[str, Any]:
+    """在当前进程中测量单个档位。"""
+    from service.SolutionService import SolutionService, Image
+    from tools.OcrEngine import create_ocr
+
+    images = []
+    for fx in fixtures:
+        with Image.open(fx["path"]) as im:
+            images.append(im.convert("RGB"))
+    rss_before, _ = memory_mb()
+
+    solution = SolutionService()
+    start = perf_counter()
+    solution._ocr = create_ocr(profile)
+    init_s = perf_counter() - start
+    rss_init, _ = memory_mb()
+
+    # 首次推理单独计时（含 onnxruntime 的惰性初始化）
+    t0 = perf_counter()
+    solution.ocr_text_scored(images[0])
+    first_s = perf_counter() - t0
+
+    samples: List[float] = []
+    similarities: List[float] = []
+    for _ in range(max(1, repeat)):
+        for fx, img in zip(fixtures, images):
+            t0 = perf_counter()
+            text, _ = solution.ocr_text_scored(img)
+            samples.append(perf_counter() - t0)
+            sim = text_similarity(fx["text"], text)
+            if sim is not None:
+                similarities.append(sim)
+    rss_end, peak = memory_mb()
+
+    def r(v: Optional[float]) -> Optional[float]:
+        return round(v, 1) if v is not None else None
+
+    return {
+        "init_s": round(init_s, 3),
+        "first_call_ms": round(first_s * 1000, 2),
+        "mean_ms": round(sum(samples) * 1000 / len(samples), 2) if samples else None,
+        "stages_ms": stage_summary_ms({"ocr": samples}),
+        "ocr_similarity": round(sum(similarities) / len(similarities), 4) if similarities else None,
+        "rss_init_mb": r(rss_init - rss_before) if rss_init is not None and rss_before is not None else None,
+        "rss_end_mb": r(rss_end),
+        "peak_rss_mb": r(peak),
+    }
+
+
+def build_matrix(names: List[str], threads: List[int]) -> Dict[str, Dict[str, Any]]:
+    """档位 × 线程数组合；未指定 --threads 时使用档位自身的设置。"""
+    profiles = get_ocr_profiles()
+    matrix = {}
+    for name in names:
+        if name not in profiles:
+            logger.warning(f"未知的 OCR 档位：{name}")
+            continue
+        base = {"name": name, **profiles[name]}
+        if not threads:
+            matrix[name] = base
+            continue
+        for n in threads:
+            ort = {**base["onnxruntime"], "intra_op_threads": n}
+            matrix[f"{name}@{n}t"] = {**base, "onnxruntime": ort}
+    return matrix
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="OCR 档位基准测试")
+    parser.add_argument("--fixtures", default=None, help="样本目录（含 answers.json）")
+    parser.add_argument("--profiles", nargs="*", default=None, help="参与测试的档位（默认全部）")
+    parser.add_argument("--threads", type=int, nargs="*", default=[], help="覆盖 onnxruntime 线程数")
+    parser.add_argument("--repeat", type=int, default=3, help="样本重复轮数")
+    parser.add_argument("--out", default=None, help="结果 JSON 路径")
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    fixtures = require_fixtures(args.fixtures)
+    if fixtures is None:
+        return 2
+
+    if args.worker:
+        # 子进程：测量单个档位，结果以 JSON 输出到 stdout
+        profile = json.loads(args.worker)
+        print(json.dumps(run_profile(profile, fixtures, args.repeat), ensure_ascii=False))
+        return 0
+
+    matrix = build_matrix(args.profiles or list(get_ocr_profiles()), args.threads)
+    results: Dict[str, Any] = {}
+    for key, profile in matrix.items():
+        cmd = [
+            sys.executable, "-m", "tools.bench.OcrProfileBench",
+            "--repeat", str(args.repeat), "--worker", json.dumps(profile, ensure_ascii=False),
+        ]
+        if args.fixtures:
+            cmd += ["--fixtures", args.fixtures]
+        proc = subprocess.run(cmd, cwd=str(get_project_root()), capture_output=True, text=True, encoding="utf-8")
+        try:
+            results[key] = {"profile": profile, **json.loads(proc.stdout.strip().splitlines()[-1])}
+        except Exception:
+            logger.error(f"档位 {key} 测试失败：{proc.stderr.strip()[-500:]}")
+            results[key] = {"profile": profile, "error": proc.stderr.strip()[-500:]}
+            continue
+        r = results[key]
+        logger.warning(
+            f"{key}: 平均 {r['mean_ms']}ms，准确率 {r['ocr_similarity']}，初始化 {r['init_s']}s，峰值内存 {r['peak_rss_mb']}MB"
+        )
+
+    path = write_results("ocr_profiles", {"params": vars(args), "matrix": results}, args.out)
+    columns = ("mean_ms", "first_call_ms", "init_s", "ocr_similarity", "rss_init_mb", "peak_rss_mb")
+    print(json.dumps({k: {c: v.get(c) for c in columns} for k, v in results.items()}, ensure_ascii=False, indent=2))
+    print(f"结果已写入：{path}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
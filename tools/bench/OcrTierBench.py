@@ -0,0 +1,104 @@
+"""
+两级 OCR 基准测试
+
+同一组题目截图分别以原图单次识别（full）与两级识别（two_tier，可指定多个首轮缩放比例）执行 OCR，
+比较平均/分位延迟、与标注原文的相似度以及 OCR 置信度：
+
+    python -m tools.bench.OcrTierBench --fixtures tools/bench/fixtures --scales 0.4 0.5 0.6 --repeat 3
+"""
+
+import sys
+import json
+import argparse
+from time import perf_counter
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from service.SolutionService import SolutionService, Image
+from tools.bench.BenchCommon import require_fixtures, text_similarity, write_results, stage_summary_ms
+
+
+def run_variant(
+    solution: SolutionService,
+    fixtures: List[Dict[str, Any]],
+    images: Dict[str, Any],
+    repeat: int = 1,
+) -> Dict[str, Any]:
+    samples: List[float] = []
+    similarities: List[float] = []
+    confidences: List[float] = []
+    details = []
+    for _ in range(max(1, repeat)):
+        for fx in fixtures:
+            t0 = perf_counter()
+            text, confidence = solution.ocr_text_scored(images[fx["name"]])
+            elapsed = perf_counter() - t0
+            sim = text_similarity(fx["text"], text)
+            samples.append(elapsed)
+            if sim is not None:
+                similarities.append(sim)
+            if confidence is not None:
+                confidences.append(confidence)
+            details.append({
+                "name": fx["name"],
+                "ms": round(elapsed * 1000, 2),
+                "similarity": sim,
+                "confidence": confidence,
+            })
+    return {
+        "mean_ms": round(sum(samples) * 1000 / len(samples), 2) if samples else None,
+        "ocr_similarity": round(sum(similarities) / len(similarities), 4) if similarities else None,
+        "min_confidence": round(min(confidences), 4) if confidences else None,
+        "stages_ms": stage_summary_ms({"ocr": samples}),
+        "details": details,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="两级 OCR 基准测试")
+    parser.add_argument("--fixtures", default=None, help="样本目录（含 answers.json）")
+    parser.add_argument("--scales", type=float, nargs="*", default=[0.5], help="两级识别的首轮缩放比例")
+    parser.add_argument("--min-line-score", type=float, default=None, help="低于该得分的行重识别（默认取配置）")
+    parser.add_argument("--repeat", type=int, default=3, help="样本重复轮数")
+    parser.add_argument("--out", default=None, help="结果 JSON 路径")
+    args = parser.parse_args(argv)
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    fixtures = require_fixtures(args.fixtures)
+    if fixtures is None:
+        return 2
+    images = {}
+    for fx in fixtures:
+        with Image.open(fx["path"]) as im:
+            images[fx["name"]] = im.convert("RGB")
+
+    solution = SolutionService()
+    if args.min_line_score is not None:
+        solution.ocr_cfg["min_line_score"] = args.min_line_score
+    # 预热：模型加载与首次推理不计入统计
+    solution.ocr_cfg["mode"] = "full"
+    solution.ocr_text_scored(images[fixtures[0]["name"]])
+
+    variants: Dict[str, Any] = {}
+    variants["full"] = run_variant(solution, fixtures, images, args.repeat)
+    solution.ocr_cfg["mode"] = "two_tier"
+    for scale in args.scales:
+        solution.ocr_cfg["first_pass_scale"] = scale
+        variants[f"two_tier_{scale}"] = run_variant(solution, fixtures, images, args.repeat)
+
+    base = variants["full"]["mean_ms"]
+    for v in variants.values():
+        v["speedup"] = round(base / v["mean_ms"], 3) if base and v["mean_ms"] else None
+
+    path = write_results("ocr_tier", {"params": vars(args), "variants": variants}, args.out)
+    summary = {k: {kk: vv for kk, vv in v.items() if kk != "details"} for k, v in variants.items()}
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    print(f"结果已写入：{path}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
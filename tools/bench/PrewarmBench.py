@@ -0,0 +1,145 @@
+"""
+空闲预热基准测试
+
+比较首个随堂测试在冷启动（OCR 引擎与 LLM 客户端在答题时才创建）与预热后（播放期间已空跑 OCR 并保活 LLM 连接）
+的延迟。每次测量在独立子进程中进行，保证每轮都是真正的冷启动；LLM 使用本地模拟服务。
+测量范围为 OCR + LLM 解答（截图与点击不受预热影响），另单独记录首次 OCR 的延迟以确认预热覆盖了检测与识别模型，
+并记录第二题作为稳态参照：
+
+    python -m tools.bench.PrewarmBench --fixtures tools/bench/fixtures --runs 5 --idle-seconds 3
+"""
+
+import sys
+import json
+import time
+import argparse
+import subprocess
+from time import perf_counter
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from config.JsonLoadConfig import get_project_root
+from tools.bench.BenchCommon import require_fixtures, write_results, stage_summary_ms
+from tools.bench.FakeLLMServer import FakeLLMServer
+
+MODES = ("cold", "warm")
+
+
+def run_worker(mode: str, fixtures: List[Dict[str, Any]], base_url: str, idle_seconds: float) -> Dict[str, Any]:
+    """在当前进程中测量一次：mode 为 warm 时先执行与 PrewarmScheduler 相同的预热。"""
+    from service.SolutionService import SolutionService, Image
+    from tools.llms.DeepSeek import DeepSeek
+
+    images = []
+    for fx in fixtures[:2]:
+        with Image.open(fx["path"]) as im:
+            images.append(im.convert("RGB"))
+
+    solution = SolutionService()
+
+    def make_llm() -> DeepSeek:
+        return DeepSeek(api_key="bench", base_url=base_url, model="fake")
+
+    warm_s = None
+    if mode == "warm":
+        t0 = perf_counter()
+        solution._llm = make_llm()
+        solution.warm_up_ocr()
+        solution.llm.ping()
+        warm_s = perf_counter() - t0
+    # 模拟预热与弹窗之间的播放时间
+    time.sleep(idle_seconds)
+
+    samples: List[float] = []
+    ocr_samples: List[float] = []
+    for img in images:
+        t0 = perf_counter()
+        text, _ = solution.ocr_text_scored(img)
+        ocr_samples.append(perf_counter() - t0)
+        if solution._llm is None:
+            # 冷启动：与答题流程一致，首次解答时才创建 LLM 客户端
+            solution._llm = make_llm()
+        solution.llm.answer_question(text)
+        samples.append(perf_counter() - t0)
+    return {
+        "warm_ms": round(warm_s * 1000, 2) if warm_s is not None else None,
+        "first_ms": round(samples[0] * 1000, 2),
+        "second_ms": round(samples[1] * 1000, 2) if len(samples) > 1 else None,
+        "first_ocr_ms": round(ocr_samples[0] * 1000, 2),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="空闲预热基准测试（首个随堂测试延迟）")
+    parser.add_argument("--fixtures", default=None, help="样本目录（含 answers.json）")
+    parser.add_argument("--runs", type=int, default=5, help="每种模式的子进程次数")
+    parser.add_argument("--idle-seconds", type=float, default=3, help="预热后到弹窗前的等待时间")
+    parser.add_argument("--latency-ms", type=float, default=300, help="模拟 LLM 的响应延迟")
+    parser.add_argument("--out", default=None, help="结果 JSON 路径")
+    parser.add_argument("--worker", default=None, choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    fixtures = require_fixtures(args.fixtures)
+    if fixtures is None:
+        return 2
+
+    if args.worker:
+        # 子进程：测量一次，结果以 JSON 输出到 stdout
+        print(json.dumps(run_worker(args.worker, fixtures, args.base_url, args.idle_seconds), ensure_ascii=False))
+        return 0
+
+    runs: Dict[str, List[Dict[str, Any]]] = {m: [] for m in MODES}
+    with FakeLLMServer(latency_ms=args.latency_ms, jitter_ms=0) as server:
+        # 两种模式交替运行，减少机器负载波动的影响
+        for _ in range(max(1, args.runs)):
+            for mode in MODES:
+                cmd = [
+                    sys.executable, "-m", "tools.bench.PrewarmBench",
+                    "--worker", mode, "--base-url", server.base_url, "--idle-seconds", str(args.idle_seconds),
+                ]
+                if args.fixtures:
+                    cmd += ["--fixtures", args.fixtures]
+                proc = subprocess.run(cmd, cwd=str(get_project_root()), capture_output=True, text=True, encoding="utf-8")
+                try:
+                    runs[mode].append(json.loads(proc.stdout.strip().splitlines()[-1]))
+                except Exception:
+                    logger.error(f"{mode} 测量失败：{proc.stderr.strip()[-500:]}")
+
+    results: Dict[str, Any] = {}
+    for mode, rows in runs.items():
+        if not rows:
+            results[mode] = {"error": "无有效测量"}
+            continue
+        samples = {
+            "first_quiz": [r["first_ms"] / 1000 for r in rows],
+            "second_quiz": [r["second_ms"] / 1000 for r in rows if r["second_ms"] is not None],
+            "first_ocr": [r["first_ocr_ms"] / 1000 for r in rows],
+        }
+        if mode == "warm":
+            samples["prewarm"] = [r["warm_ms"] / 1000 for r in rows]
+        results[mode] = {"runs": len(rows), "stages_ms": stage_summary_ms(samples)}
+    cold, warm = results.get("cold", {}), results.get("warm", {})
+    if "stages_ms" in cold and "stages_ms" in warm:
+        c = cold["stages_ms"]["first_quiz"]["p50"]
+        w = warm["stages_ms"]["first_quiz"]["p50"]
+        results["first_quiz_p50_saved_ms"] = round(c - w, 2)
+        # 预热须同时覆盖检测与识别模型：首次 OCR 的延迟应明显下降
+        saved_ocr = cold["stages_ms"]["first_ocr"]["p50"] - warm["stages_ms"]["first_ocr"]["p50"]
+        results["first_ocr_p50_saved_ms"] = round(saved_ocr, 2)
+        results["ocr_prewarm_effective"] = saved_ocr > 0
+        if saved_ocr <= 0:
+            logger.warning("预热后首次 OCR 延迟没有下降，预热可能未覆盖识别模型")
+
+    path = write_results("prewarm", {"params": vars(args), "modes": results}, args.out)
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+    print(f"结果已写入：{path}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
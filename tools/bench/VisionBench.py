@@ -0,0 +1,160 @@
+"""
+多模态解答基准测试
+
+同一组题目截图分别以三种方式解答，比较端到端延迟与准确率：
+- text：OCR 文本交给文本模型；
+- vision：截图直接交给视觉模型；
+- auto：含图片/公式的样本（answers.json 中 rich 为 true）或 OCR 置信度低时用视觉模型，其余走 OCR。
+
+文本模型与视觉模型分别由两个本地模拟服务提供（延迟、准确率可分别配置）。模拟服务不理解题目，
+因此 OCR 文本与标注原文的相似度低于 --min-similarity 时，文本模型按答错处理，以体现 OCR 丢失信息的代价：
+
+    python -m tools.bench.VisionBench --fixtures tools/bench/fixtures --latency-ms 800 --vision-latency-ms 1500
+"""
+
+import sys
+import json
+import string
+import argparse
+from time import perf_counter
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from config.JsonLoadConfig import get_llm_vision_config
+from service.SolutionService import SolutionService, select_option_indices, Image
+from tools.llms.DeepSeek import DeepSeek
+from tools.llms.OpenAIVision import OpenAIVision, encode_image
+from tools.bench.FakeLLMServer import FakeLLMServer
+from tools.bench.BenchCommon import require_fixtures, text_similarity, write_results, stage_summary_ms
+
+MODES = ("text", "vision", "auto")
+
+
+def _wrong_answer(answer: List[str]) -> List[str]:
+    return [next((c for c in string.ascii_uppercase[:4] if c not in answer), "A")]
+
+
+def _load_image(path: str):
+    with Image.open(path) as im:
+        return im.convert("RGB")
+
+
+def profile_ocr(solution: SolutionService, fixtures: List[Dict[str, Any]], max_side: int, quality: int) -> Dict[str, Dict[str, Any]]:
+    """预先对每个样本做一次 OCR（兼作预热），记录置信度、与原文的相似度和压缩后的图片大小。"""
+    out = {}
+    for fx in fixtures:
+        img = _load_image(fx["path"])
+        text, confidence = solution.ocr_text_scored(img)
+        out[fx["name"]] = {
+            "confidence": confidence,
+            "similarity": text_similarity(fx["text"], text),
+            "image_kb": round(len(encode_image(img, max_side, quality)) * 3 / 4 / 1024, 1),
+        }
+    return out
+
+
+def run_mode(
+    mode: str,
+    fixtures: List[Dict[str, Any]],
+    solution: SolutionService,
+    text_server: FakeLLMServer,
+    vision_server: FakeLLMServer,
+    ocr_profile: Dict[str, Dict[str, Any]],
+    min_similarity: float,
+    repeat: int = 1,
+) -> Dict[str, Any]:
+    cfg = solution.vision_cfg
+    samples: Dict[str, List[float]] = {"total": [], "text": [], "vision": []}
+    correct = 0
+    details = []
+    for _ in range(max(1, repeat)):
+        for fx in fixtures:
+            img = _load_image(fx["path"])
+            sim = ocr_profile[fx["name"]]["similarity"]
+            text_ok = sim is None or sim >= min_similarity
+            text_server.prime(fx["answer"] if text_ok else _wrong_answer(fx["answer"]))
+            vision_server.prime(fx["answer"])
+            if mode == "text":
+                cfg["mode"] = "never"
+            elif mode == "vision":
+                cfg["mode"] = "always"
+            else:
+                # 离线时没有页面，用标注的 rich 代替图片/公式检查
+                cfg["mode"] = "always" if fx["rich"] else "auto"
+
+            t0 = perf_counter()
+            try:
+                result, used, _ = solution.answer_from_image(img)
+            except Exception as e:
+                logger.warning(f"{fx['name']} 解答失败：{e}")
+                result, used = {}, "text"
+            chosen = select_option_indices(result.get("selected") or [], fx["options"])
+            elapsed = perf_counter() - t0
+            text_server.reset()
+            vision_server.reset()
+
+            ok = chosen == select_option_indices(fx["answer"], fx["options"])
+            correct += int(ok)
+            samples["total"].append(elapsed)
+            samples[used].append(elapsed)
+            details.append({"name": fx["name"], "mode": used, "ok": ok, "total_ms": round(elapsed * 1000, 2)})
+
+    n = len(details)
+    return {
+        "questions": n,
+        "accuracy": round(correct / n, 4) if n else None,
+        "vision_share": round(sum(1 for d in details if d["mode"] == "vision") / n, 4) if n else None,
+        "stages_ms": stage_summary_ms({k: v for k, v in samples.items() if v}),
+        "details": details,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="多模态解答基准测试")
+    parser.add_argument("--fixtures", default=None, help="样本目录（含 answers.json）")
+    parser.add_argument("--modes", nargs="*", default=list(MODES), choices=MODES)
+    parser.add_argument("--latency-ms", type=float, default=800, help="模拟文本模型的平均延迟")
+    parser.add_argument("--vision-latency-ms", type=float, default=1500, help="模拟视觉模型的平均延迟")
+    parser.add_argument("--jitter-ms", type=float, default=200, help="模拟模型的延迟抖动")
+    parser.add_argument("--llm-accuracy", type=float, default=1.0, help="文本模型在 OCR 无误时答对的概率")
+    parser.add_argument("--vision-accuracy", type=float, default=0.95, help="视觉模型答对的概率")
+    parser.add_argument("--min-similarity", type=float, default=0.9, help="OCR 相似度低于该值时文本模型按答错处理")
+    parser.add_argument("--min-confidence", type=float, default=None, help="auto 模式的 OCR 置信度阈值（默认取配置）")
+    parser.add_argument("--repeat", type=int, default=1, help="样本重复轮数")
+    parser.add_argument("--out", default=None, help="结果 JSON 路径")
+    args = parser.parse_args(argv)
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    fixtures = require_fixtures(args.fixtures)
+    if fixtures is None:
+        return 2
+    vision_cfg = {**get_llm_vision_config(), "enabled": True}
+    if args.min_confidence is not None:
+        vision_cfg["min_ocr_confidence"] = args.min_confidence
+
+    results: Dict[str, Any] = {"params": vars(args), "modes": {}}
+    with FakeLLMServer(args.latency_ms, args.jitter_ms, args.llm_accuracy) as text_server, \
+            FakeLLMServer(args.vision_latency_ms, args.jitter_ms, args.vision_accuracy, seed=1) as vision_server:
+        llm = DeepSeek(api_key="bench", base_url=text_server.base_url, model="fake")
+        vision = OpenAIVision(api_key="bench", base_url=vision_server.base_url, model="fake-vision")
+        solution = SolutionService(llm=llm, vision=vision)
+        solution.vision_cfg = vision_cfg
+        ocr_profile = profile_ocr(solution, fixtures, vision_cfg["max_side"], vision_cfg["jpeg_quality"])
+        results["ocr_profile"] = ocr_profile
+        for mode in args.modes:
+            results["modes"][mode] = run_mode(
+                mode, fixtures, solution, text_server, vision_server, ocr_profile, args.min_similarity, args.repeat
+            )
+
+    path = write_results("vision", results, args.out)
+    summary = {m: {k: v for k, v in r.items() if k != "details"} for m, r in results["modes"].items()}
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    print(f"结果已写入：{path}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
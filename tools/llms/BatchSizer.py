@@ -0,0 +1,81 @@
+import math
+from collections import deque
+from threading import Lock
+from typing import Deque, Optional, Tuple
+
+from loguru import logger
+
+
+class BatchSizer:
+    """
+    依据实测耗时选择批量解答的题目数。
+
+    以最近若干次成功请求拟合 耗时 ≈ 固定开销 + 单题耗时 × 题数，
+    取目标耗时内能容纳的最大题数；批量校验失败时上限减半，之后每次成功再逐步放宽。
+    """
+
+    def __init__(
+        self,
+        initial_size: int = 5,
+        min_size: int = 1,
+        max_size: int = 20,
+        target_latency_seconds: float = 15.0,
+        window: int = 20,
+    ):
+        self.min_size = max(1, min_size)
+        self.max_size = max(self.min_size, max_size)
+        self.target = target_latency_seconds
+        self._size = min(max(initial_size, self.min_size), self.max_size)
+        self._ceiling = self.max_size
+        # (题数, 耗时秒)
+        self._samples: Deque[Tuple[int, float]] = deque(maxlen=window)
+        self._lock = Lock()
+
+    def size(self) -> int:
+        with self._lock:
+            return min(self._size, self._ceiling)
+
+    def fit(self) -> Optional[Tuple[float, float]]:
+        """最小二乘拟合（固定开销, 单题耗时），样本只有一种题数时假设固定开销为 0。"""
+        with self._lock:
+            samples = list(self._samples)
+        if not samples:
+            return None
+        sizes = {n for n, _ in samples}
+        if len(sizes) == 1:
+            n = next(iter(sizes))
+            mean = sum(t for _, t in samples) / len(samples)
+            return 0.0, mean / n
+        k = len(samples)
+        mx = sum(n for n, _ in samples) / k
+        my = sum(t for _, t in samples) / k
+        sxx = sum((n - mx) ** 2 for n, _ in samples)
+        sxy = sum((n - mx) * (t - my) for n, t in samples)
+        slope = sxy / sxx if sxx else 0.0
+        return my - slope * mx, slope
+
+    def record(self, size: int, elapsed: float, ok: bool):
+        """记录一次批量请求；ok=False 表示返回结果未通过校验。"""
+        if not ok:
+            with self._lock:
+                self._ceiling = max(self.min_size, size // 2)
+            logger.debug(f"批量解答失败，批大小上限降为 {self._ceiling}")
+            return
+        with self._lock:
+            self._samples.append((size, elapsed))
+            if self._ceiling < self.max_size:
+                self._ceiling += 1
+        model = self.fit()
+        if model is None:
+            return
+        overhead, per_item = model
+        if per_item <= 0:
+            best = self.max_size
+        else:
+            best = math.floor((self.target - overhead) / per_item)
+        with self._lock:
+            self._size = min(max(best, self.min_size), self.max_size)
+        logger.debug(
+            f"批量解答耗时 {elapsed:.2f}s（{size} 题），拟合开销 {overhead:.2f}s + {per_item:.2f}s/题，"
+            f"下一批 {self.size()} 题"
+        )
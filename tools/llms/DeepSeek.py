@@ -1,31 +1,89 @@
 import json
 import re
 import json
-from typing import List, Dict, Any
-from openai import OpenAI
+from time import perf_counter
+from typing import List, Dict, Any, Optional
 from loguru import logger
-from config.JsonLoadConfig import get_llm_deepseek_config
+from config.JsonLoadConfig import get_llm_deepseek_config, get_llm_batch_config, get_logging_config
+from tools.LazyImport import lazy_import
+from tools.Metrics import metrics
+from tools.llms.BatchSizer import BatchSizer
+
+# openai 导入较慢，延迟到创建客户端时
+openai = lazy_import("openai")
 
 
 # DeepSeek 配置
 DEEPSEEK_BASE_URL = "https://api.deepseek.com"
 DEEPSEEK_MODEL = "deepseek-chat"
 
+# 原始回复仅在 DEBUG 日志中截断输出
+RAW_RESPONSE_CHARS = get_logging_config()["raw_response_chars"]
+
+
+def truncate(text: str, limit: int) -> str:
+    return text if len(text) <= limit else f"{text[:limit]}...（共 {len(text)} 字符）"
+
+
+# 单题解答的系统提示词
+SYS_PROMPT = (
+    "你是答题助手，题目和答案我将会一起给你，请你自行判断是否为单选题或多选题。只返回严格 JSON（不包含任何额外文本或代码块）。"
+    "若是判断题，则只返回 {\"selected\": [\"对\"]} 或 {\"selected\": [\"错\"]}。"
+    "如果你无法判断这道题的正确答案，则返回一个你认为对的选择，前提是需要判断出这是选择题还是判断题。"
+    "字段：selected；值为选项字母数组，如格式：{\"selected\": [\"A\"]}；多选则返回多个字母，如 {\"selected\": [\"A\", \"C\"]}。"
+    "用户给出的原始文本中可能存在其他信息不是题干或者选项的，请你自行识别题干与选项并选择答案。"
+)
+
+# 批量解答的系统提示词：多道题合并为一次请求，按题号返回答案
+BATCH_SYS_PROMPT = (
+    "你是答题助手。我会一次给你多道题，每道题以 [题号] 开头，题目和选项一起给出，请你逐题判断是单选题、多选题还是判断题。"
+    "只返回严格 JSON（不包含任何额外文本或代码块），格式为 {\"answers\": [{\"id\": 1, \"selected\": [\"A\"]}, ...]}，"
+    "每道题都必须给出答案且 id 与题号一致。"
+    "selected 为选项字母数组，多选则返回多个字母；判断题返回 [\"对\"] 或 [\"错\"]。"
+    "如果你无法判断某道题的正确答案，也要返回一个你认为对的选择。"
+)
+
+
+def check_config(api_key: Optional[str] = None, base_url: Optional[str] = None) -> Dict[str, str]:
+    """
+    校验 DeepSeek 配置（不导入 openai、不发请求），返回生效的 api_key / base_url。
+    客户端在首次答题时才创建，启动时先调用本函数，配置错误时立即失败，而不是等到第一道题才发现。
+    """
+    ds = get_llm_deepseek_config()
+    api_key = api_key or ds.get("api_key")
+    if not api_key or api_key == "YOUR_API_KEY":
+        logger.error("DeepSeek API 密钥未配置")
+        raise RuntimeError("请在 config.json 的 llm.deepseek.api_key 写入真实的密钥，或在代码中传入 api_key。")
+    base_url = base_url or ds.get("base_url") or DEEPSEEK_BASE_URL
+    if not str(base_url).startswith(("http://", "https://")):
+        logger.error(f"DeepSeek base_url 无效：{base_url}")
+        raise RuntimeError("llm.deepseek.base_url 须以 http:// 或 https:// 开头。")
+    return {"api_key": api_key, "base_url": base_url}
+
 
 class DeepSeek:
     def __init__(
         self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        model: Optional[str] = None,
     ):
-        # 统一从 JsonLoadConfig 读取
+        # 统一从 JsonLoadConfig 读取，显式传入的参数优先（如基准测试指向本地模拟服务）
         ds = get_llm_deepseek_config()
-        self.api_key = ds.get("api_key")
-        if not self.api_key or self.api_key == "YOUR_API_KEY":
-            logger.error("DeepSeek API 密钥未配置")
-            raise RuntimeError("请在 config.json 的 llm.deepseek.api_key 写入真实的密钥，或在代码中传入 api_key。")
-        self.client = OpenAI(api_key=self.api_key, base_url=ds.get("base_url") or DEEPSEEK_BASE_URL)
-        self.model = ds.get("model") or DEEPSEEK_MODEL
+        checked = check_config(api_key, base_url)
+        self.api_key = checked["api_key"]
+        self.base_url = checked["base_url"]
+        self.client = openai.OpenAI(api_key=self.api_key, base_url=self.base_url)
+        self.model = model or ds.get("model") or DEEPSEEK_MODEL
+        # 批量解答的批大小按实测耗时调整
+        batch = get_llm_batch_config()
+        self.batch_enabled = batch["enabled"]
+        self.batch_sizer = BatchSizer(
+            batch["initial_size"], batch["min_size"], batch["max_size"], batch["target_latency_seconds"]
+        )
         logger.info(f"DeepSeek 初始化完成，模型：{self.model}")
 
+    @metrics.timed("quiz.llm")
     def answer_question(self, qa_text: str) -> Dict[str, Any]:
         """
         直接把题目与选项的原始文本交给模型，不做任何预处理/分离。
@@ -35,15 +93,8 @@ class DeepSeek:
             logger.error("题目不能为空")
             raise ValueError("qa_text 不能为空")
 
-        sys_prompt = (
-            "你是答题助手，题目和答案我将会一起给你，请你自行判断是否为单选题或多选题。只返回严格 JSON（不包含任何额外文本或代码块）。"
-            "若是判断题，则只返回 {\"selected\": [\"对\"]} 或 {\"selected\": [\"错\"]}。"
-            "如果你无法判断这道题的正确答案，则返回一个你认为对的选择，前提是需要判断出这是选择题还是判断题。"
-            "字段：selected；值为选项字母数组，如格式：{\"selected\": [\"A\"]}；多选则返回多个字母，如 {\"selected\": [\"A\", \"C\"]}。"
-            "用户给出的原始文本中可能存在其他信息不是题干或者选项的，请你自行识别题干与选项并选择答案。"
-        )
         messages = [
-            {"role": "system", "content": sys_prompt},
+            {"role": "system", "content": SYS_PROMPT},
             {"role": "user", "content": qa_text},
         ]
 
@@ -52,7 +103,7 @@ class DeepSeek:
             model=self.model,
             messages=messages,
         )
-        logger.info(f"DeepSeek 原始回复：{resp}")
+        logger.debug(f"DeepSeek 原始回复：{truncate(str(resp), RAW_RESPONSE_CHARS)}")
         
         # 提取模型回复内容
         content = resp.choices[0].message.content if resp and resp.choices else ""
@@ -60,34 +111,135 @@ class DeepSeek:
         
         return self.parse_content(content)
 
-    def parse_content(self, content: str) -> Dict[str, Any]:
+    @metrics.timed("prewarm.llm")
+    def ping(self):
         """
-        仅解析模型返回的严格 JSON，提取 selected 数组。
-        - 允许答案元素为选项字母（统一转为大写）、中文“对/错”、或选项原文；
-        - 若解析不到有效 selected，则返回空数组。
+        轻量请求（GET /models）保持与 LLM 服务的 HTTP 连接池活跃，
+        避免随堂测试时重新建立 TCP/TLS 连接；失败时抛出异常。
         """
-        raw = content or ""
+        self.client.models.list()
+
+    def answer_questions(self, questions: List[str]) -> List[Dict[str, Any]]:
+        """
+        批量解答：多道题合并为一次请求，批大小由 batch_sizer 按实测耗时给出。
+        某批返回结果缺题或无法解析时，保留有效答案，其余题目二分后重试，单题时退回 answer_question。
+        返回与 questions 一一对应的 {"selected": [...]}。
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(questions)
+        if not self.batch_enabled:
+            return [self.answer_question(q) for q in questions]
+        pos = 0
+        while pos < len(questions):
+            chunk = list(range(pos, min(len(questions), pos + self.batch_sizer.size())))
+            self._solve_chunk(questions, chunk, results)
+            pos += len(chunk)
+        return [r or {"selected": []} for r in results]
+
+    def _solve_chunk(self, questions: List[str], indices: List[int], results: List[Optional[Dict[str, Any]]]):
+        if len(indices) == 1:
+            i = indices[0]
+            try:
+                results[i] = self.answer_question(questions[i])
+            except Exception as e:
+                logger.error(f"单题解答失败：{e}")
+            return
+        start = perf_counter()
+        try:
+            answers = self._request_batch([questions[i] for i in indices])
+        except Exception as e:
+            logger.warning(f"批量解答请求失败：{e}")
+            answers = {}
+        elapsed = perf_counter() - start
+        missing = []
+        for k, i in enumerate(indices):
+            sel = answers.get(k + 1)
+            if sel:
+                results[i] = {"selected": sel}
+            else:
+                missing.append(i)
+        self.batch_sizer.record(len(indices), elapsed, ok=not missing)
+        if not missing:
+            return
+        logger.warning(f"批量解答 {len(indices)} 题中 {len(missing)} 题无有效答案，拆分重试")
+        half = (len(missing) + 1) // 2
+        self._solve_chunk(questions, missing[:half], results)
+        if missing[half:]:
+            self._solve_chunk(questions, missing[half:], results)
+
+    @metrics.timed("quiz.llm_batch")
+    def _request_batch(self, questions: List[str]) -> Dict[int, List[str]]:
+        """一次请求解答多道题，返回 {题号: selected}（题号从 1 开始）。"""
+        user = "\n\n".join(f"[{k + 1}]\n{q}" for k, q in enumerate(questions))
+        messages = [
+            {"role": "system", "content": BATCH_SYS_PROMPT},
+            {"role": "user", "content": user},
+        ]
+        logger.info(f"批量解答 {len(questions)} 题")
+        resp = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+        )
+        content = resp.choices[0].message.content if resp and resp.choices else ""
+        logger.debug(f"DeepSeek 批量回复内容：{content}")
+        return self.parse_batch_content(content)
+
+    @staticmethod
+    def _strip_fences(raw: str) -> str:
         cleaned = raw.strip()
         cleaned = re.sub(r"^```json\s*|\s*```$", "", cleaned)
         cleaned = re.sub(r"^```\s*|\s*```$", "", cleaned)
+        return cleaned
+
+    @staticmethod
+    def _normalize_selected(sel: Any) -> List[str]:
+        """
+        规范化答案数组：
+        - 允许答案元素为选项字母（统一转为大写）、中文“对/错”、或选项原文；
+        - 非数组返回空数组。
+        """
+        selected: List[str] = []
+        if not isinstance(sel, list):
+            return selected
+        for s in sel:
+            if s is None:
+                continue
+            token = str(s).strip()
+            if not token:
+                continue
+            # 字母统一大写，其余保留原样（含“对/错”和选项原文）
+            if re.fullmatch(r"[A-Za-z]", token):
+                token = token.upper()
+            selected.append(token)
+        return selected
+
+    def parse_batch_content(self, content: str) -> Dict[int, List[str]]:
+        """解析批量回复：{"answers": [{"id": 1, "selected": [...]}]}，也接受直接返回的数组。"""
+        out: Dict[int, List[str]] = {}
+        try:
+            data = json.loads(self._strip_fences(content or ""))
+        except Exception:
+            return out
+        items = data.get("answers") if isinstance(data, dict) else data
+        for item in items if isinstance(items, list) else []:
+            if not isinstance(item, dict):
+                continue
+            try:
+                qid = int(item.get("id"))
+            except (TypeError, ValueError):
+                continue
+            out[qid] = self._normalize_selected(item.get("selected"))
+        return out
 
+    def parse_content(self, content: str) -> Dict[str, Any]:
+        """
+        仅解析模型返回的严格 JSON，提取 selected 数组；
+        若解析不到有效 selected，则返回空数组。
+        """
+        raw = content or ""
         result: Dict[str, Any] = {"selected": [], "raw": raw}
         try:
-            data = json.loads(cleaned)
-            sel = data.get("selected")
-            if isinstance(sel, list):
-                selected: List[str] = []
-                for s in sel:
-                    if s is None:
-                        continue
-                    token = str(s).strip()
-                    if not token:
-                        continue
-                    # 字母统一大写，其余保留原样（含“对/错”和选项原文）
-                    if re.fullmatch(r"[A-Za-z]", token):
-                        token = token.upper()
-                    selected.append(token)
-                result["selected"] = selected
+            data = json.loads(self._strip_fences(raw))
+            result["selected"] = self._normalize_selected(data.get("selected"))
         except Exception:
             pass
         logger.debug(f"DeepSeek.parse_content: result={result}")
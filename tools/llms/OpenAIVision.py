@@ -0,0 +1,82 @@
+import base64
+from io import BytesIO
+from typing import Any, Dict, Optional
+from loguru import logger
+from config.JsonLoadConfig import get_llm_vision_config
+from tools.LazyImport import lazy_import
+from tools.Metrics import metrics
+from tools.llms.DeepSeek import DeepSeek, SYS_PROMPT
+
+Image = lazy_import("PIL.Image")
+
+# 视觉模型的附加说明：题目以截图给出，OCR 文本仅供参考
+VISION_PROMPT = (
+    SYS_PROMPT
+    + "题目与选项以截图形式给出，可能包含公式或图片，请直接根据截图作答；若附带 OCR 文本，其中可能有识别错误，仅供参考。"
+)
+
+
+def encode_image(img, max_side: int = 1024, quality: int = 80) -> str:
+    """把截图按长边缩放后编码为 JPEG data URL。"""
+    im = img.convert("RGB")
+    if max(im.size) > max_side:
+        im = im.copy()
+        im.thumbnail((max_side, max_side), Image.LANCZOS)
+    buf = BytesIO()
+    im.save(buf, format="JPEG", quality=quality, optimize=True)
+    return "data:image/jpeg;base64," + base64.b64encode(buf.getvalue()).decode("ascii")
+
+
+class OpenAIVision(DeepSeek):
+    """
+    OpenAI 兼容的视觉模型：把 ques-card-box 截图直接交给模型作答，跳过 OCR。
+    复用 DeepSeek 的客户端创建与回复解析，api_key 留空时沿用 llm.deepseek.api_key。
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        model: Optional[str] = None,
+    ):
+        self.vision_cfg = get_llm_vision_config()
+        super().__init__(
+            api_key=api_key or self.vision_cfg["api_key"] or None,
+            base_url=base_url or self.vision_cfg["base_url"],
+            model=model or self.vision_cfg["model"],
+        )
+
+    @metrics.timed("quiz.vision")
+    def answer_image(self, img, hint_text: str = "") -> Dict[str, Any]:
+        """
+        截图直接作答，hint_text 为低置信度的 OCR 文本（可为空）。
+        返回与 answer_question 相同的 {"selected": [...], "raw": ...}。
+        """
+        url = encode_image(img, self.vision_cfg["max_side"], self.vision_cfg["jpeg_quality"])
+        text = "请识别截图中的题目与选项并作答。"
+        if hint_text:
+            text += f"\nOCR 文本（可能有误）：\n{hint_text}"
+        messages = [
+            {"role": "system", "content": VISION_PROMPT},
+            {"role": "user", "content": [
+                {"type": "text", "text": text},
+                {"type": "image_url", "image_url": {"url": url}},
+            ]},
+        ]
+        logger.info(f"视觉模型解答，图片 {len(url) * 3 // 4 // 1024} KB")
+        resp = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+        )
+        content = resp.choices[0].message.content if resp and resp.choices else ""
+        logger.info(f"视觉模型回复内容：{content}")
+        return self.parse_content(content)
+
+
+def get_vision_client() -> Optional[OpenAIVision]:
+    """
+    获取视觉模型客户端，未启用时返回 None。
+    """
+    if not get_llm_vision_config()["enabled"]:
+        return None
+    return OpenAIVision()
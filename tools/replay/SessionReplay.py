@@ -0,0 +1,401 @@
+"""
+页面会话回放：把 SessionRecorder 录制的命令时间线经伪驱动交还给 WebEdgeService，
+以完整的 Main 流程确定性地复现一次真实运行。
+
+- 伪驱动是 selenium 自带的远程 WebDriver，命令执行器按（命令, 参数）顺序返回录制的原始响应，
+  元素对象、错误转换等均由 selenium 自身完成；
+- 随堂测试的 OCR 文本与 LLM 结果直接取自录制，不再调用模型；
+- sleep、WebDriverWait 与调度器的等待按 time_scale 缩短，一小时的录制数秒内回放完毕。
+
+输出回放是否做出了相同的操作（点击、导航等），以及命令次数与录制耗时构成的命令画像，
+可对两个版本的回放结果做差异比较：
+
+    python -m tools.replay.SessionReplay recordings/session-20250101-120000.jsonl
+    python -m tools.replay.SessionReplay --compare bench_results/replay-a.json bench_results/replay-b.json
+"""
+
+import sys
+import copy
+import json
+import time
+import argparse
+import tempfile
+from collections import Counter, deque
+from contextlib import contextmanager
+from pathlib import Path
+from threading import Lock
+from types import SimpleNamespace
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from tools.CommandTracer import script_fingerprint
+from tools.PageHelpers import CLICK_HELPERS, helper_name
+from tools.bench.BenchCommon import write_results
+
+# 视为“决策”的命令：导航、点击与输入
+_ACTION_COMMANDS = ("get", "refresh", "back", "elementClick", "elementSendKeys", "actions")
+_SCRIPT_COMMANDS = ("w3cExecuteScript", "executeScript")
+# W3C 元素引用的键名
+_ELEMENT_KEY = "element-6066-11e4-a52e-4f735466cecf"
+# 回放时缩短等待的模块（均以 from time import sleep 导入）
+_SLEEP_MODULES = ("Main", "service.WebEdgeService", "service.SolutionService")
+
+
+def request_key(command: str, params: Any) -> str:
+    """请求键：命令名 + 去掉 sessionId 后按键排序的参数。"""
+    p = {k: v for k, v in (params or {}).items() if k != "sessionId"} if isinstance(params, dict) else params
+    return f"{command} {json.dumps(p, sort_keys=True, ensure_ascii=False, default=str)}"
+
+
+def _element_ids(value: Any) -> List[str]:
+    if isinstance(value, dict):
+        if _ELEMENT_KEY in value:
+            return [str(value[_ELEMENT_KEY])]
+        return [i for v in value.values() for i in _element_ids(v)]
+    if isinstance(value, list):
+        return [i for v in value for i in _element_ids(v)]
+    return []
+
+
+def decision_of(command: str, params: Any) -> Optional[str]:
+    """把一条命令归纳为决策描述，非决策命令返回 None。"""
+    params = params if isinstance(params, dict) else {}
+    if command == "get":
+        return f"get {params.get('url')}"
+    if command in _ACTION_COMMANDS:
+        return f"{command} {params.get('id') or ''}".strip()
+    if command in _SCRIPT_COMMANDS:
+        script = str(params.get("script") or "")
+        if ".click()" in script:
+            return f"script-click {','.join(_element_ids(params.get('args')))}"
+        name = helper_name(script)
+        if name in CLICK_HELPERS:
+            # 页面辅助函数内的点击：选项按下标记录
+            return f"helper-{name} {json.dumps(params.get('args') or [], ensure_ascii=False)}".strip()
+    return None
+
+
+class Recording:
+    """录制文件：会话信息、命令、事件与 DOM 快照。"""
+
+    def __init__(self, path: str):
+        self.path = str(path)
+        self.meta: Dict[str, Any] = {}
+        self.commands: List[Dict[str, Any]] = []
+        self.events: List[Dict[str, Any]] = []
+        self.snapshots: List[Dict[str, Any]] = []
+        ready_seq = 0
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except Exception:
+                    continue
+                kind = row.get("type")
+                if kind == "meta":
+                    self.meta = row
+                elif kind == "cmd":
+                    self.commands.append(row)
+                elif kind == "event":
+                    self.events.append(row)
+                    if row.get("kind") == "driver_ready" and not ready_seq:
+                        ready_seq = row["seq"]
+                elif kind == "snapshot":
+                    self.snapshots.append(row)
+        self.ready_seq = ready_seq
+
+    @property
+    def duration_s(self) -> float:
+        rows = self.commands + self.events
+        return max((r.get("t", 0) for r in rows), default=0.0)
+
+    def session_commands(self) -> List[Dict[str, Any]]:
+        """启动阶段之后的命令（回放从此处开始比对）。"""
+        return [r for r in self.commands if r["seq"] > self.ready_seq]
+
+    def event_values(self, kind: str, field: str) -> List[Any]:
+        return [e.get(field) for e in self.events if e.get("kind") == kind]
+
+
+class ReplayExecutor:
+    """
+    伪命令执行器：相同请求键的响应按录制顺序依次返回，用尽后重复最后一次，
+    录制中不存在的请求记为未命中并返回空值。
+    """
+
+    def __init__(self, recording: Recording):
+        self.recording = recording
+        self._queues: Dict[str, Deque[Dict[str, Any]]] = {}
+        self._last: Dict[str, Dict[str, Any]] = {}
+        for row in recording.commands:
+            self._queues.setdefault(request_key(row["command"], row.get("params")), deque()).append(row)
+        self.served: List[Tuple[str, Any, Optional[Dict[str, Any]]]] = []
+        self.misses: Counter = Counter()
+        self._lock = Lock()
+
+    def execute(self, command: str, params: Dict[str, Any]):
+        if command == "newSession":
+            meta = self.recording.meta
+            return {"value": {"sessionId": meta.get("session_id") or "replay", "capabilities": meta.get("capabilities") or {}}}
+        key = request_key(command, params)
+        with self._lock:
+            queue = self._queues.get(key)
+            if queue:
+                row = queue.popleft()
+                self._last[key] = row
+            else:
+                row = self._last.get(key)
+            self.served.append((command, params, row))
+            if row is None:
+                self.misses[key[:160]] += 1
+        if row is None:
+            return {"value": None}
+        if row.get("response") is None and row.get("error"):
+            from selenium.common.exceptions import WebDriverException
+            raise WebDriverException(f"录制中的命令失败：{row['error']}")
+        # selenium 会原地解包响应，返回副本
+        return copy.deepcopy(row.get("response"))
+
+    def close(self):
+        pass
+
+
+def create_replay_driver(executor: ReplayExecutor):
+    """以伪执行器创建 selenium 远程 WebDriver，newSession 由录制的会话信息应答。"""
+    from selenium.webdriver.remote.webdriver import WebDriver
+    from selenium.webdriver.common.options import ArgOptions
+
+    class ReplayOptions(ArgOptions):
+        @property
+        def default_capabilities(self):
+            return {}
+
+        def to_capabilities(self):
+            return {"browserName": "replay"}
+
+    return WebDriver(command_executor=executor, options=ReplayOptions())
+
+
+def _make_replay_configurator(executor: ReplayExecutor):
+    from config.WebdriverConfig import WebDriverConfigurator
+
+    class ReplayConfigurator(WebDriverConfigurator):
+        """回放用配置器：不启动浏览器，直接返回伪驱动。"""
+
+        def build(self):
+            with self.phase("launch"):
+                return create_replay_driver(executor)
+
+    return ReplayConfigurator()
+
+
+def _make_replay_solution(recording: Recording):
+    from service.SolutionService import SolutionService
+
+    class ReplayLLM:
+        def __init__(self, results: deque):
+            self._results = results
+
+        def answer_question(self, question: str):
+            return self._results.popleft() if self._results else {"selected": []}
+
+        def answer_image(self, img, hint_text: str = ""):
+            return self.answer_question(hint_text)
+
+    class ReplaySolutionService(SolutionService):
+        """
+        OCR 文本与 LLM（含视觉模型）结果取自录制；截图与图片/公式检查命令仍照常发出以保持命令序列一致。
+        """
+
+        def __init__(self):
+            llm = ReplayLLM(deque(recording.event_values("llm", "result")))
+            super().__init__(llm=llm, vision=llm)
+            self._texts = deque(zip(
+                recording.event_values("ocr", "text"), recording.event_values("ocr", "confidence")
+            ))
+
+        def ocr_text_scored(self, img_or_path):
+            return self._texts.popleft() if self._texts else ("", None)
+
+    return ReplaySolutionService()
+
+
+@contextmanager
+def scaled_time(scale: float):
+    """缩短流程中的等待：模块级 sleep、WebDriverWait 的轮询与超时、调度器的 asyncio 等待。"""
+    import importlib
+    from selenium.webdriver.support import wait as wait_module
+    from service.ListenerSupervisor import ListenerSupervisor
+
+    real_sleep = time.sleep
+    origin = time.monotonic()
+
+    def sleep(seconds: float):
+        real_sleep(max(0.0, seconds) * scale)
+
+    def monotonic() -> float:
+        # 虚拟时钟：流逝速度为真实时间的 1/scale
+        return origin + (time.monotonic() - origin) / scale
+
+    patched = []
+    for name in _SLEEP_MODULES:
+        try:
+            mod = importlib.import_module(name)
+        except Exception:
+            continue
+        if hasattr(mod, "sleep"):
+            patched.append((mod, "sleep", mod.sleep))
+            mod.sleep = sleep
+    patched.append((wait_module, "time", wait_module.time))
+    wait_module.time = SimpleNamespace(sleep=sleep, monotonic=monotonic, time=time.time)
+    patched.append((ListenerSupervisor, "time_scale", ListenerSupervisor.time_scale))
+    ListenerSupervisor.time_scale = scale
+    try:
+        yield
+    finally:
+        for obj, attr, value in reversed(patched):
+            setattr(obj, attr, value)
+
+
+def command_profile(rows: List[Tuple[str, Any, Optional[Dict[str, Any]]]]) -> Dict[str, Dict[str, Any]]:
+    """按命令名汇总次数与录制耗时（毫秒）。"""
+    out: Dict[str, Dict[str, Any]] = {}
+    for command, _params, row in rows:
+        p = out.setdefault(command, {"count": 0, "ms": 0.0})
+        p["count"] += 1
+        if row is not None:
+            p["ms"] += float(row.get("elapsed") or 0) * 1000
+    for p in out.values():
+        p["ms"] = round(p["ms"], 1)
+    return dict(sorted(out.items(), key=lambda kv: kv[1]["ms"], reverse=True))
+
+
+def hot_calls(rows: List[Tuple[str, Any, Optional[Dict[str, Any]]]], top: int = 15) -> List[Dict[str, Any]]:
+    """按（命令, 脚本指纹）汇总的热点调用。"""
+    agg: Dict[Tuple[str, str], List[float]] = {}
+    for command, params, row in rows:
+        st = agg.setdefault((command, script_fingerprint(command, params)), [0, 0.0])
+        st[0] += 1
+        if row is not None:
+            st[1] += float(row.get("elapsed") or 0) * 1000
+    ranked = sorted(agg.items(), key=lambda kv: kv[1][1], reverse=True)[:top]
+    return [{"command": c, "fingerprint": fp, "count": int(n), "ms": round(ms, 1)} for (c, fp), (n, ms) in ranked]
+
+
+def compare_decisions(recorded: List[str], replayed: List[str]) -> Dict[str, Any]:
+    first = None
+    for i in range(max(len(recorded), len(replayed))):
+        a = recorded[i] if i < len(recorded) else None
+        b = replayed[i] if i < len(replayed) else None
+        if a != b:
+            first = {"index": i, "recorded": a, "replayed": b}
+            break
+    return {"recorded": len(recorded), "replayed": len(replayed), "match": first is None, "first_divergence": first}
+
+
+def replay(path: str, time_scale: float = 0.01) -> Dict[str, Any]:
+    """回放一份录制，返回决策比对结果与命令画像。"""
+    import service.WebEdgeService as web_module
+    from service.WebEdgeService import WebEdgeService
+    from Main import run_pipeline
+
+    recording = Recording(path)
+    executor = ReplayExecutor(recording)
+    error = None
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as tmp, scaled_time(time_scale):
+        web_module._solution_service = _make_replay_solution(recording)
+        # 空闲预热会消耗录制的 OCR 结果并改变探测节奏，回放时关闭
+        prewarm_config = web_module.get_prewarm_config
+        web_module.get_prewarm_config = lambda: {**prewarm_config(), "enabled": False}
+        service = None
+        try:
+            # Cookie 写入临时目录，避免覆盖真实登录态
+            service = WebEdgeService(
+                configurator=_make_replay_configurator(executor),
+                cookies_file=str(Path(tmp) / "cookies.json"),
+            )
+            run_pipeline(service)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            logger.error(f"回放中断：{error}")
+        finally:
+            if service is not None:
+                service.shutdown()
+            web_module._solution_service = None
+            web_module.get_prewarm_config = prewarm_config
+    wall_s = time.perf_counter() - start
+
+    recorded_rows = [(r["command"], r.get("params"), r) for r in recording.session_commands()]
+    replayed_rows = [(c, p, r) for c, p, r in executor.served if c != "newSession"]
+    recorded_decisions = [d for d in (decision_of(c, p) for c, p, _ in recorded_rows) if d]
+    replayed_decisions = [d for d in (decision_of(c, p) for c, p, _ in replayed_rows) if d]
+    duration = recording.duration_s
+    return {
+        "recording": recording.path,
+        "recorded_duration_s": round(duration, 2),
+        "replay_wall_s": round(wall_s, 2),
+        "speedup": round(duration / wall_s, 1) if wall_s else None,
+        "time_scale": time_scale,
+        "error": error,
+        "decisions": compare_decisions(recorded_decisions, replayed_decisions),
+        "commands": {"recorded": len(recorded_rows), "replayed": len(replayed_rows)},
+        "misses": {"total": sum(executor.misses.values()), "top": dict(executor.misses.most_common(10))},
+        "snapshots": Counter(s.get("label") for s in recording.snapshots),
+        "profile": {"recorded": command_profile(recorded_rows), "replayed": command_profile(replayed_rows)},
+        "hot_calls": hot_calls(replayed_rows),
+    }
+
+
+def diff_profiles(a: Dict[str, Any], b: Dict[str, Any]) -> Dict[str, Any]:
+    """比较两次回放结果的命令画像（b 相对 a 的变化）。"""
+    pa = a.get("profile", {}).get("replayed", {})
+    pb = b.get("profile", {}).get("replayed", {})
+    rows = {}
+    for command in sorted(set(pa) | set(pb)):
+        ca, cb = pa.get(command, {}), pb.get(command, {})
+        rows[command] = {
+            "count": [ca.get("count", 0), cb.get("count", 0), cb.get("count", 0) - ca.get("count", 0)],
+            "ms": [ca.get("ms", 0.0), cb.get("ms", 0.0), round(cb.get("ms", 0.0) - ca.get("ms", 0.0), 1)],
+        }
+    def total(p: Dict[str, Any], k: str) -> float:
+        return round(sum(v.get(k, 0) for v in p.values()), 1)
+
+    return {
+        "a": a.get("revision"),
+        "b": b.get("revision"),
+        "decisions_match": [a.get("decisions", {}).get("match"), b.get("decisions", {}).get("match")],
+        "total_count": [total(pa, "count"), total(pb, "count")],
+        "total_ms": [total(pa, "ms"), total(pb, "ms")],
+        "commands": rows,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="页面会话回放与命令画像比较")
+    parser.add_argument("recording", nargs="?", help="录制文件（recordings/session-*.jsonl）")
+    parser.add_argument("--time-scale", type=float, default=0.01, help="等待时间缩放倍率")
+    parser.add_argument("--compare", nargs=2, metavar=("A", "B"), help="比较两个回放结果 JSON")
+    parser.add_argument("--out", default=None, help="结果 JSON 路径")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        a, b = (json.loads(Path(p).read_text(encoding="utf-8")) for p in args.compare)
+        print(json.dumps(diff_profiles(a, b), ensure_ascii=False, indent=2))
+        return 0
+    if not args.recording:
+        parser.error("需要指定录制文件或 --compare")
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    results = replay(args.recording, args.time_scale)
+    path = write_results("replay", results, args.out)
+    summary = {k: v for k, v in results.items() if k not in ("profile", "hot_calls")}
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    print(f"结果已写入：{path}", file=sys.stderr)
+    return 0 if results["decisions"]["match"] and not results["error"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+"""
+端到端性能测试：启动本地仿真站点与模拟 LLM 服务，以无头浏览器运行完整的 Main 流程。
+
+生成临时配置（site 指向仿真站点、LLM 指向模拟服务、开启阶段耗时统计），
+通过环境变量 AZS_CONFIG 交给子进程中的 Main.py，运行结束后汇总：
+- 每小时完成课程数（按实际墙钟时间，视频时钟已按 time_scale 加速）；
+- WebDriver 命令总数与每节课程的平均命令数；
+- 各阶段耗时与仿真站点记录的随堂测试答题情况；
+- --stall-at 注入播放器静默暂停时，lesson.stall 阶段为每次停滞损失的时间。
+
+    python -m tools.replica.E2EBench --browser chromium --lessons 3 --time-scale 20
+    python -m tools.replica.E2EBench --lessons 2 --lesson-seconds 900 --time-scale 20 --stall-at 0.6
+"""
+
+import os
+import sys
+import json
+import argparse
+import shutil
+import tempfile
+import subprocess
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Dict, List, Optional
+
+from config.JsonLoadConfig import get_project_root
+from tools.bench.BenchCommon import write_results
+from tools.bench.FakeLLMServer import FakeLLMServer
+from tools.replica.ReplicaServer import ReplicaServer, build_course
+
+
+def make_config(
+    base: Dict[str, Any],
+    replica: ReplicaServer,
+    llm: FakeLLMServer,
+    work_dir: Path,
+    browser: str,
+    binary_path: str = "",
+    driver_path: str = "",
+) -> Dict[str, Any]:
+    """在项目配置基础上覆盖站点、浏览器、LLM 与统计配置。"""
+    cfg = json.loads(json.dumps(base))
+    site = replica.site_config()
+    cfg["exam"] = {**cfg.get("exam", {}), "url_hint": site.pop("exam_url_hint")}
+    cfg["site"] = site
+    cfg.setdefault("llm", {})["deepseek"] = {"api_key": "bench", "base_url": llm.base_url, "model": "fake"}
+    web = cfg.setdefault("web_config", {})
+    web.update({
+        "browser": browser,
+        "headless": True,
+        "binary_path": binary_path,
+        "driver_path": driver_path or web.get("driver_path") or "",
+        "cookie_path": str(work_dir / "cookies.json"),
+        "user_data_dir": "",
+        "debugger_address": "",
+        "blocked_urls": [],
+    })
+    cfg["metrics"] = {"enabled": True, "dir": str(work_dir), "formats": ["jsonl"]}
+    return cfg
+
+
+def read_metrics(work_dir: Path) -> Dict[str, Any]:
+    """读取子进程导出的 metrics JSONL，返回 {stage: summary}。"""
+    summaries: Dict[str, Any] = {}
+    for path in sorted(work_dir.glob("metrics-*.jsonl")):
+        for line in path.read_text(encoding="utf-8").splitlines():
+            try:
+                row = json.loads(line)
+            except Exception:
+                continue
+            if row.get("type") == "summary":
+                summaries[row["stage"]] = row
+    return summaries
+
+
+def _ms(summary: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if not summary or not summary.get("count"):
+        return None
+    return {k: (round(summary[k] * 1000, 1) if k != "count" else summary[k])
+            for k in ("count", "p50", "p95", "max") if summary.get(k) is not None}
+
+
+def run_e2e(
+    replica: ReplicaServer,
+    llm: FakeLLMServer,
+    browser: str = "chromium",
+    binary_path: str = "",
+    driver_path: str = "",
+    timeout: float = 1800,
+    keep: bool = False,
+) -> Dict[str, Any]:
+    root = get_project_root()
+    base = json.loads((root / "config.json").read_text(encoding="utf-8"))
+    work_dir = Path(tempfile.mkdtemp(prefix="azs-e2e-"))
+    cfg = make_config(base, replica, llm, work_dir, browser, binary_path, driver_path)
+    cfg_path = work_dir / "config.json"
+    cfg_path.write_text(json.dumps(cfg, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    env = {**os.environ, "AZS_CONFIG": str(cfg_path)}
+    start = perf_counter()
+    timed_out = False
+    try:
+        with (work_dir / "main.log").open("w", encoding="utf-8") as out:
+            proc = subprocess.run(
+                [sys.executable, str(root / "Main.py")],
+                cwd=str(root),
+                env=env,
+                stdout=out,
+                stderr=subprocess.STDOUT,
+                timeout=timeout,
+            )
+        returncode = proc.returncode
+    except subprocess.TimeoutExpired:
+        timed_out = True
+        returncode = None
+    wall_s = perf_counter() - start
+
+    stats = replica.stats()
+    summaries = read_metrics(work_dir)
+    commands = sum(s.get("count", 0) for stage, s in summaries.items() if stage.startswith("webdriver."))
+    finished = len(stats["finished"])
+    top_commands = sorted(
+        ((stage[len("webdriver."):], s.get("count", 0)) for stage, s in summaries.items() if stage.startswith("webdriver.")),
+        key=lambda kv: kv[1],
+        reverse=True,
+    )
+    if not keep:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return {
+        "returncode": returncode,
+        "timed_out": timed_out,
+        "wall_s": round(wall_s, 2),
+        "lessons_finished": finished,
+        "lessons_per_hour": round(finished / wall_s * 3600, 2) if wall_s else None,
+        "webdriver_commands": commands,
+        "commands_per_lesson": round(commands / finished, 1) if finished else None,
+        "top_commands": dict(top_commands[:10]),
+        "quizzes": stats["quizzes"],
+        "stalls_injected": stats["stalls"],
+        "quiz_answers": stats["answers"],
+        "quiz_correct": stats["correct"],
+        "tests_submitted": stats["tests_submitted"],
+        "test_accuracy": round(stats["test_correct"] / stats["test_questions"], 3) if stats["test_questions"] else None,
+        "llm_requests": llm.requests,
+        "stages_ms": {stage: _ms(s) for stage, s in summaries.items() if not stage.startswith("webdriver.")},
+        "work_dir": str(work_dir) if keep else None,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="本地仿真站点上的端到端性能测试")
+    parser.add_argument("--browser", default="chromium", choices=["edge", "chromium", "chrome", "firefox"])
+    parser.add_argument("--binary-path", default="", help="浏览器可执行文件路径")
+    parser.add_argument("--driver-path", default="", help="驱动目录（相对 tools）或留空自动查找")
+    parser.add_argument("--chapters", type=int, default=1)
+    parser.add_argument("--lessons", type=int, default=3, help="每章课程数")
+    parser.add_argument("--lesson-seconds", type=int, default=120, help="每节视频的名义时长")
+    parser.add_argument("--tests", action="store_true", help="每章附带章节测试")
+    parser.add_argument("--quiz-at", type=float, nargs="*", default=[0.5], help="随堂测试弹出位置（时长比例）")
+    parser.add_argument("--time-scale", type=float, default=20.0, help="播放时钟加速倍数")
+    parser.add_argument("--stall-at", type=float, nargs="*", default=[], help="播放器静默暂停位置（时长比例）")
+    parser.add_argument("--latency-ms", type=float, default=800, help="模拟 LLM 的平均延迟")
+    parser.add_argument("--timeout", type=float, default=1800, help="子进程超时（秒）")
+    parser.add_argument("--keep", action="store_true", help="保留临时目录（配置、日志与统计）")
+    parser.add_argument("--out", default=None, help="结果 JSON 路径")
+    args = parser.parse_args(argv)
+
+    chapters = build_course(args.chapters, args.lessons, args.lesson_seconds, tests=args.tests)
+    with ReplicaServer(chapters, args.quiz_at, args.time_scale, stall_at=args.stall_at) as replica, \
+            FakeLLMServer(args.latency_ms, jitter_ms=args.latency_ms / 4) as llm:
+        results = run_e2e(replica, llm, args.browser, args.binary_path, args.driver_path, args.timeout, args.keep)
+    results["params"] = vars(args)
+    path = write_results("e2e_replica", results, args.out)
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+    print(f"结果已写入：{path}", file=sys.stderr)
+    return 0 if results["returncode"] == 0 and not results["timed_out"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+"""
+学习页面的本地仿真服务，供无头端到端性能测试使用。
+
+页面流程与真实站点一致：入口页 / → 学习页 /onlinestuh5（自动“选择课程”）→ 课程页 /study/index，
+章节测试在新标签页打开 /exam。
+课程页复刻了程序依赖的 DOM 结构（课前必读弹窗、目录、播放器控制栏、倍速、随堂测试弹窗），
+视频进度由页面脚本时钟驱动，time_scale 可成倍加速，使整套流程在几分钟内跑完。
+
+页面通过 POST /api/event 上报打开课程、完成课程、弹出与提交随堂测试等事件，
+GET /api/stats 返回汇总，作为测试结果的服务端依据。单独运行：
+
+    python -m tools.replica.ReplicaServer --port 8800 --lessons 3 --lesson-seconds 120
+"""
+
+import sys
+import json
+import argparse
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread, Lock
+from time import time, sleep
+from typing import Any, Dict, List, Optional
+
+STATIC_DIR = Path(__file__).resolve().parent / "static"
+
+_CONTENT_TYPES = {
+    ".html": "text/html; charset=utf-8",
+    ".js": "application/javascript; charset=utf-8",
+    ".css": "text/css; charset=utf-8",
+}
+
+
+def build_exam(count: int = 5) -> List[Dict[str, Any]]:
+    """生成章节测试题目：单选、多选与判断题轮换。"""
+    kinds = [
+        ("单选题", ["A. 正确选项", "B. 错误选项一", "C. 错误选项二", "D. 错误选项三"], ["A"]),
+        ("多选题", ["A. 正确选项一", "B. 正确选项二", "C. 错误选项", "D. 错误选项"], ["A", "B"]),
+        ("判断题", ["对", "错"], ["A"]),
+    ]
+    out = []
+    for i in range(count):
+        kind, options, answer = kinds[i % len(kinds)]
+        out.append({"type": kind, "stem": f"仿真章节测试第{i + 1}题", "options": options, "answer": answer})
+    return out
+
+
+def build_course(
+    chapters: int = 2,
+    lessons_per_chapter: int = 3,
+    lesson_seconds: int = 120,
+    finished: int = 0,
+    tests: bool = False,
+) -> List[Dict[str, Any]]:
+    """生成课程目录：前 finished 节标记为已完成。"""
+    out = []
+    n = 0
+    for ci in range(chapters):
+        lessons = []
+        for li in range(lessons_per_chapter):
+            lessons.append({
+                "id": f"{ci + 1}.{li + 1}",
+                "name": f"{ci + 1}.{li + 1} 仿真课程第{n + 1}节",
+                "seconds": int(lesson_seconds),
+                "finished": n < finished,
+            })
+            n += 1
+        out.append({"lessons": lessons, "test": {"done": False} if tests else None})
+    return out
+
+
+class ReplicaServer:
+    def __init__(
+        self,
+        chapters: Optional[List[Dict[str, Any]]] = None,
+        quiz_at: Optional[List[float]] = None,
+        time_scale: float = 1.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        title: str = "本地仿真课程",
+        choose_delay_ms: int = 500,
+        tick_ms: int = 100,
+        exam_questions: int = 5,
+        stall_at: Optional[List[float]] = None,
+    ):
+        self.chapters = chapters if chapters is not None else build_course()
+        self.config = {
+            "title": title,
+            # 随堂测试弹出位置（占课程时长的比例）
+            "quiz_at": list(quiz_at if quiz_at is not None else [0.5]),
+            # 播放器静默暂停的位置（占课程时长的比例），用于验证停滞恢复
+            "stall_at": list(stall_at or []),
+            "time_scale": time_scale,
+            "tick_ms": tick_ms,
+            "choose_delay_ms": choose_delay_ms,
+            "quiz": {
+                "stem": "1. 下列哪一项是正确的？",
+                "options": ["A. 正确选项", "B. 错误选项一", "C. 错误选项二", "D. 错误选项三"],
+                "answer": ["A"],
+            },
+            "exam": {"questions": build_exam(exam_questions)},
+        }
+        self._lock = Lock()
+        self._stats: Dict[str, Any] = {
+            "started": time(),
+            "page_views": {},
+            "opened": 0,
+            "finished": [],
+            "quizzes": 0,
+            "stalls": 0,
+            "answers": 0,
+            "correct": 0,
+            "tests_submitted": 0,
+            "test_questions": 0,
+            "test_correct": 0,
+            "events": [],
+        }
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def site_config(self) -> Dict[str, str]:
+        """与 config.json 的 site 段对应的地址配置。"""
+        base = self.base_url
+        return {
+            "base_url": base,
+            "study_url_hint": base + "onlinestuh5",
+            "course_url_hint": base + "study/index",
+            "exam_url_hint": base + "exam",
+            "login_domain_hint": "passport.zhihuishu.com",
+        }
+
+    def start(self) -> "ReplicaServer":
+        self._thread = Thread(target=self._server.serve_forever, name="ReplicaServer", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ---------- 状态 ----------
+
+    def _lesson(self, lesson_id: str) -> Optional[Dict[str, Any]]:
+        for chapter in self.chapters:
+            for lesson in chapter["lessons"]:
+                if lesson["id"] == lesson_id:
+                    return lesson
+        return None
+
+    def record(self, event: Dict[str, Any]):
+        kind = event.get("type")
+        with self._lock:
+            st = self._stats
+            st["events"].append({"ts": round(time(), 3), **event})
+            if kind == "open":
+                st["opened"] += 1
+            elif kind == "finish":
+                lesson = self._lesson(str(event.get("lesson")))
+                if lesson is not None:
+                    lesson["finished"] = True
+                if event.get("lesson") not in st["finished"]:
+                    st["finished"].append(event.get("lesson"))
+            elif kind == "quiz":
+                st["quizzes"] += 1
+            elif kind == "stall":
+                st["stalls"] += 1
+            elif kind == "answer":
+                st["answers"] += 1
+                st["correct"] += int(bool(event.get("correct")))
+            elif kind == "exam_submit":
+                try:
+                    test = self.chapters[int(event.get("chapter") or 0)].get("test")
+                except (ValueError, IndexError):
+                    test = None
+                if test is not None:
+                    test["done"] = True
+                st["tests_submitted"] += 1
+                st["test_questions"] += int(event.get("total") or 0)
+                st["test_correct"] += int(event.get("correct") or 0)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            st = json.loads(json.dumps(self._stats))
+        st["elapsed_s"] = round(time() - st.pop("started"), 3)
+        return st
+
+    def render(self, name: str) -> bytes:
+        """读取页面模板并注入课程配置（含当前完成状态）。"""
+        with self._lock:
+            cfg = {**self.config, "chapters": self.chapters}
+            raw = json.dumps(cfg, ensure_ascii=False)
+        text = (STATIC_DIR / name).read_text(encoding="utf-8")
+        return text.replace("__REPLICA_CONFIG__", raw).encode("utf-8")
+
+    # ---------- HTTP ----------
+
+    def _make_handler(self):
+        server = self
+        pages = {"/": "entry.html", "/onlinestuh5": "study.html", "/study/index": "course.html", "/exam": "exam.html"}
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, code: int, body: bytes, content_type: str):
+                self.send_response(code)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _json(self, code: int, data: Any):
+                self._send(code, json.dumps(data, ensure_ascii=False).encode("utf-8"), "application/json")
+
+            def do_GET(self):
+                path = self.path.split("?", 1)[0]
+                if path in pages:
+                    with server._lock:
+                        views = server._stats["page_views"]
+                        views[path] = views.get(path, 0) + 1
+                    self._send(200, server.render(pages[path]), _CONTENT_TYPES[".html"])
+                elif path.startswith("/static/"):
+                    target = (STATIC_DIR / path[len("/static/"):]).resolve()
+                    if STATIC_DIR not in target.parents or not target.is_file():
+                        self._json(404, {"error": "not found"})
+                        return
+                    ctype = _CONTENT_TYPES.get(target.suffix, "application/octet-stream")
+                    self._send(200, target.read_bytes(), ctype)
+                elif path == "/api/stats":
+                    self._json(200, server.stats())
+                else:
+                    self._json(404, {"error": "not found"})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    payload = json.loads(self.rfile.read(length) or b"{}")
+                except Exception:
+                    payload = {}
+                if self.path.split("?", 1)[0] == "/api/event" and isinstance(payload, dict):
+                    server.record(payload)
+                    self._json(200, {"ok": True})
+                else:
+                    self._json(404, {"error": "not found"})
+
+        return Handler
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="学习页面本地仿真服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--chapters", type=int, default=2)
+    parser.add_argument("--lessons", type=int, default=3, help="每章课程数")
+    parser.add_argument("--lesson-seconds", type=int, default=120, help="每节视频的名义时长")
+    parser.add_argument("--finished", type=int, default=0, help="预先标记为已完成的课程数")
+    parser.add_argument("--tests", action="store_true", help="每章附带章节测试入口")
+    parser.add_argument("--quiz-at", type=float, nargs="*", default=[0.5], help="随堂测试弹出位置（时长比例）")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="播放时钟加速倍数")
+    parser.add_argument("--stall-at", type=float, nargs="*", default=[], help="播放器静默暂停位置（时长比例）")
+    args = parser.parse_args(argv)
+
+    chapters = build_course(args.chapters, args.lessons, args.lesson_seconds, args.finished, args.tests)
+    server = ReplicaServer(chapters, args.quiz_at, args.time_scale, args.host, args.port, stall_at=args.stall_at).start()
+    print(json.dumps(server.site_config(), ensure_ascii=False, indent=2))
+    try:
+        while True:
+            sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
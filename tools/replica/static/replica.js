@@ -0,0 +1,219 @@
+// 课程页仿真：目录、播放器时钟、倍速与随堂测试弹窗，DOM 结构与选择器与真实页面一致。
+// 视频进度由脚本时钟驱动（time_scale 加速），<video> 仅播放画布生成的合成画面。
+(function () {
+  "use strict";
+  var cfg = window.REPLICA;
+  var $ = function (sel, root) { return (root || document).querySelector(sel); };
+
+  var state = {
+    lesson: null,      // 当前课程 {id, name, seconds, finished}
+    cur: 0,            // 当前播放秒数
+    rate: 1,
+    playing: false,
+    quizShown: {},     // 当前课程已弹出的测试点下标
+    stallShown: {},    // 当前课程已触发的静默暂停点下标
+    quizOpen: false,
+  };
+
+  function post(path, body) {
+    try {
+      fetch(path, { method: "POST", headers: { "Content-Type": "application/json" }, body: JSON.stringify(body) });
+    } catch (e) { /* 统计上报失败不影响页面 */ }
+  }
+
+  function fmt(sec) {
+    sec = Math.max(0, Math.floor(sec));
+    var h = Math.floor(sec / 3600), m = Math.floor(sec % 3600 / 60), s = sec % 60;
+    return [h, m, s].map(function (v) { return (v < 10 ? "0" : "") + v; }).join(":");
+  }
+
+  // ---------- 目录 ----------
+
+  function renderCatalogue() {
+    $("#course-title").textContent = cfg.title;
+    var view = $("div.el-scrollbar.catalogue div.el-scrollbar__view");
+    cfg.chapters.forEach(function (chapter, ci) {
+      var item = document.createElement("div");
+      item.className = "item";
+      var main = document.createElement("div");
+      main.className = "item-main";
+      chapter.lessons.forEach(function (lesson) {
+        var child = document.createElement("div");
+        child.className = "child";
+        var info = document.createElement("div");
+        info.className = "child-info cur hasvideo";
+        info.setAttribute("data-lesson", lesson.id);
+        info.innerHTML = '<div class="child-main"><div class="child-line"><span></span></div></div>';
+        $("span", info).textContent = lesson.name;
+        if (lesson.finished) { markFinished(info); }
+        info.addEventListener("click", function () { openLesson(lesson, info); });
+        child.appendChild(info);
+        main.appendChild(child);
+      });
+      if (chapter.test) {
+        var test = document.createElement("div");
+        test.className = "item-test";
+        test.innerHTML = '<span>章节测试</span><span class="float-right"></span>';
+        $("span.float-right", test).textContent = chapter.test.done ? "已完成" : "去完成";
+        // 与真实站点一致：测试页面在新标签页打开
+        $("span.float-right", test).addEventListener("click", function () {
+          window.open("/exam?chapter=" + ci, "_blank");
+        });
+        main.appendChild(test);
+      }
+      item.appendChild(main);
+      view.appendChild(item);
+    });
+  }
+
+  function markFinished(info) {
+    if (!$("img.finish-icon", info)) {
+      var img = document.createElement("img");
+      img.className = "finish-icon";
+      img.alt = "";
+      info.appendChild(img);
+    }
+  }
+
+  function openLesson(lesson, info) {
+    Array.prototype.forEach.call(document.querySelectorAll(".child-info.active"), function (el) {
+      el.classList.remove("active");
+    });
+    info.classList.add("active");
+    state.lesson = lesson;
+    state.info = info;
+    state.cur = 0;
+    state.quizShown = {};
+    state.stallShown = {};
+    setPlaying(false);
+    $("span.duration").textContent = fmt(lesson.seconds);
+    renderTime();
+    post("/api/event", { type: "open", lesson: lesson.id });
+  }
+
+  // ---------- 播放器 ----------
+
+  function setPlaying(on) {
+    state.playing = !!on && !!state.lesson && !state.quizOpen;
+    $("#playButton").className = state.playing ? "pauseButton" : "playButton";
+    var video = $("#video");
+    try { if (state.playing) { video.play(); } else { video.pause(); } } catch (e) { /* 合成画面不可用时忽略 */ }
+  }
+
+  function renderTime() {
+    $("span.currentTime").textContent = fmt(state.cur);
+  }
+
+  function tick(dt) {
+    if (!state.playing || !state.lesson) { return; }
+    var lesson = state.lesson;
+    state.cur = Math.min(lesson.seconds, state.cur + dt * state.rate * cfg.time_scale);
+    renderTime();
+    for (var i = 0; i < cfg.quiz_at.length; i++) {
+      if (!state.quizShown[i] && state.cur >= cfg.quiz_at[i] * lesson.seconds) {
+        state.quizShown[i] = true;
+        showQuiz(i);
+        return;
+      }
+    }
+    // 模拟播放器无提示地暂停（缓冲失败、失去焦点等），不弹出任何窗口
+    var stalls = cfg.stall_at || [];
+    for (var j = 0; j < stalls.length; j++) {
+      if (!state.stallShown[j] && state.cur >= stalls[j] * lesson.seconds) {
+        state.stallShown[j] = true;
+        setPlaying(false);
+        post("/api/event", { type: "stall", lesson: lesson.id, index: j });
+        return;
+      }
+    }
+    if (state.cur >= lesson.seconds) {
+      setPlaying(false);
+      if (!lesson.finished) {
+        lesson.finished = true;
+        markFinished(state.info);
+        post("/api/event", { type: "finish", lesson: lesson.id });
+      }
+    }
+  }
+
+  function bindControls() {
+    $("#playButton").addEventListener("click", function () { setPlaying(!state.playing); });
+    Array.prototype.forEach.call(document.querySelectorAll("div.speedBox .speedTab"), function (tab) {
+      tab.addEventListener("click", function () {
+        Array.prototype.forEach.call(document.querySelectorAll("div.speedBox .speedTab"), function (t) {
+          t.classList.remove("active");
+        });
+        tab.classList.add("active");
+        state.rate = parseFloat(tab.getAttribute("data-rate")) || 1;
+      });
+    });
+  }
+
+  // 画布生成的合成画面，让 <video> 有真实的帧可播放
+  function startSyntheticVideo() {
+    var canvas = $("#frame"), video = $("#video");
+    if (!canvas.captureStream) { return; }
+    var ctx = canvas.getContext("2d");
+    try { video.srcObject = canvas.captureStream(10); } catch (e) { return; }
+    setInterval(function () {
+      ctx.fillStyle = state.playing ? "#234" : "#222";
+      ctx.fillRect(0, 0, canvas.width, canvas.height);
+      ctx.fillStyle = "#fff";
+      ctx.font = "20px sans-serif";
+      ctx.fillText((state.lesson ? state.lesson.name : "") + " " + fmt(state.cur), 16, 96);
+    }, 100);
+  }
+
+  // ---------- 随堂测试 ----------
+
+  function showQuiz(index) {
+    var quiz = cfg.quiz;
+    state.quizOpen = true;
+    setPlaying(false);
+    var wrapper = $("div.ai-test-question-wrapper");
+    $(".stem", wrapper).textContent = quiz.stem;
+    var box = $(".options", wrapper);
+    box.innerHTML = "";
+    quiz.options.forEach(function (text) {
+      var opt = document.createElement("div");
+      opt.className = "option";
+      opt.textContent = text;
+      opt.addEventListener("click", function () { opt.classList.toggle("active"); });
+      box.appendChild(opt);
+    });
+    wrapper.style.display = "block";
+    wrapper.setAttribute("data-quiz", String(index));
+    post("/api/event", { type: "quiz", lesson: state.lesson.id, index: index });
+  }
+
+  function bindQuiz() {
+    var wrapper = $("div.ai-test-question-wrapper");
+    $("span.submits", wrapper).addEventListener("click", function () {
+      var selected = [];
+      Array.prototype.forEach.call(wrapper.querySelectorAll(".option"), function (opt, i) {
+        if (opt.classList.contains("active")) { selected.push(String.fromCharCode(65 + i)); }
+      });
+      post("/api/event", {
+        type: "answer",
+        lesson: state.lesson && state.lesson.id,
+        selected: selected,
+        correct: selected.join("") === cfg.quiz.answer.join(""),
+      });
+    });
+    $(".header-box .close-box", wrapper).addEventListener("click", function () {
+      wrapper.style.display = "none";
+      state.quizOpen = false;
+    });
+  }
+
+  renderCatalogue();
+  bindControls();
+  bindQuiz();
+  startSyntheticVideo();
+  var last = performance.now();
+  setInterval(function () {
+    var now = performance.now();
+    tick((now - last) / 1000);
+    last = now;
+  }, cfg.tick_ms);
+})();